@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+import gc
+import argparse
+import tracemalloc
+from gatenlp import Document
+from gatenlp.utils import init_logger, run_start, run_stop
+
+
+def process_args(args=None):
+    parser = argparse.ArgumentParser(
+        description = """
+        Benchmark the memory needed per annotation for annotations without features, with an
+        allocated (but empty) feature map as every annotation had before the feature map got created
+        lazily, with features, and for an annotation set in columnar storage mode.
+        """
+    )
+    parser.add_argument("--n", type=int, default=100000,
+                        help="Number of annotations to create")
+    args = parser.parse_args(args)
+    return args
+
+
+def measure(n, columnar=False, access_features=False, features=None):
+    """
+    Return the number of bytes allocated per annotation for a set with n annotations.
+    """
+    gc.collect()
+    tracemalloc.start()
+    doc = Document("x" * (n + 1))
+    doc.columnar = columnar
+    annset = doc.annset()
+    for i in range(n):
+        ann = annset.add(i, i + 1, "Token", features)
+        if access_features:
+            ann.features
+    del ann
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / n
+
+
+if __name__ == "__main__":
+
+    args = process_args()
+    logger = init_logger("annmemory")
+    run_start(logger, "annmemory")
+
+    n = args.n
+    logger.info(f"Number of annotations: {n}")
+    logger.info(f"Bytes per annotation, no features:             {measure(n):.1f}")
+    logger.info(f"Bytes per annotation, empty feature map:       {measure(n, access_features=True):.1f}")
+    logger.info(f"Bytes per annotation, one feature:             {measure(n, features=dict(a=1)):.1f}")
+    logger.info(f"Bytes per annotation, columnar, no features:   {measure(n, columnar=True):.1f}")
+    logger.info(f"Bytes per annotation, columnar, one feature:   "
+                f"{measure(n, columnar=True, features=dict(a=1)):.1f}")
+    run_stop(logger, "annmemory")
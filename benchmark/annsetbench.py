@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import datetime
+import tracemalloc
+import gatenlp
+from gatenlp import Document
+from gatenlp.impl import get_index_backend, index_backend_names
+from gatenlp.utils import init_logger, run_start, run_stop
+
+
+def process_args(args=None):
+    parser = argparse.ArgumentParser(
+        description = """
+        Benchmark building the offset index and the queries of the offset index and of annotation sets
+        on synthetic documents with nested Paragraph/Sentence/Token annotations and overlapping
+        Lookup annotations, for each index backend. The time and peak memory of each benchmark
+        get written to a JSON report, so that the reports for different versions can be compared.
+        """
+    )
+    parser.add_argument("--sizes", type=str, default="10000,100000",
+                        help="Comma separated numbers of annotations of the synthetic documents, "
+                             "e.g. 10000,100000,1000000,10000000")
+    parser.add_argument("--backends", type=str, default=None,
+                        help="Comma separated index backend names, default: all backends which can be imported")
+    parser.add_argument("--queries", type=int, default=1000,
+                        help="Number of query spans to run each query method with")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="Random seed for creating the documents and query spans")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Do not measure peak memory, which requires running each benchmark a second time")
+    parser.add_argument("--out", type=str, default="annsetbench.json",
+                        help="File to write the JSON report to")
+    args = parser.parse_args(args)
+    return args
+
+
+def make_intervals(n, seed=1):
+    """
+    Return a text and a list of (start, end, type) tuples for about n annotations: each paragraph has 1 to 8
+    sentences, each sentence 5 to 40 tokens, and a tenth of the tokens start a Lookup annotation of 1 to 3 tokens
+    which may cross sentence boundaries.
+    """
+    rand = random.Random(seed)
+    intvls = []
+    tokens = []
+    off = 0
+    while len(intvls) < n:
+        pstart = off
+        for _ in range(rand.randint(1, 8)):
+            sstart = off
+            for _ in range(rand.randint(5, 40)):
+                end = off + rand.randint(1, 10)
+                tokens.append((off, end))
+                intvls.append((off, end, "Token"))
+                off = end + 1
+            intvls.append((sstart, off - 1, "Sentence"))
+        intvls.append((pstart, off - 1, "Paragraph"))
+        off += 1
+    for idx in range(0, len(tokens), 10):
+        last = min(len(tokens) - 1, idx + rand.randint(0, 2))
+        intvls.append((tokens[idx][0], tokens[last][1], "Lookup"))
+    del intvls[n:]
+    return "x" * off, intvls
+
+
+def make_doc(text, intvls, backend):
+    doc = Document(text)
+    doc.index_backend = backend
+    annset = doc.annset()
+    for start, end, anntype in intvls:
+        annset.add(start, end, anntype)
+    return doc
+
+
+def measure(setup, func, memory=True):
+    """
+    Run func with the result of setup and return the elapsed time in seconds and, if memory is True, the peak
+    memory in bytes allocated while running func a second time, with a fresh result of setup, since func may
+    change it (e.g. remove annotations).
+    """
+    arg = setup()
+    gc.collect()
+    start = time.perf_counter()
+    func(arg)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        arg = setup()
+        gc.collect()
+        tracemalloc.start()
+        func(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def benchmarks(text, intvls, backend, spans):
+    """
+    Return a list of (name, number of operations, setup, function) tuples: setup gets called before each run
+    and returns the argument passed to the function.
+    """
+    tuples = [(start, end, annid) for annid, (start, end, _) in enumerate(intvls)]
+    toremove = tuples[::10]
+    indexclass = get_index_backend(backend).offset_index_class
+
+    def index_built():
+        idx = indexclass()
+        idx.update(tuples)
+        return idx
+
+    def doc_built():
+        doc = make_doc(text, intvls, backend)
+        doc.annset().create_indices()
+        return doc.annset()
+
+    def iterate_queries(method):
+        def run(idx):
+            query = getattr(idx, method)
+            for start, end in spans:
+                for _ in query(start, end):
+                    pass
+        return run
+
+    def call_queries(method, **kwargs):
+        def run(obj):
+            query = getattr(obj, method)
+            for start, end in spans:
+                query(start, end, **kwargs)
+        return run
+
+    def index_update(idx):
+        idx.update(tuples)
+        # make sure indices which defer the work until they are used get built
+        idx.min_start()
+
+    def index_add(idx):
+        for start, end, annid in tuples:
+            idx.add(start, end, annid)
+
+    def index_remove(idx):
+        for start, end, annid in toremove:
+            idx.remove(start, end, annid)
+
+    def annset_add(annset):
+        for start, end, anntype in intvls:
+            annset.add(start, end, anntype)
+
+    def annset_remove(annset):
+        for annid in range(0, len(intvls), 10):
+            annset.remove(annid)
+
+    def annset_add_query(annset):
+        # adding and querying alternate, e.g. when annotating token by token
+        for start, end in spans:
+            annset.add(start, end, "New")
+            annset.covering(start, end)
+            annset.overlapping(start, end)
+
+    def annset_iter(annset):
+        for _ in annset:
+            pass
+
+    def annset_fast_iter(annset):
+        for _ in annset.fast_iter():
+            pass
+
+    def annset_with_type(annset):
+        for anntype in ["Token", "Sentence", "Paragraph", "Lookup"]:
+            for _ in annset.with_type(anntype):
+                pass
+
+    nanns = len(intvls)
+    nqueries = len(spans)
+    ret = [
+        ("index.update", nanns, indexclass, index_update),
+        ("index.add", nanns, indexclass, index_add),
+        ("index.remove", len(toremove), index_built, index_remove),
+    ]
+    for method in ["within", "covering", "overlapping", "at"]:
+        ret.append(("index." + method, nqueries, index_built, iterate_queries(method)))
+    for method in ["count_within", "count_covering", "count_overlapping"]:
+        ret.append(("index." + method, nqueries, index_built, call_queries(method)))
+    ret.extend([
+        ("annset.add", nanns, lambda: make_doc(text, [], backend).annset(), annset_add),
+        ("annset.create_indices", 1, lambda: make_doc(text, intvls, backend).annset(),
+         lambda annset: annset.create_indices()),
+        ("annset.remove", nanns // 10, doc_built, annset_remove),
+        ("annset.add+query", nqueries, doc_built, annset_add_query),
+        ("annset.iter", nanns, doc_built, annset_iter),
+        ("annset.fast_iter", nanns, doc_built, annset_fast_iter),
+        ("annset.with_type", nanns, doc_built, annset_with_type),
+    ])
+    for method in ["within", "covering", "overlapping", "coextensive", "startingat", "start_min_ge", "start_ge",
+                   "start_lt", "before", "after", "count_within", "count_covering", "count_overlapping"]:
+        ret.append(("annset." + method, nqueries, doc_built, call_queries(method)))
+        ret.append(("annset." + method + "[Token]", nqueries, doc_built,
+                    call_queries(method, anntype="Token")))
+    ret.extend([
+        ("annset.next_k", nqueries, doc_built, call_queries("next_k", k=10)),
+        ("annset.prev_k", nqueries, doc_built, call_queries("prev_k", k=10)),
+        ("annset.nearest[Lookup]", nqueries, doc_built, call_queries("nearest", anntype="Lookup")),
+    ])
+    return ret
+
+
+def run_benchmarks(size, backend, nqueries, seed, memory, logger):
+    text, intvls = make_intervals(size, seed=seed)
+    rand = random.Random(seed)
+    # query spans: the offsets of random annotations
+    spans = [(start, end) for start, end, _ in rand.sample(intvls, min(nqueries, len(intvls)))]
+    results = []
+    for name, nops, setup, func in benchmarks(text, intvls, backend, spans):
+        elapsed, peak = measure(setup, func, memory=memory)
+        result = dict(
+            benchmark=name, backend=backend, size=len(intvls), operations=nops,
+            time=elapsed, time_per_op=elapsed / max(nops, 1), peak_memory=peak,
+        )
+        logger.info(f"{backend:14s} {len(intvls):9d} {name:32s} {elapsed:10.4f}s  "
+                    f"{result['time_per_op'] * 1e6:10.2f}us/op  peak={peak}")
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+
+    args = process_args()
+    logger = init_logger("annsetbench")
+    run_start(logger, "annsetbench")
+
+    if args.backends is None:
+        backends = []
+        for name in index_backend_names():
+            try:
+                get_index_backend(name).offset_index_class
+            except ImportError:
+                logger.warning(f"Skipping backend {name}, cannot be imported")
+                continue
+            backends.append(name)
+    else:
+        backends = args.backends.split(",")
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        for backend in backends:
+            results.extend(
+                run_benchmarks(size, backend, args.queries, args.seed, not args.no_memory, logger)
+            )
+    report = dict(
+        gatenlp_version=gatenlp.__version__,
+        python_version=sys.version,
+        platform=platform.platform(),
+        date=datetime.datetime.now().isoformat(),
+        args=vars(args),
+        results=results,
+    )
+    with open(args.out, "wt") as outfp:
+        json.dump(report, outfp, indent=2)
+    logger.info(f"Report written to {args.out}")
+    run_stop(logger, "annsetbench")
@@ -5,7 +5,7 @@ import copy as lib_copy
 from functools import total_ordering
 from gatenlp.features import Features
 from gatenlp.offsetmapper import OFFSET_TYPE_JAVA, OFFSET_TYPE_PYTHON
-from gatenlp.utils import support_annotation_or_set, allowspan
+from gatenlp.utils import support_annotation_or_set, allowspan, intern_name
 from gatenlp.span import Span
 
 
@@ -22,6 +22,8 @@ class Annotation:
     only the features can be changed.
     """
 
+    __slots__ = ["_owner_set", "_features", "_type", "_start", "_end", "_id", "__weakref__"]
+
     @allowspan
     def __init__(
         self, start: int, end: int, anntype: str, features=None, annid: int = 0
@@ -63,12 +65,35 @@ class Annotation:
                 "Parameter features must not be an int: mixed up with annid?"
             )
         self._owner_set = None
-        self._features = Features(features, logger=self._log_feature_change)
-        self._type = anntype
+        # the Features instance only gets created once it is accessed or there are initial features
+        if features:
+            self._features = Features(features, logger=self._log_feature_change)
+        else:
+            self._features = None
+        self._type = intern_name(anntype)
         self._start = start
         self._end = end
         self._id = annid
 
+    @staticmethod
+    def _create(start, end, anntype, annid, features=None, owner_set=None):
+        """
+        Creates an annotation without checking the parameters, for creating many annotations from data
+        which has been checked already, e.g. when loading a document. The type must already be interned
+        and the features dict, if any, is used without copying it.
+        """
+        ann = Annotation.__new__(Annotation)
+        ann._owner_set = owner_set
+        if features:
+            ann._features = Features._from_data(features, logger=ann._log_feature_change)
+        else:
+            ann._features = None
+        ann._type = anntype
+        ann._start = start
+        ann._end = end
+        ann._id = annid
+        return ann
+
     @property
     def type(self) -> str:
         """
@@ -95,6 +120,8 @@ class Annotation:
         """
         Returns the features for the annotation.
         """
+        if self._features is None:
+            self._features = Features(logger=self._log_feature_change)
         return self._features
 
     @property
@@ -138,6 +165,14 @@ class Annotation:
         Returns:
 
         """
+        owner = self._owner_set
+        if owner is not None and owner._frozen:
+            raise Exception("Cannot change the features of an annotation in a frozen annotation set")
+        if owner is not None and owner._snapshots:
+            # copy-on-write copies of the set which still share this annotation must copy it first
+            owner._preserve(self)
+        if owner is not None and owner._feature_indices:
+            owner._update_feature_indices(self, command, feature, value)
         if self._changelog() is None:
             return
         command = "ann-" + command
@@ -167,7 +202,7 @@ class Annotation:
             and self.end == other.end
             and self.type == other.type
             and self.id == other.id
-            and self._features == other._features
+            and (self._features or {}) == (other._features or {})
         )
 
     def __hash__(self):
@@ -201,7 +236,7 @@ class Annotation:
         String representation of the annotation.
         """
         return "Annotation({},{},{},features={},id={})".format(
-            self.start, self.end, self.type, self._features, self.id
+            self.start, self.end, self.type, self._features or Features(), self.id
         )
 
     @property
@@ -467,7 +502,7 @@ class Annotation:
             "start": start,
             "end": end,
             "id": self.id,
-            "features": self._features.to_dict(),
+            "features": self._features.to_dict() if self._features is not None else {},
         }
 
     @staticmethod
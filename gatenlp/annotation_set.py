@@ -2,13 +2,20 @@
 Module for AnnotationSet class which represents a named collection of annotations which can arbitrarily overlap.
 """
 
-from typing import Any, List, Tuple, Union, Dict, Set, KeysView, Iterator, Generator
+from typing import Any, List, Tuple, Union, Dict, Set, KeysView, Iterator, Generator, Callable
 from collections.abc import Iterable
 from collections import defaultdict
+from operator import itemgetter
 import copy
+import heapq
+import weakref
+from functools import wraps
+from sortedcontainers import SortedList
 from gatenlp.span import Span
 from gatenlp.annotation import Annotation
-from gatenlp.impl import SortedIntvls
+from gatenlp.impl import (
+    ColumnarAnnotations, SnapshotAnnotations, IndexBackend, QueryCache, get_index_backend
+)
 from gatenlp.utils import support_annotation_or_set, allowspan
 
 __pdoc__ = {
@@ -25,6 +32,93 @@ class InvalidOffsetError(KeyError):
     pass
 
 
+_EMPTY_IDS = frozenset()
+
+
+def _index_add(index: dict, value, annid: int) -> None:
+    """
+    Adds the annotation id for the value to a feature index, unless the value is not hashable.
+    """
+    try:
+        ids = index.get(value)
+    except TypeError:
+        return
+    if ids is None:
+        index[value] = ids = set()
+    ids.add(annid)
+
+
+def _index_discard(index: dict, value, annid: int) -> None:
+    """
+    Removes the annotation id for the value from a feature index.
+    """
+    try:
+        ids = index.get(value)
+    except TypeError:
+        return
+    if ids is not None:
+        ids.discard(annid)
+        if not ids:
+            del index[value]
+
+
+_NOT_CACHED = object()
+
+
+def _query_key(name: str, args: tuple, kwargs: dict):
+    """
+    Returns the query cache key for a call of the query method with the given name, lists and sets of
+    types are converted so that the key is hashable.
+    """
+
+    def hashable(val):
+        if isinstance(val, list):
+            return tuple(val)
+        if isinstance(val, set):
+            return frozenset(val)
+        return val
+
+    return (
+        name,
+        tuple(hashable(arg) for arg in args),
+        tuple((key, hashable(val)) for key, val in sorted(kwargs.items())),
+    )
+
+
+def _cached_query(method):
+    """
+    Decorator for query methods which makes them use the query cache of the set, if the set has one
+    and is immutable, see `AnnotationSet.enable_query_cache`. For results which are annotation sets, only the
+    annotation ids get cached.
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def _cached(self, *args, **kwargs):
+        cache = self._query_cache
+        if cache is None or not self._is_immutable:
+            return method(self, *args, **kwargs)
+        key = _query_key(name, args, kwargs)
+        try:
+            cached = cache.get(key, _NOT_CACHED)
+        except TypeError:
+            # some parameter is not hashable
+            return method(self, *args, **kwargs)
+        if cached is _NOT_CACHED:
+            ret = method(self, *args, **kwargs)
+            if isinstance(ret, AnnotationSet):
+                cache.put(key, (True, tuple(ret._annotations)))
+            else:
+                cache.put(key, (False, ret))
+            return ret
+        isset, ret = cached
+        if isset:
+            return self.detach(restrict_to=ret)
+        return ret
+
+    return _cached
+
+
 class AnnotationSet:
     def __init__(self, name: str = "", owner_doc: "Document" = None):
         """
@@ -47,10 +141,29 @@ class AnnotationSet:
         self._owner_doc = owner_doc
         self._index_by_offset = None
         self._index_by_type = None
+        # optional map from annotation type to an offset index for just the annotations of that type,
+        # the index for a type gets created when it is first needed
+        self._index_by_type_offset = None
+        # the backend which provides the offset and type indices, see the index_backend property
+        self._index_backend = get_index_backend(
+            owner_doc.index_backend if owner_doc is not None else None
+        )
         # internally we represent the annotations as a map from annotation id (int) to Annotation
+        # or, in columnar storage mode, a gatenlp.impl.columnar.ColumnarAnnotations instance
         self._annotations = {}
         self._is_immutable = False
+        # True once the set has been frozen, see freeze
+        self._frozen = False
+        # optional cache of query results, only used while the set is immutable, see enable_query_cache
+        self._query_cache = None
         self._next_annid = 0
+        # True if the annotation mapping is shared with a copy-on-write copy of this set
+        self._shared = False
+        # weak references to the copy-on-write snapshots which may share annotations owned by this set
+        self._snapshots = None
+        # optional map from feature name to a map from feature value to the set of annotation ids
+        # with that value, see create_feature_index
+        self._feature_indices = None
 
     @property
     def name(self):
@@ -101,7 +214,11 @@ class AnnotationSet:
         """
         annset = AnnotationSet(name="detached-from:" + self.name)
         annset._is_immutable = True
-        if restrict_to is None:
+        annset._index_backend = self._index_backend
+        if isinstance(self._annotations, ColumnarAnnotations):
+            # only the columns get copied, the annotations still belong to this set
+            annset._annotations = self._annotations.view(annset, restrict_to)
+        elif restrict_to is None:
             annset._annotations = {
                 annid: self._annotations[annid] for annid in self._annotations.keys()
             }
@@ -128,6 +245,7 @@ class AnnotationSet:
         """
         annset = AnnotationSet(name="detached-from:" + self.name)
         annset._is_immutable = True
+        annset._index_backend = self._index_backend
         annset._annotations = {}
         nextid = -1
         for ann in anns:
@@ -142,6 +260,18 @@ class AnnotationSet:
         annset._next_annid = nextid + 1
         return annset
 
+    def view(self) -> "AnnotationSetView":
+        """
+        Returns a lightweight read-only view of all the annotations in this set. Queries on the
+        view, e.g. `annset.view().with_type("Token").within(sent)`, return other views which
+        only record the constraints and get answered from the indices of this set when iterated,
+        without creating any copies.
+
+        Returns:
+          an AnnotationSetView for this set
+        """
+        return AnnotationSetView(self)
+
     @property
     def immutable(self) -> bool:
         """
@@ -154,8 +284,258 @@ class AnnotationSet:
 
     @immutable.setter
     def immutable(self, val: bool) -> None:
+        if not val:
+            self._check_not_frozen("make mutable")
+            if self._query_cache is not None:
+                self._query_cache.clear()
         self._is_immutable = val
 
+    def enable_query_cache(self, maxsize: int = 1024) -> None:
+        """
+        Enables a cache for the results of the offset queries of this set, e.g. `within`, `covering`,
+        `overlapping`, `count_within` or `next_k`, keyed by the query method and its parameters. The cache
+        is only used while the set is immutable, e.g. for frozen or detached sets, and gets cleared when the set
+        is made mutable. If the cache is already enabled, its maximum size is changed.
+
+        Args:
+            maxsize: the maximum number of query results to keep, the least recently used
+                results get removed first.
+        """
+        if self._query_cache is None:
+            self._query_cache = QueryCache(maxsize)
+        else:
+            self._query_cache.maxsize = maxsize
+            self._query_cache.clear()
+
+    def disable_query_cache(self) -> None:
+        """
+        Disables and removes the query cache, see `enable_query_cache`.
+        """
+        self._query_cache = None
+
+    def query_cache_stats(self) -> Union[Dict[str, int], None]:
+        """
+        Returns the statistics of the query cache, a dictionary with the number of hits and misses,
+        the number of cached results (size) and the maximum size, or None if the query cache is not enabled.
+        """
+        if self._query_cache is None:
+            return None
+        return self._query_cache.stats()
+
+    @property
+    def frozen(self) -> bool:
+        """
+        Returns True if the annotation set has been frozen, see `freeze`.
+        """
+        return self._frozen
+
+    def freeze(self) -> None:
+        """
+        Freezes the annotation set: all indices get created right away and after that, the set cannot
+        be changed any more. Annotations cannot be added or removed, the features of the annotations
+        cannot be changed, and the indices cannot be created, removed or changed. Queries on a frozen set
+        never create or rebuild an index, so a frozen set can be queried from several threads concurrently.
+
+        Reading an annotation from a copy-on-write copy or from a set in columnar storage mode creates the
+        annotation object, and the features of an annotation get created when they are first accessed, so
+        this is all done when the set gets frozen: the annotations of a frozen set are always stored as
+        annotation objects, also if the set was in columnar storage mode before.
+
+        A frozen set cannot be unfrozen, but mutable copies can still be created, e.g. by copying the
+        owning document or with `deepcopy`.
+        """
+        if self._frozen:
+            return
+        # make sure that reading annotations never changes the annotation mapping or the annotations
+        if not isinstance(self._annotations, dict):
+            self._annotations = dict(self._annotations.items())
+            self._shared = False
+        for ann in self._annotations.values():
+            ann.features
+        self.create_indices()
+        # a set without annotations has no types, but the frozen set must still have a per-type index map
+        if self._index_by_type_offset is None:
+            self._index_by_type_offset = {}
+        for anntype in self._index_by_type:
+            self._type_offset_index(anntype)
+        # make sure that queries never change the indices
+        self._index_by_type = dict(self._index_by_type)
+        self._index_by_offset.prepare()
+        for index in self._index_by_type_offset.values():
+            index.prepare()
+        self._is_immutable = True
+        self._frozen = True
+
+    def _check_not_frozen(self, what: str) -> None:
+        """
+        Raises an exception if the set is frozen.
+        """
+        if self._frozen:
+            raise Exception("Cannot {}: annotation set {} is frozen".format(what, self.name))
+
+    @property
+    def index_backend(self) -> str:
+        """
+        Get or set the name of the index backend used for the offset and type indices of this set, see
+        `gatenlp.impl.indexbackends`. By default this is the backend of the owning document or, for a set
+        without an owning document, the backend configured with `gatenlpconfig.index_backend`.
+
+        Setting the backend discards the current indices, if any, so that they get re-created
+        with the new backend when they are needed next. Detached sets created from this set use the
+        same backend.
+        """
+        return self._index_backend.name
+
+    @index_backend.setter
+    def index_backend(self, name: str) -> None:
+        self._check_not_frozen("change the index backend")
+        self._index_backend = get_index_backend(name)
+        self._index_by_offset = None
+        self._index_by_type = None
+        self._index_by_type_offset = None
+
+    @property
+    def offset_index_class(self):
+        """
+        Get or set the class used for the offset index of this set. This is normally determined by the
+        index backend, see `index_backend`. For example, `gatenlp.impl.IntervalTree` answers repeated
+        `covering` and `overlapping` queries in sub-linear time. For sets which are mostly read after
+        they have been created or loaded, `gatenlp.impl.arrayintvls.ArrayIntvls` (requires numpy) is
+        faster to build and needs much less memory.
+
+        Setting the class discards the current offset index, if any, so that it gets re-created
+        with the new class when it is needed next. Detached sets created from this set use the
+        same class.
+        """
+        return self._index_backend.offset_index_class
+
+    @offset_index_class.setter
+    def offset_index_class(self, clazz) -> None:
+        self._check_not_frozen("change the offset index class")
+        self._index_backend = IndexBackend(
+            None, clazz, type_index_factory=self._index_backend.type_index_factory
+        )
+        self._index_by_offset = None
+        self._index_by_type_offset = None
+
+    @property
+    def columnar(self) -> bool:
+        """
+        Get or set if the annotations of this set are stored in columnar storage mode. In that mode, the
+        offsets, ids and types of the annotations are stored in compact int arrays and features are
+        only stored for annotations which have features, which needs much less memory for
+        big sets. Annotation objects are created on demand whenever an annotation is accessed, the
+        API of the set does not change.
+
+        Setting this converts the existing annotations to the new storage mode.
+        """
+        return isinstance(self._annotations, ColumnarAnnotations)
+
+    @columnar.setter
+    def columnar(self, val: bool) -> None:
+        if val == self.columnar:
+            return
+        self._check_not_frozen("change the storage mode")
+        if val:
+            self._annotations = ColumnarAnnotations(self, self._annotations.values())
+        else:
+            self._annotations = dict(self._annotations.items())
+
+    def _add_snapshot(self, snapshot: SnapshotAnnotations) -> None:
+        """
+        Registers a snapshot which may share annotations owned by this set.
+        """
+        if self._snapshots is None:
+            self._snapshots = []
+        self._snapshots.append(weakref.ref(snapshot))
+        snapshot._sources.append(self)
+
+    def _live_snapshots(self) -> List[SnapshotAnnotations]:
+        snapshots = []
+        if self._snapshots:
+            refs = []
+            for ref in self._snapshots:
+                snapshot = ref()
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+                    refs.append(ref)
+            self._snapshots = refs
+        return snapshots
+
+    def _preserve(self, ann: Annotation) -> None:
+        """
+        Called before an annotation owned by this set gets modified in place: snapshots which still
+        share the annotation copy it first.
+        """
+        for snapshot in self._live_snapshots():
+            snapshot.preserve(ann._id, ann)
+
+    def _preserve_all(self) -> None:
+        """
+        Called before all annotations get modified in place.
+        """
+        for snapshot in self._live_snapshots():
+            snapshot.preserve_all()
+
+    def _prepare_change(self) -> None:
+        """
+        Called before annotations get added to or removed from the annotation mapping: if the mapping is
+        shared with a snapshot, continue with a copy of the mapping.
+        """
+        if self._shared:
+            old = self._annotations
+            self._annotations = old.copy()
+            self._shared = False
+            if isinstance(old, SnapshotAnnotations):
+                for source in old._sources:
+                    source._add_snapshot(self._annotations)
+
+    def _cow_copy(self, name: str, owner_doc: "Document" = None) -> "AnnotationSet":
+        """
+        Creates a mutable copy-on-write copy of this set: the copy shares the annotations of this set
+        and each annotation only gets copied (shallowly) when it is first accessed in the copy or before
+        it gets changed in this set.
+
+        Args:
+          name: the name of the copy
+          owner_doc: the owning document of the copy
+        """
+        annset = AnnotationSet(name=name, owner_doc=owner_doc)
+        annset._index_backend = self._index_backend
+        annset._next_annid = self._next_annid
+        annset._annotations = SnapshotAnnotations(annset, self._annotations)
+        self._shared = True
+        self._add_snapshot(annset._annotations)
+        return annset
+
+    def _deep_copy(self, name: str, owner_doc: "Document" = None, memo=None) -> "AnnotationSet":
+        """
+        Creates a mutable copy of this set with deep copies of all annotations.
+
+        Args:
+          name: the name of the copy
+          owner_doc: the owning document of the copy
+          memo: the memoization dictionary to use for deep copying
+        """
+        annset = AnnotationSet(name=name, owner_doc=owner_doc)
+        annset._index_backend = self._index_backend
+        annset._next_annid = self._next_annid
+        annset._annotations = self._annotations
+        annset.clone_anns(memo=memo)
+        return annset
+
+    def _intervals(self, annids=None) -> List[Tuple[int, int, int]]:
+        """
+        Returns a list of (start, end, annid) tuples for all annotations or the given annotation ids.
+        For a columnar set this does not need to create any annotations.
+        """
+        anns = self._annotations
+        if not isinstance(anns, dict):
+            return anns.intervals(annids)
+        if annids is None:
+            return [(ann._start, ann._end, ann._id) for ann in anns.values()]
+        return [(ann._start, ann._end, ann._id) for ann in map(anns.__getitem__, annids)]
+
     def isdetached(self) -> bool:
         """
         Returns True if the annotation set is detached, False otherwise.
@@ -168,18 +548,200 @@ class AnnotationSet:
         The offset index is an interval tree that stores the annotation ids for the offset interval of the annotation.
         """
         if self._index_by_offset is None:
-            self._index_by_offset = SortedIntvls()
-            for ann in self._annotations.values():
-                self._index_by_offset.add(ann.start, ann.end, ann.id)
+            self._index_by_offset = self._index_backend.offset_index_class()
+            # add all intervals in bulk so the index can sort them in one pass
+            self._index_by_offset.update(self._intervals())
 
     def _create_index_by_type(self) -> None:
         """Generates the type index, if it does not already exist. The type index is a map from
         annotation type to a set of all annotation ids with that type.
         """
         if self._index_by_type is None:
-            self._index_by_type = defaultdict(set)
-            for ann in self._annotations.values():
-                self._index_by_type[ann.type].add(ann.id)
+            self._index_by_type = self._index_backend.type_index_factory()
+            if not isinstance(self._annotations, dict):
+                for anntype, annid in self._annotations.type_ids():
+                    self._index_by_type[anntype].add(annid)
+            else:
+                for ann in self._annotations.values():
+                    self._index_by_type[ann.type].add(ann.id)
+
+    def _type_offset_index(self, anntype: str):
+        """
+        Returns the offset index for the annotations of the given type, creates it if necessary.
+
+        Args:
+          anntype: the annotation type
+        """
+        if self._index_by_type_offset is None:
+            self._index_by_type_offset = {}
+        index = self._index_by_type_offset.get(anntype)
+        if index is None:
+            if self._frozen:
+                # all types have an index already, the type does not occur in the set
+                return self._index_backend.offset_index_class()
+            self._create_index_by_type()
+            index = self._index_backend.offset_index_class()
+            index.update(self._intervals(self._index_by_type.get(anntype, ())))
+            self._index_by_type_offset[anntype] = index
+        return index
+
+    def _query_index(self, query: Callable, anntype=None):
+        """
+        Runs the query on the offset index of all annotations or, if anntype is given, on the
+        offset indices of the annotations of the given type(s) only.
+
+        Args:
+          query: a function that takes an offset index and returns an iterable of interval tuples
+          anntype: None, a type name or an iterable of type names
+
+        Returns:
+          an iterable of interval tuples (start, end, annid). If more than one type is given,
+          this is a list in document order.
+        """
+        if anntype is None:
+            self._create_index_by_offset()
+            return query(self._index_by_offset)
+        if isinstance(anntype, str):
+            return query(self._type_offset_index(anntype))
+        intvs = []
+        for atype in set(anntype):
+            intvs.extend(query(self._type_offset_index(atype)))
+        intvs.sort(key=itemgetter(0, 2))
+        return intvs
+
+    def create_indices(self) -> None:
+        """
+        Eagerly creates the offset and type indices, if they do not already exist. Normally the
+        indices get created lazily when they are first needed, this can be used to build them
+        right away, e.g. after loading a document which is going to be queried.
+        """
+        self._create_index_by_offset()
+        self._create_index_by_type()
+
+    def _index_repr(self, anntypes=None) -> dict:
+        """
+        Returns the serializable representation of the offset and type indices: the ids of all
+        annotations sorted by start offset and annotation id, and a map from annotation type to the
+        ids of the annotations of that type, in the same order.
+
+        Args:
+            anntypes: if not None, an iterable of annotation types to include
+        """
+        if anntypes is not None:
+            anntypes = set(anntypes)
+        self._create_index_by_type()
+        typeof = {}
+        for anntype, annids in self._index_by_type.items():
+            if anntypes is None or anntype in anntypes:
+                for annid in annids:
+                    typeof[annid] = anntype
+        order = [intvl[2] for intvl in sorted(self._intervals(typeof), key=itemgetter(0, 2))]
+        types = defaultdict(list)
+        for annid in order:
+            types[typeof[annid]].append(annid)
+        return {"offsets": order, "types": dict(types)}
+
+    def _adopt_index(self, indexrepr: dict) -> None:
+        """
+        Creates the offset and type indices from the representation created by `_index_repr`, e.g.
+        when loading a serialized document. Since the annotations are already sorted, this is much faster
+        than creating the indices from scratch. Nothing is done if the representation does not
+        match the annotations of the set.
+
+        Args:
+            indexrepr: the index representation
+        """
+        order = indexrepr.get("offsets")
+        types = indexrepr.get("types")
+        if order is None or types is None or len(order) != len(self._annotations):
+            return
+        if sum(len(annids) for annids in types.values()) != len(order):
+            return
+        self._index_by_offset = self._index_backend.offset_index_class()
+        self._index_by_offset.update(self._intervals(order))
+        self._index_by_type = self._index_backend.type_index_factory()
+        for anntype, annids in types.items():
+            self._index_by_type[anntype].update(annids)
+
+    def _feature_items(self) -> Iterator[Tuple[int, dict]]:
+        """
+        Yields (annid, featuredict) tuples for the annotations which may have features.
+        """
+        anns = self._annotations
+        if not isinstance(anns, dict):
+            yield from anns.feature_items()
+            return
+        for annid, ann in anns.items():
+            if ann._features:
+                yield annid, ann._features.data
+
+    def create_feature_index(self, name: str) -> None:
+        """
+        Creates an index for the values of the feature with the given name, if it does not already exist.
+        The index maps each feature value to the ids of all annotations which have that value and gets
+        updated whenever annotations are added or removed or their features change.
+
+        Feature indices are used by `with_feature` and by views (see `AnnotationSetView.with_feature`).
+        Values which are not hashable, e.g. lists, are not indexed.
+
+        Args:
+          name: the feature name
+        """
+        if self._feature_indices is None:
+            self._feature_indices = {}
+        if name in self._feature_indices:
+            return
+        self._check_not_frozen("create a feature index")
+        index = {}
+        for annid, data in self._feature_items():
+            if name in data:
+                _index_add(index, data[name], annid)
+        self._feature_indices[name] = index
+
+    def remove_feature_index(self, name: str) -> None:
+        """
+        Removes the index for the feature with the given name, if there is one.
+
+        Args:
+          name: the feature name
+        """
+        self._check_not_frozen("remove a feature index")
+        if self._feature_indices is not None:
+            self._feature_indices.pop(name, None)
+
+    def _feature_ids(self, name: str, value) -> Union[Set[int], None]:
+        """
+        Returns the set of annotation ids which have the given value for the feature, or None if there
+        is no index for the feature.
+        """
+        if self._feature_indices is None:
+            return None
+        index = self._feature_indices.get(name)
+        if index is None:
+            return None
+        try:
+            return index.get(value, _EMPTY_IDS)
+        except TypeError:
+            raise Exception("Cannot look up unhashable feature value: {}".format(value))
+
+    def _update_feature_indices(self, ann: Annotation, command: str, feature=None, value=None) -> None:
+        """
+        Called by an annotation of this set before one of its features gets changed.
+        """
+        annid = ann._id
+        if self._annotations.get(annid) is not ann:
+            return
+        data = ann._features.data
+        for name, index in self._feature_indices.items():
+            if command == "feature:set":
+                if name != feature:
+                    continue
+                if name in data:
+                    _index_discard(index, data[name], annid)
+                _index_add(index, value, annid)
+            elif (command == "feature:remove" and name == feature) or command == "features:clear":
+                if name in data:
+                    _index_discard(index, data[name], annid)
 
     def _add_to_indices(self, annotation: Annotation) -> None:
         """
@@ -193,6 +755,15 @@ class AnnotationSet:
             self._index_by_type[annotation.type].add(annotation.id)
         if self._index_by_offset is not None:
             self._index_by_offset.add(annotation.start, annotation.end, annotation.id)
+        if self._index_by_type_offset is not None:
+            index = self._index_by_type_offset.get(annotation.type)
+            if index is not None:
+                index.add(annotation.start, annotation.end, annotation.id)
+        if self._feature_indices and annotation._features:
+            data = annotation._features.data
+            for name, index in self._feature_indices.items():
+                if name in data:
+                    _index_add(index, data[name], annotation.id)
 
     def _remove_from_indices(self, annotation: Annotation) -> None:
         """Remove an annotation from the indices.
@@ -207,6 +778,15 @@ class AnnotationSet:
             )
         if self._index_by_type is not None:
             self._index_by_type[annotation.type].remove(annotation.id)
+        if self._index_by_type_offset is not None:
+            index = self._index_by_type_offset.get(annotation.type)
+            if index is not None:
+                index.remove(annotation.start, annotation.end, annotation.id)
+        if self._feature_indices and annotation._features:
+            data = annotation._features.data
+            for name, index in self._feature_indices.items():
+                if name in data:
+                    _index_discard(index, data[name], annotation.id)
 
     @staticmethod
     def _intvs2idlist(intvs, ignore=None) -> List[int]:
@@ -399,8 +979,9 @@ class AnnotationSet:
             self._next_annid = self._next_annid + 1
         ann = Annotation(start, end, anntype, features=features, annid=annid)
         ann._owner_set = self
-        if not self._annotations:
+        if self._annotations is None:
             self._annotations = {}
+        self._prepare_change()
         self._annotations[annid] = ann
         self._add_to_indices(ann)
         if self.changelog is not None:
@@ -410,7 +991,7 @@ class AnnotationSet:
                 "start": ann.start,
                 "end": ann.end,
                 "type": ann.type,
-                "features": ann._features.to_dict(),
+                "features": ann._features.to_dict() if ann._features is not None else {},
                 "id": ann.id,
             }
             self.changelog.append(entry)
@@ -475,8 +1056,12 @@ class AnnotationSet:
                 )
         # NOTE: once the annotation has been removed from the set, it could still be referenced
         # somewhere else and its features could get modified. In order to prevent logging of such changes,
-        # the owning set gets cleared for the annotation
+        # the owning set gets cleared for the annotation. Snapshots still sharing it copy it now since
+        # such changes cannot be noticed any more.
+        if self._snapshots:
+            self._preserve(self._annotations[annid])
         annoriter._owner_set = None
+        self._prepare_change()
         del self._annotations[annid]
         if self.changelog is not None:
             self.changelog.append(
@@ -488,9 +1073,19 @@ class AnnotationSet:
         """
         Removes all annotations from the set.
         """
-        self._annotations.clear()
+        self._check_not_frozen("remove annotations")
+        if self._query_cache is not None:
+            self._query_cache.clear()
+        if self._shared or isinstance(self._annotations, SnapshotAnnotations):
+            self._annotations = ColumnarAnnotations(self) if self.columnar else {}
+            self._shared = False
+        else:
+            self._annotations.clear()
         self._index_by_offset = None
         self._index_by_type = None
+        self._index_by_type_offset = None
+        if self._feature_indices is not None:
+            self._feature_indices = {name: {} for name in self._feature_indices}
         if self.changelog is not None:
             self.changelog.append({"command": "annotations:clear", "set": self.name})
 
@@ -499,18 +1094,48 @@ class AnnotationSet:
         Replaces the annotations in this set with deep copies of the originals. If this is a detached set,
         then this makes sure that any modifications to the annotations do not affect the original annotations
         in the attached set. If this is an attached set, it makes sure that all other detached sets cannot affect
-        the annotations in this set any more. The owning set of the annotations that get cloned is cleared.
+        the annotations in this set any more.
+
+        Unlike shallow copies, the deep copies are created right away: feature values can be changed in place
+        without the annotation set noticing, so copying them later could pick up such changes.
 
         Args:
           memo: for internal use by our __deepcopy__ implementation.
         """
+        self._check_not_frozen("replace the annotations")
+        if memo is None:
+            memo = {}
+        anns = self._annotations
         tmpdict = {}
-        for annid, ann in self._annotations.items():
+        for annid in anns:
+            if isinstance(anns, SnapshotAnnotations):
+                # no need to make a shallow copy first
+                ann = anns._raw(annid)
+            else:
+                ann = anns[annid]
             newann = copy.deepcopy(ann, memo=memo)
-            ann._owner_set = None
+            newann._owner_set = self
             tmpdict[annid] = newann
-        for annid, ann in tmpdict.items():
-            self._annotations[annid] = ann
+        if isinstance(anns, ColumnarAnnotations):
+            self._annotations = ColumnarAnnotations(self, tmpdict.values())
+        else:
+            self._annotations = tmpdict
+        self._shared = False
+
+    def __getstate__(self):
+        """
+        The weak references to snapshots cannot be pickled: a pickled set does not share its annotations
+        with any copy-on-write copy, and a copy-on-write copy gets pickled with its own annotations.
+        """
+        state = self.__dict__.copy()
+        if isinstance(self._annotations, SnapshotAnnotations):
+            state["_annotations"] = dict(self._annotations.items())
+        state["_shared"] = False
+        state["_snapshots"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
 
     def __copy__(self):
         """
@@ -527,12 +1152,10 @@ class AnnotationSet:
         return self.__copy__()
 
     def __deepcopy__(self, memo=None):
-        if memo is None:
-            memo = {}
-        c = self.detach()
-        c._is_immutable = False
-        c.clone_anns(memo=memo)
-        return c
+        """
+        NOTE: the deep copy is a mutable detached set, see `clone_anns`.
+        """
+        return self._deep_copy("detached-from:" + self.name, memo=memo)
 
     def deepcopy(self):
         """
@@ -587,7 +1210,7 @@ class AnnotationSet:
 
         if with_type is not None:
             allowedtypes = set()
-            if isinstance(type, str):
+            if isinstance(with_type, str):
                 allowedtypes.add(with_type)
             else:
                 for atype in with_type:
@@ -708,7 +1331,8 @@ class AnnotationSet:
         return self._annotations[annid]
 
     def with_type(
-        self, *anntype: Union[str, Iterable], non_overlapping: bool = False
+        self, *anntype: Union[str, Iterable], non_overlapping: bool = False,
+        policy: str = "type-priority"
     ) -> "AnnotationSet":
         """
         Gets annotations of the specified type(s).
@@ -719,9 +1343,21 @@ class AnnotationSet:
             is used to filter the annotations. If no type is specified, all annotations are selected.
 
           non_overlapping: if True, only return annotations of any of the given types which
-            do not overlap with other annotations. If there are several annotations that start at
-            the same offset, use the type that comes first in the parameters, if there are more
-            than one of that type, use the one that would come first in the usual sort order.
+            do not overlap with other annotations. Which of several overlapping annotations is selected
+            is determined by the policy.
+
+          policy: how to select non-overlapping annotations, one of:
+
+            * "type-priority" (default): go through the annotations in document order. If there are several
+              annotations that start at the same offset, use the type that comes first in the parameters,
+              if there are more than one of that type, use the longest one, then the one with the highest id.
+            * "leftmost": go through the annotations in document order, if there are several annotations that
+              start at the same offset, use the longest, then the type that comes first in the parameters,
+              then the one with the highest id.
+            * "longest-first": select the longest annotations first, then the longest of the remaining
+              annotations which do not overlap with those already selected and so on. For annotations
+              of the same length, prefer the one that starts first, then the type that comes first, then
+              the one with the highest id.
 
         Returns:
             a detached immutable annotation set with the matching annotations.
@@ -736,68 +1372,116 @@ class AnnotationSet:
         if not atypes:
             return self.detach()
         self._create_index_by_type()
-        annids = set()
-        for t in atypes:
-            idxs = self._index_by_type.get(t)
-            if idxs:
-                annids.update(idxs)
         if non_overlapping:
-            # need to get annotations grouped by start offset and sorted according to
-            # what the Annotation class defines
-            allanns = sorted(annids, key=lambda x: self._annotations[x])
-            allanns = [self._annotations[x] for x in allanns]
-            allannsgrouped = []
-            curstart = None
-            curset = None
-            for ann in allanns:
-                if curstart is None:
-                    curset = [ann]
-                    curstart = ann.start
-                elif curstart == ann.start:
-                    curset.append(ann)
-                else:
-                    allannsgrouped.append(curset)
-                    curset = [ann]
-                    curstart = ann.start
-            if curset:
-                allannsgrouped.append(curset)
-            retanns = []
-            # now go through all the grouped annoations and select the top priority one
-            # then skip to the next group that does not overlap with the one we just selected
-            typepriority = dict()
-            for i, atype in enumerate(atypes):
-                typepriority[atype] = len(atypes) - i
-            curminoffset = 0
-            for group in allannsgrouped:
-                # instead of sorting, go through the group and find the top priority one
-                topann = None
-                if len(group) == 1:
-                    if group[0].start >= curminoffset:
-                        topann = group[0]
-                elif len(group) == 0:
-                    raise Exception("We should never get a 0 size group here!")
-                else:
-                    for i, ann in enumerate(group):
-                        if ann.start >= curminoffset:
-                            topann = ann
-                            break
-                    for ann in group[i + 1 :]:
-                        if ann.start < curminoffset:
-                            continue
-                        if typepriority[ann.type] > typepriority[topann.type]:
-                            topann = ann
-                        elif typepriority[ann.type] == typepriority[topann.type]:
-                            if ann.end > topann.end:
-                                topann = ann
-                            elif ann.end == topann.end:
-                                if ann.id > topann.id:
-                                    topann = ann
-                if topann is not None:
-                    retanns.append(topann)
-                    curminoffset = topann.end
-            annids = [ann.id for ann in retanns]
+            annids = self._non_overlapping(atypes, policy)
+        else:
+            annids = set()
+            for t in atypes:
+                idxs = self._index_by_type.get(t)
+                if idxs:
+                    annids.update(idxs)
         return self.detach(restrict_to=annids)
 
+    def _non_overlapping(self, atypes: List[str], policy: str) -> List[int]:
+        """
+        Returns the ids, in document order, of the non-overlapping annotations of the given types which
+        get selected according to the policy, see `with_type`.
+
+        The candidates are sorted once by a key tuple which encodes the policy, then selected in a
+        single pass. For the "longest-first" policy, the selected spans are kept in a sorted list which
+        allows to check for overlaps and to add a span in O(log n), so the whole selection is O(n log n).
+        """
+        ranks = {}
+        for rank, atype in enumerate(atypes):
+            ranks.setdefault(atype, rank)
+        keys = []
+        for atype, rank in ranks.items():
+            intvs = self._intervals(self._index_by_type.get(atype, ()))
+            if policy == "type-priority":
+                keys.extend((start, rank, -end, -annid, end) for start, end, annid in intvs)
+            elif policy == "leftmost":
+                keys.extend((start, -end, rank, -annid, end) for start, end, annid in intvs)
+            elif policy == "longest-first":
+                keys.extend((start - end, start, rank, -annid, end) for start, end, annid in intvs)
+            else:
+                raise Exception(
+                    "Policy must be one of 'type-priority', 'leftmost', 'longest-first', not {}".format(
+                        policy
+                    )
+                )
+        keys.sort()
+        selected = []
+        if policy == "longest-first":
+            # the selected spans never overlap, so they are sorted by start and end offset at the same time
+            spans = SortedList()
+            for negl, start, _, negid, end in keys:
+                pos = spans.bisect_left((start,))
+                if pos < len(spans) and (spans[pos][0] == start or spans[pos][0] < end):
+                    continue
+                if pos > 0 and spans[pos - 1][1] > start:
+                    continue
+                spans.add((start, end, -negid))
+            selected = [span[2] for span in spans]
+        else:
+            minoffset = 0
+            laststart = None
+            for key in keys:
+                start = key[0]
+                if start < minoffset or start == laststart:
+                    continue
+                selected.append(-key[3])
+                minoffset = key[4]
+                laststart = start
+        return selected
+
+    def to_arrays(self, anntype=None):
+        """
+        Returns the start offsets, end offsets, type codes and ids of the annotations, in document order,
+        as numpy arrays, wrapped in a `gatenlp.impl.spanarrays.SpanArrays` instance which also provides
+        vectorized span predicates, e.g. `annset.to_arrays().isoverlapping(sentences)` gives a boolean
+        matrix of which annotation overlaps with which sentence.
+
+        NOTE: this requires the numpy package.
+
+        Args:
+          anntype: if not None, only include annotations of this type or of any of these types
+
+        Returns:
+          a SpanArrays instance
+        """
+        from gatenlp.impl.spanarrays import SpanArrays
+
+        anns = self._annotations
+        if isinstance(anns, dict):
+            rows = [(ann._start, ann._end, ann._id, ann._type) for ann in anns.values()]
+        else:
+            rows = [
+                (intvl[0], intvl[1], intvl[2], atype)
+                for intvl, (atype, _) in zip(anns.intervals(), anns.type_ids())
+            ]
+        if anntype is not None:
+            types = {anntype} if isinstance(anntype, str) else set(anntype)
+            rows = [row for row in rows if row[3] in types]
+        return SpanArrays.from_tuples(rows)
+
+    def with_feature(self, name: str, value, anntype=None) -> "AnnotationSet":
+        """
+        Gets the annotations which have the given value for the feature, optionally restricted to
+        the given type(s). If there is an index for the feature (see `create_feature_index`), it is used,
+        otherwise all annotations (of the given types) are checked.
+
+        Args:
+          name: the feature name
+          value: the feature value
+          anntype: if not None, a type name or an iterable of type names
+
+        Returns:
+          a detached immutable annotation set with the matching annotations.
+        """
+        return self.view().with_type(*(() if anntype is None else (anntype,))).with_feature(
+            name, value
+        ).detach()
+
     def by_offset(self):
         """
         Yields lists of annotations which start at the same offset.
@@ -845,8 +1529,9 @@ class AnnotationSet:
         return self._index_by_type.keys()
 
     @support_annotation_or_set
+    @_cached_query
     def startingat(
-        self, start: int, ignored: Any = None, annid=None, include_self=False
+        self, start: int, ignored: Any = None, annid=None, include_self=False, anntype=None
     ) -> "AnnotationSet":
         """
         Gets all annotations starting at the given offset (empty if none) and returns them in a detached
@@ -860,12 +1545,13 @@ class AnnotationSet:
           ignored: dummy parameter to allow the use of annotations and annotation sets
           annid:  dummy parameter to allow the use of annotations and annotation sets
           include_self:  should annotation passed be included in the result
+          anntype: if not None, only annotations of this type or of any of these types are included,
+            using the offset index for the type(s) (Default value = None)
 
         Returns:
             detached annotation set of matching annotations
         """
-        self._create_index_by_offset()
-        intvs = self._index_by_offset.starting_from(start)
+        intvs = self._query_index(lambda idx: idx.starting_from(start), anntype)
         if not include_self and annid is not None:
             ignore = annid
         else:
@@ -873,8 +1559,9 @@ class AnnotationSet:
         return self._restrict_intvs(intvs, ignore=ignore)
 
     @support_annotation_or_set
+    @_cached_query
     def start_min_ge(
-        self, offset: int, ignored: Any = None, annid=None, include_self=False
+        self, offset: int, ignored: Any = None, annid=None, include_self=False, anntype=None
     ) -> "AnnotationSet":
         """Gets all annotations starting at the first possible offset
         at or after the given offset and returns them in an immutable
@@ -885,13 +1572,14 @@ class AnnotationSet:
           ignored: dummy parameter to allow the use of annotations and annotation sets
           annid:  annotation id
           include_self: should annotation passed be included in the result
+          anntype: if not None, only annotations of this type or of any of these types are included,
+            using the offset index for the type(s) (Default value = None)
 
         Returns:
           annotation set of matching annotations
 
         """
-        self._create_index_by_offset()
-        intvs = self._index_by_offset.starting_from(offset)
+        intvs = self._query_index(lambda idx: idx.starting_from(offset), anntype)
         # now select only those first ones which all have the same offset
         if not include_self and annid is not None:
             ignore = annid
@@ -918,8 +1606,9 @@ class AnnotationSet:
         return self.detach(restrict_to=retids)
 
     @support_annotation_or_set
+    @_cached_query
     def start_ge(
-        self, start: int, ignored: Any = None, annid=None, include_self=False
+        self, start: int, ignored: Any = None, annid=None, include_self=False, anntype=None
     ) -> "AnnotationSet":
         """Return the annotations that start at or after the given start offset.
 
@@ -928,13 +1617,14 @@ class AnnotationSet:
           ignored: dummy parameter to allow the use of annotations and annotation sets
           annid:  annotation id
           include_self:  should annotation passed be included in the result
+          anntype: if not None, only annotations of this type or of any of these types are included,
+            using the offset index for the type(s) (Default value = None)
 
         Returns:
           an immutable annotation set of the matching annotations
 
         """
-        self._create_index_by_offset()
-        intvs = self._index_by_offset.starting_from(start)
+        intvs = self._query_index(lambda idx: idx.starting_from(start), anntype)
         if not include_self and annid is not None:
             ignore = annid
         else:
@@ -942,7 +1632,10 @@ class AnnotationSet:
         return self._restrict_intvs(intvs, ignore=ignore)
 
     @support_annotation_or_set
-    def start_lt(self, offset: int, ignored: Any = None, annid=None) -> "AnnotationSet":
+    @_cached_query
+    def start_lt(
+        self, offset: int, ignored: Any = None, annid=None, anntype=None
+    ) -> "AnnotationSet":
         """
         Returns the annotations that start before the given offset (or annotation). This also accepts an annotation
         or set.
@@ -951,18 +1644,20 @@ class AnnotationSet:
           offset: offset before which the annotations should start
           ignored: dummy parameter to allow the use of annotations and annotation sets
           annid:  annotation id
+          anntype: if not None, only annotations of this type or of any of these types are included,
+            using the offset index for the type(s) (Default value = None)
 
         Returns:
           an immutable annotation set of the matching annotations
 
         """
-        self._create_index_by_offset()
-        intvs = self._index_by_offset.starting_before(offset)
+        intvs = self._query_index(lambda idx: idx.starting_before(offset), anntype)
         return self._restrict_intvs(intvs)
 
     @support_annotation_or_set
+    @_cached_query
     def overlapping(
-        self, start: int, end: int, annid=None, include_self=False
+        self, start: int, end: int, annid=None, include_self=False, anntype=None
     ) -> "AnnotationSet":
         """
         Gets annotations overlapping with the given span. Instead of the start and end offsets,
@@ -976,13 +1671,14 @@ class AnnotationSet:
           annid: the annotation id of the annotation representing the span. (Default value = None)
           include_self: if True and the annotation id for the span is given, do not include that
             annotation in the result set. (Default value = False)
+          anntype: if not None, only annotations of this type or of any of these types are included,
+            using the offset index for the type(s) (Default value = None)
 
         Returns:
           an immutable annotation set with the matching annotations
 
         """
-        self._create_index_by_offset()
-        intvs = self._index_by_offset.overlapping(start, end)
+        intvs = self._query_index(lambda idx: idx.overlapping(start, end), anntype)
         if not include_self and annid is not None:
             ignore = annid
         else:
@@ -990,8 +1686,9 @@ class AnnotationSet:
         return self._restrict_intvs(intvs, ignore=ignore)
 
     @support_annotation_or_set
+    @_cached_query
     def covering(
-        self, start: int, end: int, annid=None, include_self=False
+        self, start: int, end: int, annid=None, include_self=False, anntype=None
     ) -> "AnnotationSet":
         """
         Gets the annotations which contain the given offset range (or annotation/annotation set),
@@ -1005,13 +1702,14 @@ class AnnotationSet:
           annid: the annotation id of the annotation representing the span. (Default value = None)
           include_self: if True and the annotation id for the span is given, do not include that
             annotation in the result set. (Default value = False)
+          anntype: if not None, only annotations of this type or of any of these types are included,
+            using the offset index for the type(s) (Default value = None)
 
         Returns:
           an immutable annotation set with the matching annotations, if any
 
         """
-        self._create_index_by_offset()
-        intvs = self._index_by_offset.covering(start, end)
+        intvs = self._query_index(lambda idx: idx.covering(start, end), anntype)
         if not include_self and annid is not None:
             ignore = annid
         else:
@@ -1019,8 +1717,9 @@ class AnnotationSet:
         return self._restrict_intvs(intvs, ignore=ignore)
 
     @support_annotation_or_set
+    @_cached_query
     def within(
-        self, start: int, end: int, annid=None, include_self=False
+        self, start: int, end: int, annid=None, include_self=False, anntype=None
     ) -> "AnnotationSet":
         """
         Gets annotations that fall completely within the given offset range, i.e. annotations
@@ -1034,6 +1733,8 @@ class AnnotationSet:
           annid: the annotation id of the annotation representing the span. (Default value = None)
           include_self: if True and the annotation id for the span is given, do not include that
              annotation in the result set. (Default value = False)
+          anntype: if not None, only annotations of this type or of any of these types are included,
+            using the offset index for the type(s) (Default value = None)
 
         Returns:
           an immutable annotation set with the matching annotations
@@ -1044,8 +1745,7 @@ class AnnotationSet:
         elif start > end:
             raise Exception("Invalid offset range: {},{}".format(start, end))
         else:
-            self._create_index_by_offset()
-            intvs = self._index_by_offset.within(start, end)
+            intvs = self._query_index(lambda idx: idx.within(start, end), anntype)
         if not include_self and annid is not None:
             ignore = annid
         else:
@@ -1053,8 +1753,9 @@ class AnnotationSet:
         return self._restrict_intvs(intvs, ignore=ignore)
 
     @support_annotation_or_set
+    @_cached_query
     def coextensive(
-        self, start: int, end: int, annid=None, include_self=False
+        self, start: int, end: int, annid=None, include_self=False, anntype=None
     ) -> "AnnotationSet":
         """
         Returns a detached annotation set with all annotations that start and end at the given offsets.
@@ -1067,20 +1768,22 @@ class AnnotationSet:
           annid: the annotation id of the annotation representing the span. (Default value = None)
           include_self: if True and the annotation id for the span is given, do not include that
              annotation in the result set.
+          anntype: if not None, only annotations of this type or of any of these types are included,
+            using the offset index for the type(s) (Default value = None)
 
         Returns:
           annotation set with all annotations that have the same start and end offsets.
         """
-        self._create_index_by_offset()
-        intvs = self._index_by_offset.at(start, end)
+        intvs = self._query_index(lambda idx: idx.at(start, end), anntype)
         if not include_self and annid is not None:
             ignore = annid
         else:
             ignore = None
         return self._restrict_intvs(intvs, ignore=ignore)
 
+    @_cached_query
     def before(self, start: int, end: int, annid=None, include_self=False,
-               immediately=False) -> "AnnotationSet":
+               immediately=False, anntype=None) -> "AnnotationSet":
         """
         Returns a detached annotation set with all annotations that end before the given offsets.
 
@@ -1094,15 +1797,16 @@ class AnnotationSet:
                 annotation in the result set.
             immediately: if True, the end offset of the annotations return must coincide with the
                 start offset of the span (default=False)
+            anntype: if not None, only annotations of this type or of any of these types are
+                included, using the offset index for the type(s) (Default value = None)
 
         Returns:
           annotation set with all annotations that end before the given span
         """
-        self._create_index_by_offset()
         if immediately:
-            intvs = self._index_by_offset.ending_at(start)
+            intvs = self._query_index(lambda idx: idx.ending_at(start), anntype)
         else:
-            intvs = self._index_by_offset.ending_to(start)
+            intvs = self._query_index(lambda idx: idx.ending_to(start), anntype)
         # we need to filter self if self is zero-length!
         if not include_self and annid is not None:
             ignore = annid
@@ -1110,8 +1814,9 @@ class AnnotationSet:
             ignore = None
         return self._restrict_intvs(intvs, ignore=ignore)
 
+    @_cached_query
     def after(self, start: int, end: int, annid=None, include_self=False,
-              immediately=False) -> "AnnotationSet":
+              immediately=False, anntype=None) -> "AnnotationSet":
         """
         Returns a detached annotation set with all annotations that start after the given span.
 
@@ -1125,15 +1830,16 @@ class AnnotationSet:
                 annotation in the result set.
             immediately: if True, the start offset of the annotations returned must coincide with the
                 end offset of the span (default=False)
+            anntype: if not None, only annotations of this type or of any of these types are
+                included, using the offset index for the type(s) (Default value = None)
 
         Returns:
           annotation set with all annotations that start after the given span
         """
-        self._create_index_by_offset()
         if immediately:
-            intvs = self._index_by_offset.starting_at(end)
+            intvs = self._query_index(lambda idx: idx.starting_at(end), anntype)
         else:
-            intvs = self._index_by_offset.starting_from(end)
+            intvs = self._query_index(lambda idx: idx.starting_from(end), anntype)
         # we need to filter self if self is zero-length!
         if not include_self and annid is not None:
             ignore = annid
@@ -1141,6 +1847,362 @@ class AnnotationSet:
             ignore = None
         return self._restrict_intvs(intvs, ignore=ignore)
 
+    def _walk_index(self, query: Callable, anntype, key: Callable, reverse=False) -> Iterator:
+        """
+        Returns an iterator over the intervals returned by the query on the offset index or, if anntype
+        is given, merged from the offset indices of the given type(s). The query must return the intervals
+        ordered by key (in reverse order if reverse is True).
+        """
+        if anntype is None:
+            self._create_index_by_offset()
+            return iter(query(self._index_by_offset))
+        if isinstance(anntype, str):
+            return iter(query(self._type_offset_index(anntype)))
+        return heapq.merge(
+            *[query(self._type_offset_index(atype)) for atype in set(anntype)],
+            key=key, reverse=reverse
+        )
+
+    def _next_intvs(self, end: int, k: int, ignore, anntype) -> List[Tuple[int, int, int]]:
+        """
+        Returns the first k intervals, in document order, which start at or after end.
+        """
+        ret = []
+        if k <= 0:
+            return ret
+        for intvl in self._walk_index(lambda idx: idx.starting_from(end), anntype, itemgetter(0, 2)):
+            if intvl[2] == ignore:
+                continue
+            ret.append(intvl)
+            if len(ret) == k:
+                break
+        return ret
+
+    def _prev_intvs(self, start: int, k: int, ignore, anntype) -> List[Tuple[int, int, int]]:
+        """
+        Returns the k intervals which end at or before start with the biggest end offsets, ordered by
+        decreasing end offset, then decreasing start offset, then decreasing annotation id.
+        """
+        ret = []
+        if k <= 0:
+            return ret
+        intvls = self._walk_index(
+            lambda idx: idx.ending_to(start, reverse=True), anntype, itemgetter(1), reverse=True
+        )
+        for intvl in intvls:
+            if intvl[2] == ignore:
+                continue
+            # also collect intervals with the same end offset as the k-th so that ties get resolved
+            # independently of the order of the index
+            if len(ret) >= k and intvl[1] < ret[-1][1]:
+                break
+            ret.append(intvl)
+        ret.sort(key=lambda intvl: (-intvl[1], -intvl[0], -intvl[2]))
+        return ret[:k]
+
+    @support_annotation_or_set
+    @_cached_query
+    def next_k(
+        self, start: int, end: int, *, k: int = 1, annid=None, include_self=False, anntype=None
+    ) -> "AnnotationSet":
+        """
+        Returns a detached annotation set with the (at most) k annotations which come first after
+        the given span, i.e. the first k annotations in document order of those which `after` would return,
+        e.g. `annset.next_k(token, k=3, anntype="Token")` for the next 3 tokens. This walks the offset index
+        from the end of the span and stops after k annotations.
+
+        Args:
+            start: start offset of the span
+            end: end offset of the span
+            k: the maximum number of annotations to return
+            annid: the annotation id of the annotation representing the span. (Default value = None)
+            include_self: if True and the annotation id for the span is given, do not include that
+                annotation in the result set.
+            anntype: if not None, only annotations of this type or of any of these types are
+                included, using the offset index for the type(s) (Default value = None)
+
+        Returns:
+          annotation set with the next k annotations
+        """
+        ignore = annid if not include_self else None
+        return self._restrict_intvs(self._next_intvs(end, k, ignore, anntype))
+
+    @support_annotation_or_set
+    @_cached_query
+    def prev_k(
+        self, start: int, end: int, *, k: int = 1, annid=None, include_self=False, anntype=None
+    ) -> "AnnotationSet":
+        """
+        Returns a detached annotation set with the (at most) k annotations which come last before the
+        given span, i.e. of those which `before` would return, the k annotations with the biggest end
+        offsets (for annotations with the same end offset, those with the bigger start offset, then the
+        bigger annotation id are preferred). This walks the offset index backwards from the start of the span
+        and stops after k annotations.
+
+        Args:
+            start: start offset of the span
+            end: end offset of the span
+            k: the maximum number of annotations to return
+            annid: the annotation id of the annotation representing the span. (Default value = None)
+            include_self: if True and the annotation id for the span is given, do not include that
+                annotation in the result set.
+            anntype: if not None, only annotations of this type or of any of these types are
+                included, using the offset index for the type(s) (Default value = None)
+
+        Returns:
+          annotation set with the previous k annotations
+        """
+        ignore = annid if not include_self else None
+        return self._restrict_intvs(self._prev_intvs(start, k, ignore, anntype))
+
+    @support_annotation_or_set
+    @_cached_query
+    def nearest(
+        self, start: int, end: int, *, annid=None, include_self=False, anntype=None
+    ) -> Union[Annotation, None]:
+        """
+        Returns the annotation which is closest to the given span among the annotations which end before
+        or start after the span, or None if there is no such annotation. The distance is the gap between
+        the annotation and the span. If the closest annotation before and after have the same distance,
+        the one before is returned.
+
+        Args:
+            start: start offset of the span
+            end: end offset of the span
+            annid: the annotation id of the annotation representing the span. (Default value = None)
+            include_self: if True and the annotation id for the span is given, the annotation can be
+                returned if it is a zero-length annotation.
+            anntype: if not None, only annotations of this type or of any of these types are
+                considered (Default value = None)
+
+        Returns:
+          the closest annotation or None
+        """
+        ignore = annid if not include_self else None
+        prev = self._prev_intvs(start, 1, ignore, anntype)
+        nxt = self._next_intvs(end, 1, ignore, anntype)
+        if prev and (not nxt or start - prev[0][1] <= nxt[0][0] - end):
+            return self._annotations[prev[0][2]]
+        if nxt:
+            return self._annotations[nxt[0][2]]
+        return None
+
+    def _count(self, query: Callable, predicate: Callable, annid, include_self, anntype) -> int:
+        """
+        Returns the number of annotations for the count query on the offset index, optionally
+        restricted to the given type(s), excluding the annotation with id annid, if it satisfies
+        the predicate, unless include_self is True.
+        """
+        if anntype is None:
+            self._create_index_by_offset()
+            n = query(self._index_by_offset)
+        elif isinstance(anntype, str):
+            n = query(self._type_offset_index(anntype))
+        else:
+            n = sum(query(self._type_offset_index(atype)) for atype in set(anntype))
+        if annid is not None and not include_self:
+            ann = self._annotations.get(annid)
+            if ann is not None and predicate(ann):
+                if (
+                    anntype is None
+                    or ann.type == anntype
+                    or (not isinstance(anntype, str) and ann.type in anntype)
+                ):
+                    n -= 1
+        return n
+
+    @support_annotation_or_set
+    @_cached_query
+    def count_within(
+        self, start: int, end: int, annid=None, include_self=False, anntype=None
+    ) -> int:
+        """
+        Returns the number of annotations that `within(start, end, ...)` would return, without creating
+        the result set. This only uses the offset index, how fast it is depends on the index backend (see
+        `index_backend`): with "sorted" (the default), the intervals which start before the span still get
+        checked, which is O(n) in the worst case, with "intervaltree" this is O(log^2 n) once the index
+        has been built and with "array" this is a vectorized O(n) scan.
+
+        Args:
+          start: start offset of the range
+          end: end offset of the range
+          annid: the annotation id of the annotation representing the span. (Default value = None)
+          include_self: if True and the annotation id for the span is given, do not include that
+             annotation in the count. (Default value = False)
+          anntype: if not None, only count annotations of this type or of any of these types
+
+        Returns:
+          the number of annotations within the range
+        """
+        if start > end:
+            raise Exception("Invalid offset range: {},{}".format(start, end))
+        if start == end:
+            return 0
+        return self._count(
+            lambda idx: idx.count_within(start, end),
+            lambda ann: ann._start >= start and ann._end <= end,
+            annid, include_self, anntype
+        )
+
+    @support_annotation_or_set
+    @_cached_query
+    def count_covering(
+        self, start: int, end: int, annid=None, include_self=False, anntype=None
+    ) -> int:
+        """
+        Returns the number of annotations that `covering(start, end, ...)` would return, without creating
+        the result set. Like for `count_within`, how fast this is depends on the index backend.
+
+        Args:
+          start: the start offset of the span
+          end: the end offset of the span
+          annid: the annotation id of the annotation representing the span. (Default value = None)
+          include_self: if True and the annotation id for the span is given, do not include that
+            annotation in the count. (Default value = False)
+          anntype: if not None, only count annotations of this type or of any of these types
+
+        Returns:
+          the number of annotations covering the span
+        """
+        return self._count(
+            lambda idx: idx.count_covering(start, end),
+            lambda ann: ann._start <= start and ann._end >= end,
+            annid, include_self, anntype
+        )
+
+    @support_annotation_or_set
+    @_cached_query
+    def count_overlapping(
+        self, start: int, end: int, annid=None, include_self=False, anntype=None
+    ) -> int:
+        """
+        Returns the number of annotations that `overlapping(start, end, ...)` would return, without
+        creating the result set. This only needs binary searches on the offset index.
+
+        Args:
+          start: start offset of the span
+          end: end offset of the span
+          annid: the annotation id of the annotation representing the span. (Default value = None)
+          include_self: if True and the annotation id for the span is given, do not include that
+            annotation in the count. (Default value = False)
+          anntype: if not None, only count annotations of this type or of any of these types
+
+        Returns:
+          the number of annotations overlapping with the span
+        """
+        return self._count(
+            lambda idx: idx.count_overlapping(start, end),
+            lambda ann: ann._start < end and ann._end > start,
+            annid, include_self, anntype
+        )
+
+    @support_annotation_or_set
+    def any_within(self, start: int, end: int, annid=None, include_self=False, anntype=None) -> bool:
+        """
+        Returns True if there is any annotation within the span, see `count_within`.
+        """
+        return self.count_within(
+            start, end, annid=annid, include_self=include_self, anntype=anntype
+        ) > 0
+
+    @support_annotation_or_set
+    def any_covering(self, start: int, end: int, annid=None, include_self=False, anntype=None) -> bool:
+        """
+        Returns True if there is any annotation covering the span, see `count_covering`.
+        """
+        return self.count_covering(
+            start, end, annid=annid, include_self=include_self, anntype=anntype
+        ) > 0
+
+    @support_annotation_or_set
+    def any_overlapping(
+        self, start: int, end: int, annid=None, include_self=False, anntype=None
+    ) -> bool:
+        """
+        Returns True if there is any annotation overlapping with the span, see `count_overlapping`.
+        """
+        return self.count_overlapping(
+            start, end, annid=annid, include_self=include_self, anntype=anntype
+        ) > 0
+
+    def join(
+        self, other: Iterable, relation: str = "within", pairs: bool = False, include_self=False
+    ) -> Generator:
+        """
+        Finds, for each annotation of this set, the annotations from the other set which are within,
+        overlapping with or covering that annotation. Instead of running one index query per
+        annotation, this walks both sets in document order once, which takes O((n+m) log m + k)
+        for n annotations in this set, m annotations in the other set and k results.
+
+        Example: tokens for each sentence:
+          `for sent, toks in anns.with_type("Sentence").join(anns.with_type("Token")): ...`
+
+        Args:
+          other: an AnnotationSet, AnnotationSetView or any iterable of annotations in document order
+          relation: one of "within", "overlapping" or "covering": for each annotation a in this set,
+            the annotations b in the other set for which b.iswithin(a), b.isoverlapping(a) or
+            b.iscovering(a) are returned.
+          pairs: if True, yield a tuple (a, b) for each match instead of one tuple (a, [b...]) for
+            each annotation a of this set.
+          include_self: if the other set is this set, an annotation is not matched with itself,
+            unless this is True (Default value = False)
+
+        Yields:
+          tuples (a, [b...]) for each annotation a of this set in document order, where the list
+          contains the matching annotations from the other set in document order,
+          or (a, b) tuples if pairs is True.
+        """
+        if relation not in ("within", "overlapping", "covering"):
+            raise Exception(f"Not a supported relation for join: {relation}")
+        bs = list(other)
+        nbs = len(bs)
+        bstarts = [b._start for b in bs]
+        ignore_self = other is self and not include_self
+        # index of the first b which has not been looked at yet by the sweep
+        nextb = 0
+        # for overlapping and covering: heap of (end, position) of the b annotations which
+        # start before (or at) the current a and have not ended before it
+        active = []
+        for a in self:
+            astart = a._start
+            aend = a._end
+            if relation == "within":
+                while nextb < nbs and bstarts[nextb] < astart:
+                    nextb += 1
+                found = []
+                i = nextb
+                while i < nbs and bstarts[i] <= aend:
+                    if bs[i]._end <= aend:
+                        found.append(bs[i])
+                    i += 1
+            elif relation == "overlapping":
+                while nextb < nbs and bstarts[nextb] < astart:
+                    heapq.heappush(active, (bs[nextb]._end, nextb))
+                    nextb += 1
+                while active and active[0][0] <= astart:
+                    heapq.heappop(active)
+                poss = sorted(pos for _, pos in active)
+                i = nextb
+                while i < nbs and bstarts[i] < aend:
+                    if bs[i]._end > astart:
+                        poss.append(i)
+                    i += 1
+                found = [bs[pos] for pos in poss]
+            else:
+                while nextb < nbs and bstarts[nextb] <= astart:
+                    heapq.heappush(active, (bs[nextb]._end, nextb))
+                    nextb += 1
+                while active and active[0][0] < astart:
+                    heapq.heappop(active)
+                found = [bs[pos] for pos in sorted(pos for end, pos in active if end >= aend)]
+            if ignore_self:
+                found = [b for b in found if b is not a]
+            if pairs:
+                for b in found:
+                    yield a, b
+            else:
+                yield a, found
+
     @property
     def span(self) -> Span:
         """
@@ -1175,32 +2237,46 @@ class AnnotationSet:
         """
         return "AnnotationSet({})".format(repr(list(self.iter())))
 
-    def to_dict(self, anntypes=None, **kwargs):
+    def _ann_dicts(self, anntypes=None, **kwargs):
+        """
+        Yields the dict representations of the annotations one by one, in the order used by `to_dict`.
+
+        Args:
+            anntypes: if not None, an iterable of annotation types to include
+            **kwargs: passed on to the dict creation of the annotations
+        """
+        if anntypes is not None:
+            anntypesset = set(anntypes)
+            for val in self._annotations.values():
+                if val.type in anntypesset:
+                    yield val.to_dict(**kwargs)
+        else:
+            for val in self._annotations.values():
+                yield val.to_dict(**kwargs)
+
+    def to_dict(self, anntypes=None, index=False, **kwargs):
         """
         Convert an annotation set to its dict representation.
 
         Args:
             anntypes: if not None, an iterable of annotation types to include
+            index: if True, include the ids of the annotations sorted by offset and the map from type to
+                annotation ids, so that `from_dict` can create the indices without sorting.
             **kwargs: passed on to the dict creation of contained annotations.
 
         Returns:
             the dict representation of the annotation set.
         """
-        if anntypes is not None:
-            anntypesset = set(anntypes)
-            anns_list = list(
-                val.to_dict(**kwargs) for val in self._annotations.values() if val.type in anntypesset
-            )
-        else:
-            anns_list = list(
-                val.to_dict(**kwargs) for val in self._annotations.values()
-            )
-        return {
+        anns_list = list(self._ann_dicts(anntypes, **kwargs))
+        ret = {
             # NOTE: Changelog is not getting added as it is stored in the document part!
             "name": self.name,
             "annotations": anns_list,
             "next_annid": self._next_annid,
         }
+        if index:
+            ret["index"] = self._index_repr(anntypes)
+        return ret
 
     @staticmethod
     def from_dict(dictrepr, owner_doc=None, **kwargs):
@@ -1224,6 +2300,8 @@ class AnnotationSet:
             )
         else:
             annset._annotations = {}
+        if dictrepr.get("index"):
+            annset._adopt_index(dictrepr["index"])
         return annset
 
     @staticmethod
@@ -1254,3 +2332,364 @@ class AnnotationSet:
 
         return annset
 
+
+
+# For each relation supported by AnnotationSetView: a function which retrieves the matching
+# intervals from the offset index, a predicate which checks an annotation, and a flag which
+# indicates if the intervals are in document order and the query is bounded by the span.
+_VIEW_RELATIONS = {
+    "within": (
+        lambda idx, start, end: idx.within(start, end),
+        lambda ann, start, end: ann._start >= start and ann._end <= end,
+        True,
+    ),
+    "covering": (
+        lambda idx, start, end: idx.covering(start, end),
+        lambda ann, start, end: ann._start <= start and ann._end >= end,
+        True,
+    ),
+    "overlapping": (
+        lambda idx, start, end: idx.overlapping(start, end),
+        lambda ann, start, end: ann._start < end and ann._end > start,
+        True,
+    ),
+    "coextensive": (
+        lambda idx, start, end: idx.at(start, end),
+        lambda ann, start, end: ann._start == start and ann._end == end,
+        True,
+    ),
+    "start_ge": (
+        lambda idx, start, end: idx.starting_from(start),
+        lambda ann, start, end: ann._start >= start,
+        False,
+    ),
+    "start_lt": (
+        lambda idx, start, end: idx.starting_before(start),
+        lambda ann, start, end: ann._start < start,
+        False,
+    ),
+    "before": (
+        lambda idx, start, end: idx.ending_to(start),
+        lambda ann, start, end: ann._end <= start,
+        False,
+    ),
+    "after": (
+        lambda idx, start, end: idx.starting_from(end),
+        lambda ann, start, end: ann._start >= end,
+        False,
+    ),
+}
+
+
+class AnnotationSetView:
+    """
+    A lightweight read-only view of the annotations of an AnnotationSet which satisfy some constraints.
+
+    A view only stores the set it was created from plus the constraints: the allowed types, a list
+    of offset relations and a list of required feature values. Nothing is copied when a view gets created, instead the matching annotations
+    are retrieved from the indices of the original set whenever the view is iterated over or its length
+    is needed. This means that a view always reflects the current content of the original set.
+
+    Queries on a view return another view with the additional constraint, so chained queries like
+    `annset.view().with_type("Token").within(sent)` do not create any intermediate annotation sets.
+    Use `detach()` to get an immutable detached AnnotationSet with the annotations of the view.
+    """
+
+    def __init__(self, annset: AnnotationSet, types=None, constraints=(), empty=False, features=()):
+        """
+        Creates a view. This should not be used directly, instead `AnnotationSet.view()` should be
+        used to create the initial view of a set.
+
+        Args:
+          annset: the annotation set to create the view for
+          types: None or a frozenset of annotation types to include
+          constraints: a tuple of (relation, start, end, ignoreid) tuples
+          empty: if True, the view is known to be empty
+          features: a tuple of (name, value) tuples of required feature values
+        """
+        self._annset = annset
+        self._types = types
+        self._constraints = constraints
+        self._empty = empty
+        self._features = features
+
+    def _restrict(self, types=None, constraint=None, empty=False, feature=None) -> "AnnotationSetView":
+        if types is None:
+            types = self._types
+        elif self._types is not None:
+            types = self._types & types
+        constraints = self._constraints
+        if constraint is not None:
+            constraints = constraints + (constraint,)
+        features = self._features
+        if feature is not None:
+            features = features + (feature,)
+        return AnnotationSetView(
+            self._annset, types=types, constraints=constraints, empty=self._empty or empty,
+            features=features
+        )
+
+    def _feature_filter(self):
+        """
+        Returns the set of annotation ids allowed by the indexed feature constraints (or None if there are
+        none) and the list of feature constraints which need to be checked on the annotations.
+        """
+        allowed = None
+        unindexed = []
+        for name, value in self._features:
+            ids = self._annset._feature_ids(name, value)
+            if ids is None:
+                unindexed.append((name, value))
+            elif allowed is None:
+                allowed = ids
+            else:
+                allowed = allowed & ids
+        return allowed, unindexed
+
+    def _annids(self) -> Iterator:
+        """
+        Yields the ids of the annotations in the view in document order.
+        """
+        annset = self._annset
+        if self._empty or not annset._annotations:
+            return
+        anns = annset._annotations
+        types = self._types
+        allowed, unindexed = self._feature_filter()
+        if unindexed:
+            def hasfeatures(annid):
+                features = anns[annid]._features
+                return features is not None and all(
+                    name in features.data and features.data[name] == value for name, value in unindexed
+                )
+        else:
+            def hasfeatures(annid):
+                return True
+        if not self._constraints:
+            if allowed is not None:
+                if types is not None:
+                    allowed = [annid for annid in allowed if anns[annid]._type in types]
+                for intvl in sorted(annset._intervals(allowed), key=itemgetter(0, 2)):
+                    if hasfeatures(intvl[2]):
+                        yield intvl[2]
+            elif types is None:
+                annset._create_index_by_offset()
+                for intvl in annset._index_by_offset.irange():
+                    if hasfeatures(intvl[2]):
+                        yield intvl[2]
+            else:
+                annset._create_index_by_type()
+                annids = set()
+                for t in types:
+                    annids.update(annset._index_by_type.get(t, ()))
+                for annid in sorted(annids, key=lambda x: (anns[x]._start, x)):
+                    if hasfeatures(annid):
+                        yield annid
+            return
+        # use the first bounded constraint, if any, to get the candidates from the index,
+        # then check all other constraints for each candidate
+        driver = self._constraints[0]
+        for constraint in self._constraints:
+            if _VIEW_RELATIONS[constraint[0]][2]:
+                driver = constraint
+                break
+        others = [
+            (_VIEW_RELATIONS[c[0]][1], c[1], c[2]) for c in self._constraints if c is not driver
+        ]
+        ignore = set(c[3] for c in self._constraints if c[3] is not None)
+        query, _, ordered = _VIEW_RELATIONS[driver[0]]
+        intvls = annset._query_index(lambda idx: query(idx, driver[1], driver[2]), types)
+        if not ordered:
+            intvls = sorted(intvls, key=lambda x: (x[0], x[2]))
+        for intvl in intvls:
+            annid = intvl[2]
+            if annid in ignore or (allowed is not None and annid not in allowed):
+                continue
+            ann = anns[annid]
+            if types is not None and ann._type not in types:
+                continue
+            if all(pred(ann, start, end) for pred, start, end in others) and hasfeatures(annid):
+                yield annid
+
+    def __iter__(self) -> Iterator:
+        """
+        Yields the annotations of the view in document order.
+        """
+        anns = self._annset._annotations
+        for annid in self._annids():
+            yield anns[annid]
+
+    def __len__(self) -> int:
+        """
+        Returns the number of annotations in the view.
+        """
+        if self._empty:
+            return 0
+        if not self._constraints and self._types is None and not self._features:
+            return len(self._annset)
+        n = 0
+        for _ in self._annids():
+            n += 1
+        return n
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the number of annotations in the view.
+        """
+        return len(self)
+
+    def __contains__(self, annorannid: Union[int, Annotation]) -> bool:
+        """
+        Returns True if the annotation or annotation id is in the view.
+        """
+        if isinstance(annorannid, Annotation):
+            annorannid = annorannid.id
+        ann = self._annset._annotations.get(annorannid)
+        if ann is None or self._empty:
+            return False
+        if self._types is not None and ann._type not in self._types:
+            return False
+        for relation, start, end, ignoreid in self._constraints:
+            if annorannid == ignoreid or not _VIEW_RELATIONS[relation][1](ann, start, end):
+                return False
+        features = ann._features.data if ann._features is not None else {}
+        for name, value in self._features:
+            if name not in features or features[name] != value:
+                return False
+        return True
+
+    def first(self) -> Annotation:
+        """
+        Returns the first annotation of the view in document order.
+
+        Throws:
+          an exception if the view is empty
+        """
+        for annid in self._annids():
+            return self._annset._annotations[annid]
+        raise Exception("Empty view, there is no first annotation")
+
+    def last(self) -> Annotation:
+        """
+        Returns the last annotation of the view in document order.
+
+        Throws:
+          an exception if the view is empty
+        """
+        annid = None
+        for annid in self._annids():
+            pass
+        if annid is None:
+            raise Exception("Empty view, there is no last annotation")
+        return self._annset._annotations[annid]
+
+    def detach(self) -> AnnotationSet:
+        """
+        Returns an immutable detached AnnotationSet with the annotations of this view.
+        """
+        return self._annset.detach(restrict_to=list(self._annids()))
+
+    def with_type(self, *anntype: Union[str, Iterable]) -> "AnnotationSetView":
+        """
+        Returns a view restricted to annotations of the given type(s).
+
+        Args:
+          anntype: one or more types or type lists. If no type is specified, the view is not restricted.
+
+        Returns:
+          a view of the matching annotations
+        """
+        atypes = set()
+        for atype in anntype:
+            if isinstance(atype, str):
+                atypes.add(atype)
+            else:
+                atypes.update(atype)
+        if not atypes:
+            return self
+        return self._restrict(types=frozenset(atypes))
+
+    def with_feature(self, name: str, value) -> "AnnotationSetView":
+        """
+        Returns a view restricted to annotations which have the given value for the feature. If the
+        set has an index for the feature (see `AnnotationSet.create_feature_index`), the index is used to
+        find the matching annotations.
+
+        Args:
+          name: the feature name
+          value: the feature value
+
+        Returns:
+          a view of the matching annotations
+        """
+        return self._restrict(feature=(name, value))
+
+    def _offset_restrict(self, relation, start, end, annid, include_self):
+        ignore = annid if not include_self else None
+        return self._restrict(constraint=(relation, start, end, ignore))
+
+    @support_annotation_or_set
+    def within(self, start: int, end: int, annid=None, include_self=False) -> "AnnotationSetView":
+        """
+        Returns a view restricted to annotations within the given span, see `AnnotationSet.within`.
+        """
+        if start > end:
+            raise Exception("Invalid offset range: {},{}".format(start, end))
+        if start == end:
+            return self._restrict(empty=True)
+        return self._offset_restrict("within", start, end, annid, include_self)
+
+    @support_annotation_or_set
+    def covering(self, start: int, end: int, annid=None, include_self=False) -> "AnnotationSetView":
+        """
+        Returns a view restricted to annotations covering the given span, see `AnnotationSet.covering`.
+        """
+        return self._offset_restrict("covering", start, end, annid, include_self)
+
+    @support_annotation_or_set
+    def overlapping(self, start: int, end: int, annid=None, include_self=False) -> "AnnotationSetView":
+        """
+        Returns a view restricted to annotations overlapping with the given span, see
+        `AnnotationSet.overlapping`.
+        """
+        return self._offset_restrict("overlapping", start, end, annid, include_self)
+
+    @support_annotation_or_set
+    def coextensive(self, start: int, end: int, annid=None, include_self=False) -> "AnnotationSetView":
+        """
+        Returns a view restricted to annotations with exactly the given span, see
+        `AnnotationSet.coextensive`.
+        """
+        return self._offset_restrict("coextensive", start, end, annid, include_self)
+
+    @support_annotation_or_set
+    def start_ge(self, start: int, ignored: Any = None, annid=None, include_self=False) -> "AnnotationSetView":
+        """
+        Returns a view restricted to annotations starting at or after the given offset.
+        """
+        return self._offset_restrict("start_ge", start, None, annid, include_self)
+
+    @support_annotation_or_set
+    def start_lt(self, offset: int, ignored: Any = None, annid=None) -> "AnnotationSetView":
+        """
+        Returns a view restricted to annotations starting before the given offset.
+        """
+        return self._offset_restrict("start_lt", offset, None, None, False)
+
+    @support_annotation_or_set
+    def before(self, start: int, end: int, annid=None, include_self=False) -> "AnnotationSetView":
+        """
+        Returns a view restricted to annotations ending before the given span.
+        """
+        return self._offset_restrict("before", start, end, annid, include_self)
+
+    @support_annotation_or_set
+    def after(self, start: int, end: int, annid=None, include_self=False) -> "AnnotationSetView":
+        """
+        Returns a view restricted to annotations starting after the given span.
+        """
+        return self._offset_restrict("after", start, end, annid, include_self)
+
+    def __repr__(self) -> str:
+        return "AnnotationSetView({})".format(repr(list(self)))
@@ -189,7 +189,9 @@ class ChangeLog:
             if "offset_mapper" in kwargs:
                 om = kwargs.get("offset_mapper")
             elif "document" in kwargs:
-                om = OffsetMapper(kwargs.get("document"))
+                doc = kwargs.get("document")
+                # use the offset mapper kept by the document, if it is a document
+                om = getattr(doc, "offset_mapper", None) or OffsetMapper(doc)
             else:
                 raise Exception(
                     "Loading a changelog with offset_type JAVA, need kwarg 'offset_mapper' or 'document'"
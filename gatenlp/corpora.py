@@ -168,19 +168,22 @@ class JsonLinesFileSource(DocumentSource):
     A document source which reads one json serialization of a document from each line of the given file.
     """
 
-    def __init__(self, file):
+    def __init__(self, file, json_codec=None):
         """
         Create a JsonLinesFileSource.
 
         Args:
             file: the file path (a string) or an open file handle.
+            json_codec: the name of the JSON codec to use, if None, the configured codec,
+                see `gatenlp.serialization.jsoncodecs`
         """
         self.file = file
+        self.json_codec = json_codec
 
     def __iter__(self):
         with open(self.file, "rt", encoding="utf-8") as infp:
             for line in infp:
-                yield Document.load_mem(line, fmt="json")
+                yield Document.load_mem(line, fmt="json", json_codec=self.json_codec)
 
 
 class JsonLinesFileDestination(DocumentDestination):
@@ -188,13 +191,16 @@ class JsonLinesFileDestination(DocumentDestination):
     Writes one line of JSON per document to the a single output file.
     """
 
-    def __init__(self, file):
+    def __init__(self, file, json_codec=None):
         """
 
         Args:
             file: the file to write to. If it exists, it gets overwritten without warning.
                Expected to be a string or an open file handle.
+            json_codec: the name of the JSON codec to use, if None, the configured codec,
+                see `gatenlp.serialization.jsoncodecs`
         """
+        self.json_codec = json_codec
         if isinstance(file, str):
             self.fh = open(file, "wt", encoding="utf-8")
         else:
@@ -217,7 +223,7 @@ class JsonLinesFileDestination(DocumentDestination):
         if doc is None:
             return
         assert isinstance(doc, Document)
-        self.fh.write(doc.save_mem(fmt="json"))
+        self.fh.write(doc.save_mem(fmt="json", json_codec=self.json_codec))
         self.fh.write("\n")
         self.n += 1
 
@@ -3,7 +3,7 @@ Module that implements the Document class for representing gatenlp documents wit
 features and annotation sets.
 """
 
-from typing import KeysView, Callable
+from typing import KeysView, Callable, Union
 import logging
 import importlib
 import copy as lib_copy
@@ -12,6 +12,7 @@ from gatenlp.annotation import Annotation
 from gatenlp.offsetmapper import OffsetMapper, OFFSET_TYPE_PYTHON, OFFSET_TYPE_JAVA
 from gatenlp.features import Features
 from gatenlp.utils import in_notebook
+from gatenlp.impl import get_index_backend
 from gatenlp.changelog import ChangeLog
 
 from gatenlp.changelog_consts import (
@@ -66,12 +67,19 @@ class Document:
             assert isinstance(text, str)
         if changelog is not None:
             assert isinstance(changelog, ChangeLog)
+        # True once the document has been frozen, see freeze
+        self._frozen = False
         self._changelog = changelog
         self._features = Features(features, logger=self._log_feature_change)
         self._annotation_sets = dict()
         self._text = text
         self.offset_type = OFFSET_TYPE_PYTHON
         self._name = ""
+        self._columnar = False
+        # the name of the index backend for the annotation sets or None for the configured default
+        self._index_backend = None
+        # the offset mapper for the text, see offset_mapper
+        self._offset_mapper = None
 
     @property
     def name(self):
@@ -118,10 +126,19 @@ class Document:
         annset_names = self._annotation_sets.keys()
         for annset_name in annset_names:
             annset = self._annotation_sets[annset_name]
-            if annset._annotations is not None:
+            annset._prepare_change()
+            annset._preserve_all()
+            if annset.columnar:
+                annset._annotations.map_offsets(method)
+            elif annset._annotations is not None:
                 for ann in annset._annotations.values():
                     ann._start = method(ann._start)
                     ann._end = method(ann._end)
+            # the offset index is invalid now and gets re-created when needed
+            annset._index_by_offset = None
+            annset._index_by_type_offset = None
+            if annset._query_cache is not None:
+                annset._query_cache.clear()
 
     def to_offset_type(self, offsettype: str) -> OffsetMapper:
         """Convert all the offsets of all the annotations in this document to the
@@ -144,14 +161,16 @@ class Document:
         om = None
         if offsettype == self.offset_type:
             return
+        if self._frozen:
+            raise Exception("Cannot convert the offsets of a frozen document")
         if offsettype == OFFSET_TYPE_JAVA and self.offset_type == OFFSET_TYPE_PYTHON:
             # convert from currently python to java
-            om = OffsetMapper(self._text)
+            om = self.offset_mapper
             self._fixup_annotations(om.convert_to_java)
             self.offset_type = OFFSET_TYPE_JAVA
         elif offsettype == OFFSET_TYPE_PYTHON and self.offset_type == OFFSET_TYPE_JAVA:
             # convert from currently java to python
-            om = OffsetMapper(self._text)
+            om = self.offset_mapper
             self._fixup_annotations(om.convert_to_python)
             self.offset_type = OFFSET_TYPE_PYTHON
         else:
@@ -355,6 +374,8 @@ class Document:
         Returns:
 
         """
+        if self._frozen:
+            raise Exception("Cannot change the features of a frozen document")
         if self._changelog is None:
             return
         command = "doc-" + command
@@ -411,7 +432,10 @@ class Document:
         """
         self._ensure_type_python()
         if name not in self._annotation_sets:
+            if self._frozen:
+                raise Exception(f"Cannot add annotation set {name} to a frozen document")
             annset = AnnotationSet(owner_doc=self, name=name)
+            annset.columnar = self._columnar
             self._annotation_sets[name] = annset
             if self._changelog:
                 self._changelog.append({"command": "annotations:add", "set": name})
@@ -443,6 +467,8 @@ class Document:
         """
         if name not in self._annotation_sets:
             raise Exception(f"AnnotationSet with name {name} does not exist")
+        if self._frozen:
+            raise Exception(f"Cannot remove annotation set {name} from a frozen document")
         del self._annotation_sets[name]
         if self._changelog:
             self._changelog.append({"command": "annotations:remove", "set": name})
@@ -467,6 +493,44 @@ class Document:
             self.text, self._features, asets
         )
 
+    def _annset_specs(self, offset_type, annsets, kwargs):
+        """
+        Determines the offset type and annotation sets for creating the dict representation, see `to_dict`.
+
+        If offsets have to get converted, the offset mapper and offset type are added to kwargs, which get
+        passed on to the creation of the dict representation of annotation sets.
+
+        Args:
+            offset_type: the offset type to convert to or None
+            annsets: the annotation set/type specifications or None
+            kwargs: the keyword arguments for creating the dict representations of the annotation sets
+
+        Returns:
+            a tuple of the offset type and a list of (name, annotation set, annotation types or None) tuples
+        """
+        # if the specified offset type is equal to what we have, do nothing, otherwise
+        # get the offset mapper and pass it down to where we actually convert the annotations
+        if offset_type is not None:
+            assert offset_type == OFFSET_TYPE_JAVA or offset_type == OFFSET_TYPE_PYTHON
+            if offset_type != self.offset_type:
+                if self._text is not None:
+                    kwargs["offset_mapper"] = self.offset_mapper
+                    kwargs["offset_type"] = offset_type
+        else:
+            offset_type = self.offset_type
+        if annsets is None:
+            return offset_type, [(name, aset, None) for name, aset in self._annotation_sets.items()]
+        specs = []
+        for spec in annsets:
+            if isinstance(spec, str):
+                specs.append((spec, self._annotation_sets[spec], None))
+            else:
+                setname, types = spec
+                if isinstance(types, str):
+                    types = [types]
+                specs.append((setname, self._annotation_sets[setname], types))
+        return offset_type, specs
+
     def to_dict(self, offset_type=None, annsets=None, **kwargs):
         """Convert this instance to a dictionary that can be used to re-create the instance with
         from_dict.
@@ -486,38 +550,10 @@ class Document:
           the dictionary representation of this instance
 
         """
-        # if the specified offset type is equal to what we have, do nothing, otherwise
-        # create an offset mapper and pass it down to where we actually convert the annotations
-
-        om = None
-        if offset_type is not None:
-            assert offset_type == OFFSET_TYPE_JAVA or offset_type == OFFSET_TYPE_PYTHON
-            if offset_type != self.offset_type:
-                if self._text is not None:
-                    om = OffsetMapper(self._text)
-                    kwargs["offset_mapper"] = om
-                    kwargs["offset_type"] = offset_type
-        else:
-            offset_type = self.offset_type
-
-        # create the annotation sets map
-        if annsets is not None:
-            annsets_dict = {}
-            for spec in annsets:
-                if isinstance(spec, str):
-                    annsets_dict[spec] = self._annotation_sets[spec].to_dict(**kwargs)
-                else:
-                    setname, types = spec
-                    if isinstance(types, str):
-                        types = [types]
-                    annsets_dict[setname] = \
-                        self._annotation_sets[setname].to_dict(anntypes=types, **kwargs)
-        else:
-            annsets_dict = {
-                name: aset.to_dict(**kwargs)
-                for name, aset in self._annotation_sets.items()
-            }
-
+        offset_type, specs = self._annset_specs(offset_type, annsets, kwargs)
+        annsets_dict = {
+            name: aset.to_dict(anntypes=anntypes, **kwargs) for name, aset, anntypes in specs
+        }
         return {
             "annotation_sets": annsets_dict,
             "text": self._text,
@@ -634,19 +670,40 @@ class Document:
                 like "text/bdocjs".
           mod: the name of a module where the document loader is implemented.
               (Default value = "gatenlp.serialization.default")
+          create_indices: if True, eagerly build the offset and type indices of all annotation
+              sets after loading, in bulk, instead of creating them lazily on the first query.
+          columnar: if True, store the annotations of all annotation sets in columnar storage mode,
+              see `Document.columnar`.
+          index_backend: if not None, the name of the index backend to use for all annotation sets,
+              see `Document.index_backend`.
+          precompute_offset_mapper: if True, create the offset mapper of the document after loading,
+              see `Document.offset_mapper`, so that saving with Java offsets does not need to create it.
           kwargs: additional format specific keyword arguments to pass to the loader
 
         Returns:
           the loaded document
         """
+        create_indices = kwargs.pop("create_indices", False)
+        columnar = kwargs.pop("columnar", False)
+        index_backend = kwargs.pop("index_backend", None)
+        precompute_offset_mapper = kwargs.pop("precompute_offset_mapper", False)
         if fmt is None or isinstance(fmt, str):
             m = importlib.import_module(mod)
             loader = m.get_document_loader(source, fmt)
             doc = loader(Document, from_ext=source, **kwargs)
         else:
             doc = fmt(Document, from_ext=source, **kwargs)
+        if columnar:
+            doc.columnar = True
+        if index_backend is not None:
+            doc.index_backend = index_backend
         if doc.offset_type == OFFSET_TYPE_JAVA:
+            # this creates the offset mapper, which is kept for later conversions
             doc.to_offset_type(OFFSET_TYPE_PYTHON)
+        elif precompute_offset_mapper:
+            doc.offset_mapper
+        if create_indices:
+            doc.create_indices()
         return doc
 
     @staticmethod
@@ -662,30 +719,141 @@ class Document:
             fmt: the format (Default value = "json")
             mod: the name of the module where the loader is implemented
                 (Default value = "gatenlp.serialization.default")
+            create_indices: if True, eagerly build the offset and type indices of all annotation
+                sets after loading (Default value = False)
+            columnar: if True, use columnar storage mode for all annotation sets (Default value = False)
+            index_backend: if not None, the index backend to use for all annotation sets (Default value = None)
+            precompute_offset_mapper: if True, create the offset mapper of the document after loading
+                (Default value = False)
             kwargs: additional arguments to pass to the loader
         """
         if not fmt:
             raise Exception("Format required.")
+        create_indices = kwargs.pop("create_indices", False)
+        columnar = kwargs.pop("columnar", False)
+        index_backend = kwargs.pop("index_backend", None)
+        precompute_offset_mapper = kwargs.pop("precompute_offset_mapper", False)
         if isinstance(fmt, str):
             m = importlib.import_module(mod)
             loader = m.get_document_loader(None, fmt)
             doc = loader(Document, from_mem=source, **kwargs)
         else:
             doc = fmt(Document, from_mem=source, **kwargs)
+        if columnar:
+            doc.columnar = True
+        if index_backend is not None:
+            doc.index_backend = index_backend
         if doc.offset_type == OFFSET_TYPE_JAVA:
+            # this creates the offset mapper, which is kept for later conversions
             doc.to_offset_type(OFFSET_TYPE_PYTHON)
+        elif precompute_offset_mapper:
+            doc.offset_mapper
+        if create_indices:
+            doc.create_indices()
         return doc
 
+    @property
+    def offset_mapper(self) -> Union[OffsetMapper, None]:
+        """
+        Returns the offset mapper for converting between Python and Java offsets of the text, or None if the
+        document has no text. The mapper is created when it is first needed and then kept with the document,
+        so that converting offsets or saving with Java offsets repeatedly does not have to analyze the text again.
+        """
+        if self._text is None:
+            return None
+        om = self._offset_mapper
+        # the mapper is only valid for the text object it was created for
+        if om is None or om[0] is not self._text:
+            om = (self._text, OffsetMapper(self._text))
+            self._offset_mapper = om
+        return om[1]
+
+    @property
+    def columnar(self) -> bool:
+        """
+        Get or set if the annotation sets of this document use columnar storage mode, see
+        `AnnotationSet.columnar`. Setting this converts all existing annotation sets and is used for
+        all annotation sets which get created later.
+        """
+        return self._columnar
+
+    @columnar.setter
+    def columnar(self, val: bool) -> None:
+        if self._frozen and val != self._columnar:
+            raise Exception("Cannot change the storage mode of a frozen document")
+        self._columnar = val
+        for annset in self._annotation_sets.values():
+            annset.columnar = val
+
+    @property
+    def index_backend(self) -> Union[str, None]:
+        """
+        Get or set the name of the index backend used for the offset and type indices of the annotation
+        sets of this document, see `gatenlp.impl.indexbackends`. If None (the default), annotation sets
+        use the backend configured with `gatenlpconfig.index_backend`. Setting the backend also sets it for all
+        existing annotation sets, see `AnnotationSet.index_backend`.
+        """
+        return self._index_backend
+
+    @index_backend.setter
+    def index_backend(self, name: str) -> None:
+        if self._frozen:
+            raise Exception("Cannot change the index backend of a frozen document")
+        # make sure the backend exists before anything gets changed
+        get_index_backend(name)
+        self._index_backend = name
+        for annset in self._annotation_sets.values():
+            annset.index_backend = name
+
+    @property
+    def frozen(self) -> bool:
+        """
+        Returns True if the document has been frozen, see `freeze`.
+        """
+        return self._frozen
+
+    def freeze(self) -> None:
+        """
+        Freezes the document and all its annotation sets, see `AnnotationSet.freeze`: all indices get
+        created right away and after that, annotation sets cannot be added, removed or changed and the
+        document features cannot be changed. A frozen document can be queried from several threads
+        concurrently.
+
+        A frozen document cannot be unfrozen, but a copy of a frozen document is not frozen.
+        """
+        self._ensure_type_python()
+        for annset in self._annotation_sets.values():
+            annset.freeze()
+        self._frozen = True
+
+    def create_indices(self):
+        """
+        Eagerly creates the offset and type indices of all annotation sets of the document.
+        """
+        for annset in self._annotation_sets.values():
+            annset.create_indices()
+
     def __copy__(self):
         """
         Creates a shallow copy except the changelog which is set to None.
 
+        The annotation sets of the copy are copy-on-write copies of the original sets: adding or
+        removing annotations or changing the features of an annotation in the copy does not affect
+        the original and vice versa, but feature values are shared. Each annotation only gets copied when it
+        is first accessed in the copy or before it gets changed in the original.
+
         Returns:
             shallow copy of the document
         """
         doc = Document(self._text)
-        doc._annotation_sets = self._annotation_sets
+        doc._annotation_sets = {
+            name: annset._cow_copy(name, owner_doc=doc)
+            for name, annset in self._annotation_sets.items()
+        }
         doc.offset_type = self.offset_type
+        doc._columnar = self._columnar
+        doc._index_backend = self._index_backend
+        doc._offset_mapper = self._offset_mapper
         doc._features = self._features.copy()
         return doc
 
@@ -714,8 +882,14 @@ class Document:
             fts = None
         doc = Document(self._text, features=fts)
         doc._changelog = None
-        doc._annotation_sets = lib_copy.deepcopy(self._annotation_sets, memo)
+        doc._offset_mapper = self._offset_mapper
+        doc._annotation_sets = {
+            name: annset._deep_copy(name, owner_doc=doc, memo=memo)
+            for name, annset in self._annotation_sets.items()
+        }
         doc.offset_type = self.offset_type
+        doc._columnar = self._columnar
+        doc._index_backend = self._index_backend
         return doc
 
     def deepcopy(self, memo=None):
@@ -16,6 +16,7 @@ Module that implements class Feature for representing features.
 
 from collections import UserDict
 import copy as lib_copy
+from gatenlp.utils import intern_name
 
 
 class Features(UserDict):
@@ -49,6 +50,18 @@ class Features(UserDict):
         else:
             super().__init__(**kwargs)
 
+    @staticmethod
+    def _from_data(data, logger=None):
+        """
+        Creates a Features object which uses the given dict without copying or checking it, for creating many
+        Features from data which has been checked already, e.g. when loading a document. The feature
+        names get interned.
+        """
+        ret = Features.__new__(Features)
+        ret._logger = logger
+        ret.data = {intern_name(k): v for k, v in data.items()}
+        return ret
+
     def __delitem__(self, featurename):
         """
         Remove the feature with the given feature name. This raises a key error if featurename is
@@ -81,7 +94,7 @@ class Features(UserDict):
             )
         if self._logger:
             self._logger("feature:set", feature=featurename, value=featurevalue)
-        self.data[featurename] = featurevalue
+        self.data[intern_name(featurename)] = featurevalue
 
     def clear(self):
         """
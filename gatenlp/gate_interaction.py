@@ -16,7 +16,7 @@ from gatenlp.changelog import ChangeLog
 from gatenlp.document import Document
 from gatenlp.offsetmapper import OFFSET_TYPE_JAVA, OFFSET_TYPE_PYTHON
 from gatenlp.utils import init_logger
-import json
+from gatenlp.serialization.jsoncodecs import get_json_codec
 
 # We cannot simply do this, because on some systems Python may guess the wrong encoding for stdin:
 # instream = sys.stdin
@@ -303,9 +303,10 @@ def interact(args=None, annotator=None):
     if args.mode == "pipe":
         if args.format != "json":
             raise Exception("For interaction mode pipe, only format=json is supported")
+        codec = get_json_codec()
         for line in instream:
             try:
-                request = json.loads(line)
+                request = codec.loads(line)
             except Exception as ex:
                 logger.error("Unable to load from JSON:\n{}".format(line))
                 raise ex
@@ -370,7 +371,7 @@ def interact(args=None, annotator=None):
                     "stacktrace": st,
                 }
             logger.debug("Sending back response: {}".format(response))
-            print(json.dumps(response), file=ostream)
+            print(codec.dumps(response), file=ostream)
 
             ostream.flush()
             if stop_requested:
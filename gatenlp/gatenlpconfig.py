@@ -24,6 +24,14 @@ class GatenlpConfig:
         self.doc_html_repr_height1_nostretch = "max-height: 20em;"
         self.doc_html_repr_height2_nostretch = "max-height: 14em;"
 
+        # The name of the index backend to use for the offset and type indices of annotation sets, unless
+        # a different backend is set for a document or annotation set, see gatenlp.impl.indexbackends
+        self.index_backend = "sorted"
+
+        # The name of the JSON codec to use for reading and writing JSON, or None to use the json module
+        # of the standard library, see gatenlp.serialization.jsoncodecs
+        self.json_codec = None
+
 
 
 gatenlpconfig = GatenlpConfig()
@@ -5,3 +5,12 @@ by other libraries or by better implementations in a separate packate.
 """
 
 from gatenlp.impl.sortedintvls import SortedIntvls
+from gatenlp.impl.intervaltree import IntervalTree
+from gatenlp.impl.columnar import ColumnarAnnotations
+from gatenlp.impl.snapshot import SnapshotAnnotations
+from gatenlp.impl.querycache import QueryCache
+from gatenlp.impl.indexbackends import (
+    IndexBackend, register_index_backend, get_index_backend, index_backend_names
+)
+# NOTE: gatenlp.impl.arrayintvls.ArrayIntvls and gatenlp.impl.spanarrays.SpanArrays are not imported
+# here since they require numpy
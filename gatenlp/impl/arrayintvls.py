@@ -0,0 +1,323 @@
+"""
+Module that provides an array-based alternative to SortedIntvls which represents a collection of
+intervals and allows for the same basic interval-based operations.
+
+Internally this stores the start offsets, end offsets and annotation ids in parallel numpy int arrays
+which are sorted by increasing start offset, then increasing annotation id. A second array
+holds the positions of the intervals in order of increasing end offset. All queries are answered
+using binary searches (`numpy.searchsorted`) on these arrays.
+
+Building the index is done with a single `numpy.lexsort` over all intervals which is much faster
+and uses much less memory than creating and sorting Python tuples. Added intervals are queued and
+removed intervals are only marked as removed, and the arrays get compacted and re-sorted once on the
+next query, so this is best suited for annotation sets which are mostly read after they have been
+created or loaded.
+
+NOTE: unlike SortedIntvls, the data stored with each interval must be an int (the annotation id).
+
+NOTE: this requires the numpy package.
+"""
+
+import numpy as np
+
+
+class ArrayIntvls:
+    """ """
+
+    DTYPE = np.int64
+
+    def __init__(self):
+        self._starts = np.empty(0, dtype=ArrayIntvls.DTYPE)
+        self._ends = np.empty(0, dtype=ArrayIntvls.DTYPE)
+        self._ids = np.empty(0, dtype=ArrayIntvls.DTYPE)
+        # indices into the arrays above, in order of increasing end offset
+        self._by_end = np.empty(0, dtype=np.intp)
+        # the end offsets in order of increasing end offset
+        self._ends_sorted = np.empty(0, dtype=ArrayIntvls.DTYPE)
+        # intervals added since the arrays were last sorted
+        self._pending = []
+        # the array positions of intervals removed since the arrays were last sorted
+        self._removed = set()
+
+    def _build(self, starts, ends, ids):
+        """
+        Sort the given arrays by start offset and id and set them as the new content.
+        """
+        order = np.lexsort((ids, starts))
+        self._starts = starts[order]
+        self._ends = ends[order]
+        self._ids = ids[order]
+        self._by_end = np.argsort(self._ends, kind="stable")
+        self._ends_sorted = self._ends[self._by_end]
+
+    def _flush(self):
+        """
+        Drop the removed intervals from the sorted arrays and merge any pending intervals into them.
+        """
+        if not self._pending and not self._removed:
+            return
+        starts, ends, ids = self._starts, self._ends, self._ids
+        if self._removed:
+            keep = np.ones(len(starts), dtype=bool)
+            keep[list(self._removed)] = False
+            starts, ends, ids = starts[keep], ends[keep], ids[keep]
+            self._removed = set()
+        if self._pending:
+            added = np.array(self._pending, dtype=ArrayIntvls.DTYPE).reshape(-1, 3)
+            self._pending = []
+            starts = np.concatenate((starts, added[:, 0]))
+            ends = np.concatenate((ends, added[:, 1]))
+            ids = np.concatenate((ids, added[:, 2]))
+        self._build(starts, ends, ids)
+
+    def _find(self, start, end, data):
+        """
+        Return the array position of the given interval or -1 if it does not exist or has been removed.
+        Pending intervals only get merged if the interval is not in the sorted arrays.
+        """
+        for _ in range(2):
+            lo = np.searchsorted(self._starts, start, side="left")
+            hi = np.searchsorted(self._starts, start, side="right")
+            pos = int(lo + np.searchsorted(self._ids[lo:hi], data, side="left"))
+            if pos < hi and self._ids[pos] == data and self._ends[pos] == end and pos not in self._removed:
+                return pos
+            if not self._pending:
+                break
+            self._flush()
+        return -1
+
+    def _tuples(self, idxs):
+        """
+        Return an iterator of (start, end, data) tuples for the given array positions (slice or
+        index array), with all elements converted to Python ints.
+        """
+        return zip(
+            self._starts[idxs].tolist(),
+            self._ends[idxs].tolist(),
+            self._ids[idxs].tolist(),
+        )
+
+    def add(self, start, end, data):
+        """
+        Adds an interval.
+        """
+        self._pending.append((start, end, data))
+
+    def update(self, tupleiterable):
+        """
+        Updates from an iterable of intervals.
+        """
+        self._pending.extend(tupleiterable)
+
+    def remove(self, start, end, data):
+        """
+        Removes an interval, exception if the interval does not exist.
+        """
+        pos = self._find(start, end, data)
+        if pos < 0:
+            raise ValueError(f"Interval {(start, end, data)} not in ArrayIntvls")
+        self._removed.add(pos)
+
+    def discard(self, start, end, data):
+        """
+        Removes and interval, do nothing if the interval does not exist.
+        """
+        pos = self._find(start, end, data)
+        if pos >= 0:
+            self._removed.add(pos)
+
+    def __len__(self):
+        """
+        Returns the number of intervals.
+        """
+        return len(self._starts) - len(self._removed) + len(self._pending)
+
+    def prepare(self):
+        """
+        Merges any pending intervals and drops removed intervals, so that queries do not modify the index until the next
+        interval gets added or removed.
+        """
+        self._flush()
+
+    def starting_at(self, offset):
+        """
+        Returns an iterable of (start, end, data) tuples where start==offset
+        """
+        self._flush()
+        lo = np.searchsorted(self._starts, offset, side="left")
+        hi = np.searchsorted(self._starts, offset, side="right")
+        return self._tuples(slice(lo, hi))
+
+    def ending_at(self, offset):
+        """
+        Returns an iterable of (start, end, data) tuples where end==offset
+        """
+        self._flush()
+        lo = np.searchsorted(self._ends_sorted, offset, side="left")
+        hi = np.searchsorted(self._ends_sorted, offset, side="right")
+        return self._tuples(self._by_end[lo:hi])
+
+    def at(self, start, end):
+        """
+        Returns an iterable of tuples where start==start and end==end
+        """
+        self._flush()
+        lo = np.searchsorted(self._starts, start, side="left")
+        hi = np.searchsorted(self._starts, start, side="right")
+        return self._tuples(lo + np.flatnonzero(self._ends[lo:hi] == end))
+
+    def within(self, start, end):
+        """
+        Returns intervals which are fully contained within start...end
+        """
+        self._flush()
+        lo = np.searchsorted(self._starts, start, side="left")
+        hi = np.searchsorted(self._starts, end, side="right")
+        return self._tuples(lo + np.flatnonzero(self._ends[lo:hi] <= end))
+
+    def starting_from(self, offset):
+        """
+        Returns intervals that start at or after offset.
+        """
+        self._flush()
+        lo = np.searchsorted(self._starts, offset, side="left")
+        return self._tuples(slice(lo, None))
+
+    def starting_before(self, offset):
+        """
+        Returns intervals  that start before offset.
+        """
+        self._flush()
+        hi = np.searchsorted(self._starts, offset, side="left")
+        return self._tuples(slice(0, hi))
+
+    def ending_to(self, offset, reverse=False):
+        """
+        Returns intervals that end before or at the given end offset, if reverse is True, in order of
+        decreasing end offset.
+        """
+        self._flush()
+        hi = np.searchsorted(self._ends_sorted, offset, side="right")
+        if reverse:
+            return self._tuples(self._by_end[:hi][::-1])
+        return self._tuples(self._by_end[:hi])
+
+    def ending_after(self, offset):
+        """
+        Returns intervals the end after the given offset.
+        """
+        self._flush()
+        lo = np.searchsorted(self._ends_sorted, offset, side="right")
+        return self._tuples(self._by_end[lo:])
+
+    def covering(self, start, end):
+        """
+        Returns intervals that contain the given range.
+        """
+        self._flush()
+        hi = np.searchsorted(self._starts, start, side="right")
+        return self._tuples(np.flatnonzero(self._ends[:hi] >= end))
+
+    def overlapping(self, start, end):
+        """
+        Returns intervals that overlap with the given range.
+        """
+        self._flush()
+        hi = np.searchsorted(self._starts, end, side="left")
+        return self._tuples(np.flatnonzero(self._ends[:hi] > start))
+
+    def count_overlapping(self, start, end):
+        """
+        Returns the number of intervals that overlap with the given range.
+        """
+        self._flush()
+        nbefore = np.searchsorted(self._ends_sorted, start, side="right")
+        nafter = len(self._starts) - np.searchsorted(self._starts, end, side="left")
+        n = len(self._starts) - nbefore - nafter
+        if start >= end:
+            lo = np.searchsorted(self._starts, start, side="left")
+            hi = np.searchsorted(self._starts, start, side="right")
+            n += np.count_nonzero(self._ends[lo:hi] == end)
+        return int(n)
+
+    def count_covering(self, start, end):
+        """
+        Returns the number of intervals that contain the given range.
+        """
+        self._flush()
+        hi = np.searchsorted(self._starts, start, side="right")
+        return int(np.count_nonzero(self._ends[:hi] >= end))
+
+    def count_within(self, start, end):
+        """
+        Returns the number of intervals which are fully contained within start...end.
+        """
+        self._flush()
+        lo = np.searchsorted(self._starts, start, side="left")
+        hi = np.searchsorted(self._starts, end, side="right")
+        return int(np.count_nonzero(self._ends[lo:hi] <= end))
+
+    def firsts(self):
+        """
+        Yields all intervals which start at the smallest known offset.
+        """
+        self._flush()
+        if len(self._starts) == 0:
+            return iter(())
+        return self.starting_at(self._starts[0])
+
+    def lasts(self):
+        """
+        Yields all intervals which start at the last known start offset.
+        """
+        self._flush()
+        n = len(self._starts)
+        if n == 0:
+            return iter(())
+        lo = np.searchsorted(self._starts, self._starts[-1], side="left")
+        return self._tuples(slice(n - 1, lo - 1 if lo > 0 else None, -1))
+
+    def min_start(self):
+        """
+        Returns the smallest known start offset.
+        """
+        self._flush()
+        return int(self._starts[0])
+
+    def max_end(self):
+        """
+        Returns the biggest known end offset.
+        """
+        self._flush()
+        return int(self._ends_sorted[-1])
+
+    def irange(self, minoff=None, maxoff=None, reverse=False, inclusive=(True, True)):
+        """
+        Yields an iterator of intervals with a start offset between minoff and maxoff, inclusive.
+
+        Args:
+          minoff: minimum offset, default None indicates any
+          maxoff: maximum offset, default None indicates any
+          reverse: if `True` yield in reverse order
+          inclusive: if the minoff and maxoff values should be inclusive, default is (True,True)
+
+        Returns:
+
+        """
+        self._flush()
+        lo, hi = 0, len(self._starts)
+        if minoff is not None:
+            lo = np.searchsorted(
+                self._starts, minoff, side="left" if inclusive[0] else "right"
+            )
+        if maxoff is not None:
+            hi = np.searchsorted(
+                self._starts, maxoff, side="right" if inclusive[1] else "left"
+            )
+        if reverse:
+            return self._tuples(slice(hi - 1, lo - 1 if lo > 0 else None, -1))
+        return self._tuples(slice(lo, hi))
+
+    def __repr__(self):
+        self._flush()
+        return "ArrayIntvls({})".format(list(self._tuples(slice(None))))
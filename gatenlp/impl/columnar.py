@@ -0,0 +1,281 @@
+"""
+Module that provides the ColumnarAnnotations class, a compact dict-like mapping from annotation id
+to annotation which is used by an AnnotationSet in columnar storage mode.
+
+Instead of keeping an Annotation object for each annotation, the annotation ids, start offsets,
+end offsets and types are stored in parallel int arrays which are sorted by annotation id. Each
+annotation type is stored only once in a type table and the arrays only store the index into that
+table. Features are only stored for annotations which actually have features.
+
+Annotation objects get created on demand when an annotation is accessed. The created annotation
+is remembered as long as it is referenced anywhere else, so while an annotation is in use, the
+same object is returned each time and changes to its features are stored with this mapping. For this,
+the feature dict of an annotation in use is always shared with this mapping.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+import weakref
+from gatenlp.annotation import Annotation
+
+
+class ColumnarAnnotations(MutableMapping):
+    """ """
+
+    def __init__(self, owner_set=None, anns=None):
+        """
+        Creates the mapping.
+
+        Args:
+            owner_set: the annotation set the annotations belong to
+            anns: an optional iterable of annotations to add
+        """
+        self._owner_set = owner_set
+        self._ids = array("q")
+        self._starts = array("q")
+        self._ends = array("q")
+        self._types = array("l")
+        # the type table and the map from type name to its index in the type table
+        self._typenames = []
+        self._typecodes = {}
+        # map from annotation id to the feature dict for annotations which have features or which
+        # are currently in use
+        self._features = {}
+        # map from annotation id to a weak reference to the annotation currently in use
+        self._live = {}
+        # the mapping this mapping is a view of, see view
+        self._source = None
+        if anns is not None:
+            for ann in anns:
+                self[ann.id] = ann
+
+    def _pos(self, annid):
+        """
+        Returns the array position of the annotation with the given id or -1
+        """
+        ids = self._ids
+        pos = bisect_left(ids, annid)
+        if pos < len(ids) and ids[pos] == annid:
+            return pos
+        return -1
+
+    def _typecode(self, anntype):
+        code = self._typecodes.get(anntype)
+        if code is None:
+            code = len(self._typenames)
+            self._typenames.append(anntype)
+            self._typecodes[anntype] = code
+        return code
+
+    def _remember(self, ann):
+        """
+        Remember the annotation as the one currently in use for its id and share its feature dict.
+        """
+        annid = ann._id
+        self._features[annid] = ann.features.data
+        self._live[annid] = weakref.ref(ann, lambda ref: self._forget(annid, ref))
+
+    def _forget(self, annid, ref):
+        """
+        Called when an annotation is not used anywhere any more: if it does not have any
+        features, its empty feature dict is not kept.
+        """
+        if self._live.get(annid) is not ref:
+            return
+        del self._live[annid]
+        data = self._features.get(annid)
+        if data is not None and not data:
+            del self._features[annid]
+
+    def __getitem__(self, annid):
+        ref = self._live.get(annid)
+        if ref is not None:
+            ann = ref()
+            if ann is not None:
+                return ann
+        pos = self._pos(annid)
+        if pos < 0:
+            raise KeyError(annid)
+        if self._source is not None and annid in self._source:
+            # the annotation of the source, which keeps its owning set and feature dict
+            ann = self._source[annid]
+            self._remember(ann)
+            return ann
+        ann = Annotation(
+            self._starts[pos],
+            self._ends[pos],
+            self._typenames[self._types[pos]],
+            annid=annid,
+        )
+        data = self._features.get(annid)
+        if data is not None:
+            ann.features.data = data
+        ann._owner_set = self._owner_set
+        self._remember(ann)
+        return ann
+
+    def __setitem__(self, annid, ann):
+        if annid != ann._id:
+            raise Exception(
+                "Annotation id {} does not match id {} of the annotation".format(annid, ann._id)
+            )
+        code = self._typecode(ann._type)
+        pos = self._pos(annid)
+        if pos >= 0:
+            self._starts[pos] = ann._start
+            self._ends[pos] = ann._end
+            self._types[pos] = code
+        elif not self._ids or self._ids[-1] < annid:
+            self._ids.append(annid)
+            self._starts.append(ann._start)
+            self._ends.append(ann._end)
+            self._types.append(code)
+        else:
+            pos = bisect_left(self._ids, annid)
+            self._ids.insert(pos, annid)
+            self._starts.insert(pos, ann._start)
+            self._ends.insert(pos, ann._end)
+            self._types.insert(pos, code)
+        self._remember(ann)
+
+    def __delitem__(self, annid):
+        pos = self._pos(annid)
+        if pos < 0:
+            raise KeyError(annid)
+        del self._ids[pos]
+        del self._starts[pos]
+        del self._ends[pos]
+        del self._types[pos]
+        self._features.pop(annid, None)
+        self._live.pop(annid, None)
+
+    def __contains__(self, annid):
+        return self._pos(annid) >= 0
+
+    def __iter__(self):
+        return iter(self._ids.tolist())
+
+    def __len__(self):
+        return len(self._ids)
+
+    def clear(self):
+        """
+        Removes all annotations.
+        """
+        self.__init__(self._owner_set)
+
+    def copy(self):
+        """
+        Returns a copy of the mapping which shares the annotations currently in use and their features.
+        """
+        ret = ColumnarAnnotations(self._owner_set)
+        ret._ids = array("q", self._ids)
+        ret._starts = array("q", self._starts)
+        ret._ends = array("q", self._ends)
+        ret._types = array("l", self._types)
+        ret._typenames = list(self._typenames)
+        ret._typecodes = dict(self._typecodes)
+        ret._features = dict(self._features)
+        ret._source = self._source
+        for ref in list(self._live.values()):
+            ann = ref()
+            if ann is not None:
+                ret._remember(ann)
+        return ret
+
+    def view(self, owner_set, annids=None):
+        """
+        Returns a mapping for the given annotation ids or all annotations, which returns the same annotations as
+        this mapping, so changing the features of an annotation from the view changes the annotation of this
+        mapping. Adding or removing annotations does not affect the other mapping.
+
+        Args:
+            owner_set: the annotation set of the view, which owns the annotations added to the view
+            annids: an iterable of annotation ids, if None, all annotations
+
+        Returns:
+            the view
+        """
+        ret = ColumnarAnnotations(owner_set)
+        ret._source = self
+        ret._typenames = list(self._typenames)
+        ret._typecodes = dict(self._typecodes)
+        if annids is None:
+            ret._ids = array("q", self._ids)
+            ret._starts = array("q", self._starts)
+            ret._ends = array("q", self._ends)
+            ret._types = array("l", self._types)
+        else:
+            positions = []
+            for annid in set(annids):
+                pos = self._pos(annid)
+                if pos < 0:
+                    raise KeyError(annid)
+                positions.append(pos)
+            positions.sort()
+            ret._ids = array("q", map(self._ids.__getitem__, positions))
+            ret._starts = array("q", map(self._starts.__getitem__, positions))
+            ret._ends = array("q", map(self._ends.__getitem__, positions))
+            ret._types = array("l", map(self._types.__getitem__, positions))
+        for annid in ret._ids if annids is not None else self._features:
+            data = self._features.get(annid)
+            if data is not None:
+                ret._features[annid] = data
+        return ret
+
+    def intervals(self, annids=None):
+        """
+        Returns a list of (start, end, annid) tuples for all annotations or the given annotation ids,
+        without creating any annotations.
+        """
+        if annids is None:
+            return list(zip(self._starts, self._ends, self._ids))
+        ret = []
+        for annid in annids:
+            pos = self._pos(annid)
+            ret.append((self._starts[pos], self._ends[pos], annid))
+        return ret
+
+    def type_ids(self):
+        """
+        Returns an iterator of (type, annid) tuples for all annotations, without creating any annotations.
+        """
+        return zip(map(self._typenames.__getitem__, self._types), self._ids)
+
+    def feature_items(self):
+        """
+        Returns an iterator of (annid, featuredict) tuples for the annotations which may have features,
+        without creating any annotations.
+        """
+        return iter(list(self._features.items()))
+
+    def type_of(self, annid):
+        """
+        Returns the type of the annotation with the given id.
+        """
+        return self._typenames[self._types[self._pos(annid)]]
+
+    def map_offsets(self, method):
+        """
+        Replaces all start and end offsets with the offset returned by method, also for the
+        annotations currently in use.
+        """
+        self._starts = array("q", map(method, self._starts))
+        self._ends = array("q", map(method, self._ends))
+        for ref in list(self._live.values()):
+            ann = ref()
+            if ann is not None:
+                ann._start = method(ann._start)
+                ann._end = method(ann._end)
+
+    def __getstate__(self):
+        """
+        The weak references to the annotations in use cannot be pickled, their features are stored anyway.
+        """
+        state = self.__dict__.copy()
+        state["_live"] = {}
+        return state
+
+    def __repr__(self):
+        return "ColumnarAnnotations({})".format(list(self.intervals()))
@@ -0,0 +1,121 @@
+"""
+Module that provides the registry of index backends.
+
+An index backend determines the data structures an AnnotationSet uses for its indices: the class of the
+offset index, which must implement the methods of `gatenlp.impl.SortedIntvls`, and a factory for the
+type index, a mapping from annotation type to the set of ids of the annotations of that type.
+
+The backend can be chosen globally with `gatenlpconfig.index_backend`, for all annotation sets of a
+document with `Document.index_backend`, and for a single set with `AnnotationSet.index_backend`.
+
+The following backends are registered:
+
+* "sorted": `gatenlp.impl.SortedIntvls`, the default, cheap to update, a good choice for most workloads,
+  in particular for sets where annotations get added and removed between queries
+* "intervaltree": `gatenlp.impl.IntervalTree`, for sets which are mostly read, in particular with repeated
+  `covering` and `overlapping` queries on sets with many overlapping annotations. The tree gets rebuilt
+  in O(n) after annotations have been added or removed, so this is slow if adding and querying alternate.
+* "array": `gatenlp.impl.arrayintvls.ArrayIntvls` (requires numpy), fast to build and compact, for
+  sets which are mostly read after they have been created or loaded
+
+Additional backends can be added with `register_index_backend`.
+"""
+
+import importlib
+from collections import defaultdict
+from gatenlp.gatenlpconfig import gatenlpconfig
+
+
+def default_type_index():
+    """
+    Returns a new empty type index, a defaultdict which maps each annotation type to a set of annotation ids.
+    """
+    return defaultdict(set)
+
+
+class IndexBackend:
+    """ """
+
+    def __init__(self, name, offset_index_class, type_index_factory=None):
+        """
+        Creates an index backend.
+
+        Args:
+            name: the name of the backend
+            offset_index_class: the class of the offset index or its fully qualified name, in which case
+                the class only gets imported when it is first used
+            type_index_factory: a callable which returns a new empty type index, if None,
+                `default_type_index` is used.
+        """
+        self.name = name
+        self._offset_index_class = offset_index_class
+        self.type_index_factory = type_index_factory or default_type_index
+
+    @property
+    def offset_index_class(self):
+        """
+        Returns the class of the offset index.
+        """
+        if isinstance(self._offset_index_class, str):
+            modname, clname = self._offset_index_class.rsplit(".", 1)
+            self._offset_index_class = getattr(importlib.import_module(modname), clname)
+        return self._offset_index_class
+
+    def __repr__(self):
+        return "IndexBackend({},{})".format(self.name, self._offset_index_class)
+
+
+_INDEX_BACKENDS = {}
+
+
+def register_index_backend(name, offset_index_class, type_index_factory=None):
+    """
+    Registers an index backend under the given name, replacing any backend already registered under that name.
+
+    Args:
+        name: the name of the backend
+        offset_index_class: the class of the offset index or its fully qualified name
+        type_index_factory: a callable which returns a new empty type index, if None, `default_type_index`
+            is used.
+
+    Returns:
+        the registered backend
+    """
+    backend = IndexBackend(name, offset_index_class, type_index_factory=type_index_factory)
+    _INDEX_BACKENDS[name] = backend
+    return backend
+
+
+def index_backend_names():
+    """
+    Returns the names of all registered index backends.
+    """
+    return list(_INDEX_BACKENDS.keys())
+
+
+def get_index_backend(name=None):
+    """
+    Returns the index backend with the given name.
+
+    Args:
+        name: the name of a registered backend, or a backend, which is returned unchanged. If None, the backend
+            configured with `gatenlpconfig.index_backend` is returned.
+
+    Returns:
+        the backend
+    """
+    if isinstance(name, IndexBackend):
+        return name
+    if name is None:
+        name = gatenlpconfig.index_backend
+    backend = _INDEX_BACKENDS.get(name)
+    if backend is None:
+        raise Exception(
+            "Unknown index backend {}, must be one of {}".format(name, index_backend_names())
+        )
+    return backend
+
+
+register_index_backend("sorted", "gatenlp.impl.sortedintvls.SortedIntvls")
+register_index_backend("intervaltree", "gatenlp.impl.intervaltree.IntervalTree")
+register_index_backend("array", "gatenlp.impl.arrayintvls.ArrayIntvls")
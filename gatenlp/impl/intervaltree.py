@@ -0,0 +1,195 @@
+"""
+Module that provides the IntervalTree class, a SortedIntvls which is augmented with a max-end
+segment tree in order to answer covering and overlapping queries in O(log n + k log n) time
+instead of scanning all intervals which start before the query range.
+
+The segment tree is built over the intervals in start offset order and stores, for each node, the
+maximum end offset of all intervals below it. A query only descends into nodes which can contain
+matching intervals, i.e. nodes with a big enough maximum end offset.
+
+For counting, a second tree gets created when a count is first needed, which stores for each node the
+sorted end offsets of all intervals below it (a merge sort tree, O(n log n) memory). The intervals which start
+at or before an offset are covered by O(log n) nodes and the number of those which end at or after an offset
+is found with a binary search in each node, so `count_covering` and `count_within` are O(log^2 n).
+
+The trees are created lazily and discarded whenever an interval gets added or removed. In order
+to avoid rebuilding the tree over and over when adding and querying alternate, the first query
+after a modification is answered by scanning (like SortedIntvls does) and the trees only
+get built if a second query happens before the next modification.
+"""
+
+from bisect import bisect_left, bisect_right
+from gatenlp.impl.sortedintvls import SortedIntvls
+
+
+class IntervalTree(SortedIntvls):
+    """ """
+
+    def __init__(self):
+        super().__init__()
+        self._invalidate()
+
+    def _invalidate(self):
+        # the interval tuples in start offset order
+        self._intvls = None
+        # the start offsets in start offset order
+        self._starts = None
+        # the max end segment tree, node 1 is the root, leaves start at self._size
+        self._maxends = None
+        self._size = 0
+        # the merge sort tree of end offsets used for counting, same node numbering as self._maxends
+        self._sortedends = None
+        self._stale_queries = 0
+
+    def _build(self, force=False):
+        """
+        Builds the segment tree, if necessary and worthwhile or if force is True. Returns True if the tree can
+        be used, False if the query should be answered by scanning.
+        """
+        if self._maxends is not None:
+            return True
+        self._stale_queries += 1
+        if self._stale_queries < 2 and not force:
+            return False
+        intvls = list(self._by_start)
+        size = 1
+        while size < len(intvls):
+            size *= 2
+        maxends = [-1] * (2 * size)
+        for i, intvl in enumerate(intvls):
+            maxends[size + i] = intvl[1]
+        for node in range(size - 1, 0, -1):
+            left = maxends[2 * node]
+            right = maxends[2 * node + 1]
+            maxends[node] = left if left > right else right
+        self._intvls = intvls
+        self._starts = [intvl[0] for intvl in intvls]
+        self._maxends = maxends
+        self._size = size
+        return True
+
+    def _build_counts(self):
+        """
+        Builds the merge sort tree of end offsets, the segment tree must already exist.
+        """
+        if self._sortedends is not None:
+            return
+        size = self._size
+        sortedends = [[] for _ in range(2 * size)]
+        for i, intvl in enumerate(self._intvls):
+            sortedends[size + i] = [intvl[1]]
+        for node in range(size - 1, 0, -1):
+            # sorting two concatenated sorted runs is a linear merge
+            sortedends[node] = sorted(sortedends[2 * node] + sortedends[2 * node + 1])
+        self._sortedends = sortedends
+
+    def _count(self, hi, minend):
+        """
+        Returns the number of intervals before position hi which have an end offset of at least minend.
+        """
+        self._build_counts()
+        sortedends = self._sortedends
+        n = 0
+        lo = self._size
+        hi += self._size
+        while lo < hi:
+            if lo & 1:
+                n += len(sortedends[lo]) - bisect_left(sortedends[lo], minend)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                n += len(sortedends[hi]) - bisect_left(sortedends[hi], minend)
+            lo >>= 1
+            hi >>= 1
+        return n
+
+    def _positions(self, hi, minend):
+        """
+        Returns the positions, in increasing order, of all intervals before position hi
+        which have an end offset of at least minend.
+        """
+        maxends = self._maxends
+        size = self._size
+        ret = []
+        if hi <= 0 or maxends[1] < minend:
+            return ret
+        stack = [(1, 0, size)]
+        while stack:
+            node, lo, width = stack.pop()
+            if lo >= hi or maxends[node] < minend:
+                continue
+            if node >= size:
+                ret.append(lo)
+                continue
+            half = width >> 1
+            stack.append((2 * node + 1, lo + half, half))
+            stack.append((2 * node, lo, half))
+        return ret
+
+    def add(self, start, end, data):
+        """
+        Adds an interval.
+        """
+        super().add(start, end, data)
+        self._invalidate()
+
+    def update(self, tupleiterable):
+        """
+        Updates from an iterable of intervals.
+        """
+        super().update(tupleiterable)
+        self._invalidate()
+
+    def remove(self, start, end, data):
+        """
+        Removes an interval, exception if the interval does not exist.
+        """
+        super().remove(start, end, data)
+        self._invalidate()
+
+    def discard(self, start, end, data):
+        """
+        Removes and interval, do nothing if the interval does not exist.
+        """
+        super().discard(start, end, data)
+        self._invalidate()
+
+    def prepare(self):
+        """
+        Creates all data structures which would otherwise get created lazily by a query, including
+        the segment tree and the tree used for counting.
+        """
+        super().prepare()
+        self._build(force=True)
+        self._build_counts()
+
+    def covering(self, start, end):
+        """
+        Returns intervals that contain the given range.
+        """
+        if not self._build():
+            return super().covering(start, end)
+        hi = bisect_right(self._starts, start)
+        intvls = self._intvls
+        return (intvls[p] for p in self._positions(hi, end))
+
+    def overlapping(self, start, end):
+        """
+        Returns intervals that overlap with the given range.
+        """
+        if not self._build():
+            return super().overlapping(start, end)
+        hi = bisect_left(self._starts, end)
+        intvls = self._intvls
+        return (intvls[p] for p in self._positions(hi, start + 1))
+
+    def count_covering(self, start, end):
+        """
+        Returns the number of intervals that contain the given range, in O(log^2 n).
+        """
+        if not self._build():
+            return super().count_covering(start, end)
+        return self._count(bisect_right(self._starts, start), end)
+
+    def __repr__(self):
+        return "IntervalTree({},{})".format(self._by_start, self._by_end)
@@ -0,0 +1,75 @@
+"""
+Module that provides the QueryCache class, a bounded least-recently-used cache for the results of
+annotation set queries, which records how often a result was found (hits) or not (misses).
+
+The cache is thread-safe, so it can be used by frozen annotation sets which get queried from several
+threads concurrently.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+
+
+class QueryCache:
+    """ """
+
+    def __init__(self, maxsize=1024):
+        """
+        Creates the cache.
+
+        Args:
+            maxsize: the maximum number of results to keep, when more results get added, the least
+                recently used ones are removed.
+        """
+        if maxsize < 1:
+            raise Exception("The maximum size of the cache must be at least 1, not {}".format(maxsize))
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the result stored for the key, or default if there is none, and records a hit or miss.
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Stores the result for the key, removing the least recently used result if the cache is full.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all results, the statistics are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns a dictionary with the number of hits and misses, the number of results stored
+        and the maximum size of the cache.
+        """
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, size=len(self._entries), maxsize=self.maxsize)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return "QueryCache({})".format(self.stats())
@@ -0,0 +1,165 @@
+"""
+Module that provides the SnapshotAnnotations class, a dict-like mapping from annotation id to annotation
+which implements copy-on-write copies of annotation sets.
+
+A snapshot shares the annotations of the mapping it was created from (the base) instead of copying them.
+The first time an annotation is accessed through the snapshot, a shallow copy of the annotation is created
+which belongs to the set of the snapshot, so like for `Annotation.copy`, the feature values are shared.
+Deep copies cannot be created lazily, because feature values can be changed in place without the
+annotation set noticing. Annotations which get added to or removed from the set of
+the snapshot are recorded by the snapshot and do not affect the base.
+
+The annotation set which owns the base must not change the base once a snapshot has been created
+from it (it uses a copy of the base instead) and must call `preserve` before an annotation of the
+base gets modified in place, so that the snapshot can copy the annotation before the change.
+"""
+
+from collections.abc import MutableMapping
+
+
+class SnapshotAnnotations(MutableMapping):
+    """ """
+
+    def __init__(self, owner_set, base):
+        """
+        Creates the snapshot.
+
+        Args:
+            owner_set: the annotation set the snapshot belongs to
+            base: the mapping from annotation id to annotation to share
+        """
+        self._owner_set = owner_set
+        self._base = base
+        # copies of the annotations from the base and replacements for annotations from the base
+        self._local = {}
+        # ids of annotations which are in the base but have been removed from the snapshot
+        self._removed = set()
+        # annotations which have been added and which are not in the base
+        self._added = {}
+        # the annotation sets which call preserve for this snapshot
+        self._sources = []
+
+    def _clone(self, ann):
+        newann = ann.copy()
+        newann._owner_set = self._owner_set
+        return newann
+
+    def _raw(self, annid):
+        """
+        Returns the annotation for the id without copying it from the base.
+        """
+        ann = self._added.get(annid)
+        if ann is None:
+            ann = self._local.get(annid)
+        if ann is None:
+            if annid in self._removed:
+                raise KeyError(annid)
+            if isinstance(self._base, SnapshotAnnotations):
+                ann = self._base._raw(annid)
+            else:
+                ann = self._base[annid]
+        return ann
+
+    def preserve(self, annid, ann):
+        """
+        Called before the annotation ann with the given id from the base gets modified: if the snapshot
+        still shares the annotation, it gets copied now.
+        """
+        if annid in self._local or annid in self._added or annid in self._removed:
+            return
+        try:
+            shared = self._raw(annid)
+        except KeyError:
+            return
+        if shared is ann:
+            self._local[annid] = self._clone(ann)
+
+    def preserve_all(self):
+        """
+        Copies all annotations which are still shared with the base.
+        """
+        for annid in self:
+            self[annid]
+
+    def __getitem__(self, annid):
+        ann = self._added.get(annid)
+        if ann is not None:
+            return ann
+        ann = self._local.get(annid)
+        if ann is not None:
+            return ann
+        if annid in self._removed:
+            raise KeyError(annid)
+        ann = self._clone(self._base[annid])
+        self._local[annid] = ann
+        return ann
+
+    def __setitem__(self, annid, ann):
+        if annid in self._base:
+            self._local[annid] = ann
+            self._removed.discard(annid)
+        else:
+            self._added[annid] = ann
+
+    def __delitem__(self, annid):
+        if annid in self._added:
+            del self._added[annid]
+        elif annid in self._base and annid not in self._removed:
+            self._removed.add(annid)
+            self._local.pop(annid, None)
+        else:
+            raise KeyError(annid)
+
+    def __contains__(self, annid):
+        return annid in self._added or (annid not in self._removed and annid in self._base)
+
+    def __iter__(self):
+        removed = self._removed
+        for annid in self._base:
+            if annid not in removed:
+                yield annid
+        yield from self._added
+
+    def __len__(self):
+        return len(self._base) - len(self._removed) + len(self._added)
+
+    def copy(self):
+        """
+        Returns a shallow copy of the snapshot which shares the base and the annotations with this snapshot.
+        """
+        ret = SnapshotAnnotations(self._owner_set, self._base)
+        ret._local = dict(self._local)
+        ret._removed = set(self._removed)
+        ret._added = dict(self._added)
+        return ret
+
+    def intervals(self, annids=None):
+        """
+        Returns a list of (start, end, annid) tuples for all annotations or the given annotation ids,
+        without copying any annotations.
+        """
+        if annids is None:
+            annids = self
+        ret = []
+        for annid in annids:
+            ann = self._raw(annid)
+            ret.append((ann._start, ann._end, annid))
+        return ret
+
+    def type_ids(self):
+        """
+        Returns an iterator of (type, annid) tuples for all annotations, without copying any annotations.
+        """
+        return ((self._raw(annid)._type, annid) for annid in self)
+
+    def feature_items(self):
+        """
+        Yields (annid, featuredict) tuples for annotations which have features, without copying any annotations.
+        """
+        for annid in self:
+            ann = self._raw(annid)
+            if ann._features:
+                yield annid, ann._features.data
+
+    def __repr__(self):
+        return "SnapshotAnnotations({})".format(self.intervals())
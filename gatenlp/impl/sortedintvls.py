@@ -14,6 +14,7 @@ end offset of the annotation only.
 """
 
 import sys
+from operator import itemgetter
 from sortedcontainers import SortedKeyList
 
 
@@ -22,9 +23,9 @@ class SortedIntvls:
 
     def __init__(self):
         # we sort by increasing start offset then increasing annotation id for this
-        self._by_start = SortedKeyList(key=lambda x: (x[0], x[2]))
+        self._by_start = SortedKeyList(key=itemgetter(0, 2))
         # for this we sort by end offset only
-        self._by_end = SortedKeyList(key=lambda x: x[1])
+        self._by_end = SortedKeyList(key=itemgetter(1))
 
     def add(self, start, end, data):
         """
@@ -35,8 +36,11 @@ class SortedIntvls:
 
     def update(self, tupleiterable):
         """
-        Updates from an iterable of intervals.
+        Updates from an iterable of intervals. If the index is empty, all intervals get
+        sorted in one pass, which is much faster than adding them one by one.
         """
+        if not isinstance(tupleiterable, list):
+            tupleiterable = list(tupleiterable)
         self._by_start.update(tupleiterable)
         self._by_end.update(tupleiterable)
 
@@ -60,6 +64,18 @@ class SortedIntvls:
         """
         return len(self._by_start)
 
+    def prepare(self):
+        """
+        Creates all data structures which would otherwise get created lazily by a query, so that
+        queries do not modify the index until the next interval gets added or removed.
+        """
+        # the sorted lists create a positional index the first time a position is needed, e.g.
+        # for counting: looking up the position of the last element does this if there is more than
+        # one sublist
+        for sortedlist in (self._by_start, self._by_end):
+            if len(sortedlist) > 0:
+                sortedlist.bisect_key_left(sortedlist.key(sortedlist[-1]))
+
     def starting_at(self, offset):
         """
         Returns an iterable of (start, end, data) tuples where start==offset
@@ -107,11 +123,12 @@ class SortedIntvls:
         """
         return self._by_start.irange_key(max_key=(offset - 1, sys.maxsize))
 
-    def ending_to(self, offset):
+    def ending_to(self, offset, reverse=False):
         """
-        Returns intervals that end before or at the given end offset.
+        Returns intervals that end before or at the given end offset, if reverse is True, in order of
+        decreasing end offset.
         """
-        return self._by_end.irange_key(max_key=offset)
+        return self._by_end.irange_key(max_key=offset, reverse=reverse)
 
     def ending_after(self, offset):
         """
@@ -141,9 +158,49 @@ class SortedIntvls:
         # end of the range. This still includes those which also end before the start of the range
         # so we check in addition that the end is larger than the start of the range.
         for intvl in self._by_start.irange_key(max_key=(end - 1, sys.maxsize)):
-            if intvl[1] > start + 1:
+            if intvl[1] > start:
                 yield intvl
 
+    def count_overlapping(self, start, end):
+        """
+        Returns the number of intervals that overlap with the given range, using binary searches only.
+        """
+        # All intervals overlap, except those which end at or before the start and those which start
+        # at or after the end of the range. Only zero-length intervals at a zero-length range
+        # are counted in both groups.
+        nbefore = self._by_end.bisect_key_right(start)
+        nafter = len(self._by_start) - self._by_start.bisect_key_left((end,))
+        n = len(self._by_start) - nbefore - nafter
+        if start >= end:
+            n += sum(1 for _ in self.at(start, end))
+        return n
+
+    def count_covering(self, start, end):
+        """
+        Returns the number of intervals that contain the given range.
+
+        NOTE: this cannot be answered with binary searches on the two sorted lists, so all intervals
+        which start at or before the start of the range get checked: the count is O(n) in the worst case.
+        """
+        return sum(1 for _ in self.covering(start, end))
+
+    def count_within(self, start, end):
+        """
+        Returns the number of intervals which are fully contained within start...end.
+
+        NOTE: this uses binary searches and `count_covering` for the intervals which strictly cover the range,
+        so it is as fast as `count_covering`: O(n) in the worst case for this class, O(log^2 n) for
+        `gatenlp.impl.IntervalTree`, which overrides `count_covering`.
+        """
+        # All intervals, except those which start before the range or end after the range.
+        # Those which do both are the intervals which strictly cover the range, which
+        # are usually few.
+        nbefore = self._by_start.bisect_key_left((start,))
+        nafter = len(self._by_end) - self._by_end.bisect_key_right(end)
+        return (
+            len(self._by_start) - nbefore - nafter + self.count_covering(start - 1, end + 1)
+        )
+
     def firsts(self):
         """
         Yields all intervals which start at the smallest known offset.
@@ -0,0 +1,178 @@
+"""
+Module that provides the SpanArrays class which holds the start offsets, end offsets, type codes and ids of
+a collection of annotations as numpy arrays, in document order, and provides vectorized versions of the
+span predicates, e.g. for building feature matrices without a Python call per annotation or pair of annotations.
+
+All predicates take either a single span or many spans. A single span can be given as a start and
+end offset or as anything that has a start and end offset, e.g. an annotation or span. The result is then a
+boolean mask (or int array for `gap`) with one element per annotation. Many spans can be given as an
+AnnotationSet, another SpanArrays instance, or a pair of arrays of start and end offsets. The result is then
+a matrix with one row per annotation and one column per span.
+
+The predicates use the same semantics as the corresponding queries of AnnotationSet, e.g. `isoverlapping`
+is True for annotations for which `AnnotationSet.overlapping` would return the annotation.
+
+NOTE: this requires the numpy package.
+"""
+
+import numpy as np
+
+
+class SpanArrays:
+    """ """
+
+    DTYPE = np.int64
+
+    def __init__(self, starts, ends, types, ids, typenames):
+        """
+        Creates the span arrays. This should normally not be used directly, instead use
+        `AnnotationSet.to_arrays()`.
+
+        Args:
+            starts: array of start offsets
+            ends: array of end offsets
+            types: array of type codes, indices into typenames
+            ids: array of annotation ids
+            typenames: list of annotation type names
+        """
+        self.starts = starts
+        self.ends = ends
+        self.types = types
+        self.ids = ids
+        self.typenames = typenames
+
+    @staticmethod
+    def from_tuples(tuples):
+        """
+        Creates the span arrays from an iterable of (start, end, annid, type) tuples, sorted by start
+        offset and annotation id.
+        """
+        tuples = list(tuples)
+        typenames = sorted(set(t[3] for t in tuples))
+        codes = {name: code for code, name in enumerate(typenames)}
+        offsets = np.array(
+            [(t[0], t[1], t[2]) for t in tuples], dtype=SpanArrays.DTYPE
+        ).reshape(-1, 3)
+        types = np.array([codes[t[3]] for t in tuples], dtype=np.int32)
+        order = np.lexsort((offsets[:, 2], offsets[:, 0]))
+        return SpanArrays(
+            offsets[order, 0], offsets[order, 1], types[order], offsets[order, 2], typenames
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def type_mask(self, *anntype):
+        """
+        Returns a boolean mask of the annotations which have one of the given types.
+
+        Args:
+            anntype: one or more types or type lists
+        """
+        codes = []
+        for atype in anntype:
+            for t in [atype] if isinstance(atype, str) else atype:
+                if t in self.typenames:
+                    codes.append(self.typenames.index(t))
+        return np.isin(self.types, codes)
+
+    @staticmethod
+    def indices(mask):
+        """
+        Returns the positions of the True elements of a boolean mask, or for a matrix, a tuple of arrays of
+        row and column positions.
+        """
+        if mask.ndim == 1:
+            return np.flatnonzero(mask)
+        return np.nonzero(mask)
+
+    def _spans(self, start, end):
+        """
+        Returns the offsets to compare against: scalars for a single span, otherwise arrays shaped
+        so that comparing with the offsets of the annotations gives one column per span.
+        """
+        if end is not None:
+            if np.ndim(start) == 0:
+                return start, end
+            return np.asarray(start)[np.newaxis, :], np.asarray(end)[np.newaxis, :]
+        if isinstance(start, SpanArrays):
+            return start.starts[np.newaxis, :], start.ends[np.newaxis, :]
+        if hasattr(start, "to_arrays"):
+            arrays = start.to_arrays()
+            return arrays.starts[np.newaxis, :], arrays.ends[np.newaxis, :]
+        if hasattr(start, "start") and hasattr(start, "end"):
+            return start.start, start.end
+        if isinstance(start, (tuple, list)) and len(start) == 2:
+            return self._spans(start[0], start[1])
+        raise Exception("Not a span, annotation, annotation set or pair: {}".format(start))
+
+    def _col(self, arr, spans):
+        if np.ndim(spans[0]) == 0:
+            return arr
+        return arr[:, np.newaxis]
+
+    def isoverlapping(self, start, end=None):
+        """
+        Returns a mask of the annotations which overlap with the span(s).
+        """
+        spans = self._spans(start, end)
+        return (self._col(self.starts, spans) < spans[1]) & (self._col(self.ends, spans) > spans[0])
+
+    def iswithin(self, start, end=None):
+        """
+        Returns a mask of the annotations which are within the span(s). As with `AnnotationSet.within`,
+        nothing is within an empty span.
+        """
+        spans = self._spans(start, end)
+        return (
+            (self._col(self.starts, spans) >= spans[0])
+            & (self._col(self.ends, spans) <= spans[1])
+            & (spans[1] > spans[0])
+        )
+
+    def iscovering(self, start, end=None):
+        """
+        Returns a mask of the annotations which cover the span(s).
+        """
+        spans = self._spans(start, end)
+        return (self._col(self.starts, spans) <= spans[0]) & (self._col(self.ends, spans) >= spans[1])
+
+    def iscoextensive(self, start, end=None):
+        """
+        Returns a mask of the annotations which have exactly the offsets of the span(s).
+        """
+        spans = self._spans(start, end)
+        return (self._col(self.starts, spans) == spans[0]) & (self._col(self.ends, spans) == spans[1])
+
+    def isbefore(self, start, end=None, immediately=False):
+        """
+        Returns a mask of the annotations which end before the span(s) start, or, if immediately is True,
+        which end exactly where the span(s) start.
+        """
+        spans = self._spans(start, end)
+        if immediately:
+            return self._col(self.ends, spans) == spans[0]
+        return self._col(self.ends, spans) <= spans[0]
+
+    def isafter(self, start, end=None, immediately=False):
+        """
+        Returns a mask of the annotations which start after the span(s) end, or, if immediately is True,
+        which start exactly where the span(s) end.
+        """
+        spans = self._spans(start, end)
+        if immediately:
+            return self._col(self.starts, spans) == spans[1]
+        return self._col(self.starts, spans) >= spans[1]
+
+    def gap(self, start, end=None):
+        """
+        Returns the gap between each annotation and the span(s), as for `Annotation.gap`: the distance
+        between the end of the one that starts first and the start of the other one, negative if they overlap.
+        """
+        spans = self._spans(start, end)
+        starts = self._col(self.starts, spans)
+        ends = self._col(self.ends, spans)
+        return np.where(starts < spans[0], spans[0] - ends, starts - spans[1])
+
+    def __repr__(self):
+        return "SpanArrays(n={},types={})".format(len(self), self.typenames)
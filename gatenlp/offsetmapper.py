@@ -4,95 +4,116 @@ Java strings are represented as UTF16 while Python strings are represented as Un
 differ if a Unicode character needs more than one UTF16 code unit.
 """
 
+import re
 import numbers
+from bisect import bisect_left
 
 OFFSET_TYPE_JAVA = "j"
 OFFSET_TYPE_PYTHON = "p"
 
+# characters outside the basic multilingual plane need two UTF16 code units (a surrogate pair)
+_ASTRAL_RE = re.compile("[\U00010000-\U0010FFFF]")
+
 
 class OffsetMapper:
     def __init__(self, text: str):
         """
-        Calculate the tables for mapping unicode code points to utf16 code units.
+        Find the characters of the text which need two UTF16 code units in Java.
 
-        NOTE: currently this optimizes for conversion speed at the cost of memory, with one special case:
-        if after creating the java2python table we find that all offsets are identical, we discard
-        the tables and just set a flag for that.
+        Only the sorted offsets of these characters are stored and offsets get converted by counting
+        how many of them come before the offset, using binary search. If the text does not contain
+        any such character, which is detected without looking at each character in Python, offsets are
+        identical and no conversion is needed at all.
 
         Args:
-            text: the text as a python string
+            text: the text as a python string or a document
         """
-        # for now, remove dependency on numpy and use simple python lists of integers
-        # import numpy as np
-        cur_java_off = 0
-        python2java_list = [0]
-        java2python_list = []
-        last = len(text) - 1
-        for i, c in enumerate(text):
-            # get the java size of the current character
-            width = int(len(c.encode("utf-16be")) / 2)
-            assert width == 1 or width == 2
-            # the next java offset we get by incrementing the java offset by the with of the current char
-            cur_java_off += width
-            if i != last:
-                python2java_list.append(cur_java_off)
-            # i is the current python offset, so we append as many times to java2python_list as we have width
-            java2python_list.append(i)
-            if width == 2:
-                java2python_list.append(i)
-        if len(java2python_list) == len(text):
-            self.python2java = None
-            self.java2python = None
+        if not isinstance(text, str):
+            text = text.text
+        self._length = len(text)
+        if len(text.encode("utf-16-le")) // 2 == len(text):
+            self._astral_python = None
+            self._astral_java = None
             self.bijective = len(text)
         else:
-            python2java_list.append(python2java_list[-1] + 1)
-            # self.python2java = np.array(python2java_list, np.int32)
-            self.python2java = python2java_list
-            # self.java2python = np.array(java2python_list, np.int32)
-            java2python_list.append(java2python_list[-1] + 1)
-            self.java2python = java2python_list
+            # the python offsets of all astral characters and the java offsets where they start
+            self._astral_python = [m.start() for m in _ASTRAL_RE.finditer(text)]
+            self._astral_java = [off + i for i, off in enumerate(self._astral_python)]
             self.bijective = None  # if we have identical offsets, this is set to the length of the text instead
+        self._python2java = None
+        self._java2python = None
+
+    @property
+    def python2java(self):
+        """
+        Returns the table which maps each python offset (including the offset after the last character) to the
+        java offset, or None if the offsets are identical. The table is created when it is first accessed,
+        conversion does not need it.
+        """
+        if self._python2java is None and self.bijective is None:
+            self._python2java = self.convert_to_java(range(self._length + 1))
+        return self._python2java
 
-    def _convert_from(self, offsets, from_table=None):
+    @property
+    def java2python(self):
         """
+        Returns the table which maps each java offset (including the offset after the last character) to the
+        python offset, or None if the offsets are identical. The table is created when it is first accessed,
+        conversion does not need it.
+        """
+        if self._java2python is None and self.bijective is None:
+            self._java2python = self.convert_to_python(
+                range(self._length + len(self._astral_python) + 1)
+            )
+        return self._java2python
+
+    @staticmethod
+    def _convert(offsets, positions, sign):
+        """
+        Converts the offsets by adding (sign=1) or subtracting (sign=-1) the number of positions which
+        come before each offset.
 
         Args:
-          offsets:
-          from_table:  (Default value = None)
+          offsets: a single offset, an iterable of offsets or a numpy array of offsets
+          positions: the sorted positions, or None if offsets do not need to get converted
 
         Returns:
-
+          the converted offset, a list of converted offsets or a numpy array of converted offsets
         """
-        if from_table is None:
+        if positions is None:
             return offsets
         if isinstance(offsets, numbers.Integral):
-            return int(from_table[offsets])
-        ret = []
-        for offset in offsets:
-            ret.append(int(from_table[offset]))
-        return ret
+            return int(offsets) + sign * bisect_left(positions, offsets)
+        if hasattr(offsets, "dtype"):
+            # a numpy array: convert all offsets at once
+            import numpy as np
+
+            return offsets + sign * np.searchsorted(positions, offsets, side="left")
+        return [int(offset) + sign * bisect_left(positions, offset) for offset in offsets]
 
     def convert_to_python(self, offsets):
         """
-        Convert one java offset or an iterable of java offsets to python offset/s
+        Convert one java offset or an iterable of java offsets to python offset/s. If a numpy array of offsets is
+        given, all offsets are converted at once and a numpy array is returned.
 
         Args:
-          offsets: a single offset or an iterable of offsets
+          offsets: a single offset, an iterable of offsets or a numpy array of offsets
 
         Returns:
             the converted offset or offsets
 
         """
-        return self._convert_from(offsets, from_table=self.java2python)
+        return OffsetMapper._convert(offsets, self._astral_java, -1)
 
     def convert_to_java(self, offsets):
-        """Convert one python offset or an iterable of python offsets to java offset/s
+        """Convert one python offset or an iterable of python offsets to java offset/s. If a numpy array of
+        offsets is given, all offsets are converted at once and a numpy array is returned.
 
         Args:
-          offsets: a single offset or an iterable of offsets
+          offsets: a single offset, an iterable of offsets or a numpy array of offsets
 
         Returns:
             the converted offset or offsets
 
         """
-        return self._convert_from(offsets, from_table=self.python2java)
+        return OffsetMapper._convert(offsets, self._astral_python, 1)
@@ -54,6 +54,8 @@ class Location:
     equal to the length of the annotation list represents the EndOfAnns condition.
     """
 
+    __slots__ = ["text_location", "ann_location"]
+
     def __init__(self, text_location=0, ann_location=0):
         """
         Create a parser location.
@@ -85,6 +87,9 @@ class Result:
     Represents an individual parser result. A successful parse can have any number of parser results which
     are alternate ways of how the parser can match the document.
     """
+
+    __slots__ = ["data", "location", "span"]
+
     def __init__(self, data=None, location=None, span=None):
         """
         Create a parser result.
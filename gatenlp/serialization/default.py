@@ -14,13 +14,14 @@ yaml_loader = yaml.Loader
 yaml_dumper = yaml.Dumper
 from random import choice
 from string import ascii_uppercase
-from msgpack import pack, Unpacker
+from array import array
+from msgpack import Packer, Unpacker, OutOfData
 from gatenlp.document import Document
 from gatenlp.annotation_set import AnnotationSet
 from gatenlp.annotation import Annotation
 from gatenlp.changelog import ChangeLog
 from gatenlp.features import Features
-from gatenlp.utils import get_nested
+from gatenlp.utils import get_nested, intern_name
 from gzip import open as gopen, compress, decompress
 from pathlib import Path
 from urllib.parse import ParseResult
@@ -39,47 +40,10 @@ except:
     pass
 
 
-# import orjson as usejson
-# import json as usejson
-# import rapidjson as usejson
-# import ujson as usejson
-# import hyperjson as usejson
-import json
+from gatenlp.serialization.jsoncodecs import get_json_codec
 JSON_WRITE = "wt"
 JSON_READ = "rt"
 
-# # for replacing json by orjson
-# class json:
-#     @staticmethod
-#     def load(fp):
-#         data = fp.read()
-#         return usejson.loads(data)
-#     @staticmethod
-#     def loads(data):
-#         return usejson.loads(data)
-#     @staticmethod
-#     def dump(obj, fp):
-#         buf = usejson.dumps(obj)
-#         fp.write(buf)
-#     @staticmethod
-#     def dumps(obj):
-#         return usejson.dumps(obj)
-
-# # for replacing json with one of the other implementations
-# class json:
-#     @staticmethod
-#     def load(fp):
-#         return usejson.load(fp)
-#     @staticmethod
-#     def loads(data):
-#         return usejson.loads(data)
-#     @staticmethod
-#     def dump(obj, fp):
-#         buf = usejson.dump(obj, fp)
-#     @staticmethod
-#     def dumps(obj):
-#         return usejson.dumps(obj)
-
 
 # TODO: for ALL save options, allow to filter the annotations that get saved!
 # TODO: then use this show only limited set of annotations in the viewer
@@ -203,6 +167,7 @@ class JsonSerializer:
         offset_type=None,
         offset_mapper=None,
         gzip=False,
+        json_codec=None,
         **kwargs,
     ):
         """
@@ -215,32 +180,86 @@ class JsonSerializer:
           offset_type: the offset type to use for saving, if None (default) use "p" (Python)
           offset_mapper: the offset mapper to use, only needed if the type needs to get converted
           gzip: if True, the JSON gets gzip compressed
+          json_codec: the name of the JSON codec to use, if None, the configured codec, see
+              `gatenlp.serialization.jsoncodecs`
           **kwargs:
         """
-        d = inst.to_dict(offset_type=offset_type, offset_mapper=offset_mapper, **kwargs)
+        codec = get_json_codec(json_codec)
+        if type(inst).to_dict is Document.to_dict:
+            # documents get written set by set and annotation by annotation
+            def write(outfp):
+                JsonSerializer.document2stream(
+                    inst, outfp, offset_type=offset_type, offset_mapper=offset_mapper, json_codec=codec, **kwargs
+                )
+        else:
+            d = inst.to_dict(offset_type=offset_type, offset_mapper=offset_mapper, **kwargs)
+
+            def write(outfp):
+                codec.dump(d, outfp)
         if to_mem:
+            buf = io.StringIO()
+            write(buf)
             if gzip:
-                compress(json.dumps(d).encode("UTF-8"))
+                return compress(buf.getvalue().encode("UTF-8"))
             else:
-                return json.dumps(d)
+                return buf.getvalue()
         else:
             if gzip:
-                with gopen(to_ext, JSON_WRITE) as outfp:
-                    json.dump(d, outfp)
+                with gopen(to_ext, JSON_WRITE, encoding="utf-8") as outfp:
+                    write(outfp)
             else:
-                with open(to_ext, JSON_WRITE) as outfp:
-                    json.dump(d, outfp)
+                with open(to_ext, JSON_WRITE, encoding="utf-8") as outfp:
+                    write(outfp)
+
+    @staticmethod
+    def document2stream(
+        doc: Document, stream, offset_type=None, annsets=None, index=False, json_codec=None, **kwargs
+    ):
+        """
+        Writes the JSON representation of the document to the text stream without creating the dict
+        representation of the whole document first: only the dict representation of one annotation
+        at a time gets created. The output is identical to what `codec.dump(doc.to_dict(...), stream)` writes.
+
+        Args:
+          doc: the document
+          stream: the text stream to write to
+          offset_type: the offset type to use for saving, see `Document.to_dict`
+          annsets: the annotation set/type specifications, see `Document.to_dict`
+          index: if True, include the index section of each annotation set, see `AnnotationSet.to_dict`
+          json_codec: the JSON codec or the name of the codec to use, if None, the configured codec
+          **kwargs: passed on to the dict creation of the annotations
+        """
+        codec = get_json_codec(json_codec)
+        dumps = codec.dumps
+        # the separators between items and between keys and values
+        isep, ksep = codec.separators
+        offset_type, specs = doc._annset_specs(offset_type, annsets, kwargs)
+        stream.write(f'{{"annotation_sets"{ksep}{{')
+        for i, (name, annset, anntypes) in enumerate(specs):
+            if i > 0:
+                stream.write(isep)
+            stream.write(f'{dumps(name)}{ksep}{{"name"{ksep}{dumps(annset.name)}{isep}"annotations"{ksep}[')
+            for j, anndict in enumerate(annset._ann_dicts(anntypes, **kwargs)):
+                if j > 0:
+                    stream.write(isep)
+                stream.write(dumps(anndict))
+            stream.write(f']{isep}"next_annid"{ksep}{dumps(annset._next_annid)}')
+            if index:
+                stream.write(f'{isep}"index"{ksep}{dumps(annset._index_repr(anntypes))}')
+            stream.write("}")
+        stream.write(f'}}{isep}"text"{ksep}{dumps(doc._text)}{isep}"features"{ksep}{dumps(doc._features.to_dict())}')
+        stream.write(f'{isep}"offset_type"{ksep}{dumps(offset_type)}{isep}"name"{ksep}{dumps(doc.name)}}}')
 
     @staticmethod
     def save_gzip(clazz, inst, **kwargs):
         """
         Invokes the save method with gzip=True
         """
-        JsonSerializer.save(clazz, inst, gzip=True, **kwargs)
+        return JsonSerializer.save(clazz, inst, gzip=True, **kwargs)
 
     @staticmethod
     def load(
-        clazz, from_ext=None, from_mem=None, offset_mapper=None, gzip=False, **kwargs
+        clazz, from_ext=None, from_mem=None, offset_mapper=None, gzip=False, json_codec=None, **kwargs
     ):
         """
 
@@ -250,12 +269,14 @@ class JsonSerializer:
           from_mem: (Default value = None)
           offset_mapper: (Default value = None)
           gzip: (Default value = False)
+          json_codec: the name of the JSON codec to use, if None, the configured codec (Default value = None)
           **kwargs:
 
         Returns:
 
         """
         # print("RUNNING load with from_ext=", from_ext, " from_mem=", from_mem)
+        codec = get_json_codec(json_codec)
 
         if from_ext is not None and from_mem is not None:
             raise Exception("Exactly one of from_ext and from_mem must be specified ")
@@ -275,17 +296,17 @@ class JsonSerializer:
                 pass
         if from_mem is not None:
             if gzip:
-                d = json.loads(decompress(from_mem).decode("UTF-8"))
+                d = codec.loads(decompress(from_mem).decode("UTF-8"))
             else:
-                d = json.loads(from_mem)
+                d = codec.loads(from_mem)
             doc = clazz.from_dict(d, offset_mapper=offset_mapper, **kwargs)
         else:  # from_ext must have been not None and a path
             if gzip:
-                with gopen(extstr, JSON_READ) as infp:
-                    d = json.load(infp)
+                with gopen(extstr, JSON_READ, encoding="utf-8") as infp:
+                    d = codec.load(infp)
             else:
-                with open(extstr, JSON_READ) as infp:
-                    d = json.load(infp)
+                with open(extstr, JSON_READ, encoding="utf-8") as infp:
+                    d = codec.load(infp)
             doc = clazz.from_dict(d, offset_mapper=offset_mapper, **kwargs)
         return doc
 
@@ -614,40 +635,161 @@ class YamlSerializer:
         return YamlSerializer.load(clazz, gzip=True, **kwargs)
 
 
-MSGPACK_VERSION_HDR = "sm2"
+MSGPACK_VERSION_HDR_SM2 = "sm2"
+MSGPACK_VERSION_HDR_SM3 = "sm3"
+# the default format version, which can be read by older versions of gatenlp and by Java GATE
+MSGPACK_VERSION_HDR = MSGPACK_VERSION_HDR_SM2
+
+# the array type codes used for packed int arrays, with the upper bound of non-negative values they can hold
+_INT_ARRAY_TYPES = [("B", 2 ** 8), ("H", 2 ** 16), ("I", 2 ** 32)]
+
+
+def _pack_ints(values):
+    """
+    Returns a list with the array type code and the little endian bytes of an int array holding the values,
+    using the smallest item size that fits all values.
+    """
+    values = array("q", values)
+    typecode = "q"
+    if len(values) > 0 and min(values) >= 0:
+        maxval = max(values)
+        for code, bound in _INT_ARRAY_TYPES:
+            if maxval < bound:
+                typecode = code
+                break
+    if typecode != "q":
+        values = array(typecode, values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return [typecode, values.tobytes()]
+
+
+def _unpack_ints(packed):
+    """
+    Returns the int array for a list of array type code and bytes as created by `_pack_ints`.
+    """
+    typecode, data = packed
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
 
 
 class MsgPackSerializer:
     """ """
 
     @staticmethod
-    def document2stream(doc: Document, stream):
+    def _annset2map(annset):
+        """
+        Returns the map which represents the annotations of the set in the "sm3" format: the types, start
+        offsets, end offsets and ids of all annotations are stored in packed int arrays, where each type is
+        represented by its index in a table of type names. The features are stored as a list of feature maps for
+        the positions of the annotations which have features.
+        """
+        typenames = []
+        typecodes = {}
+        codes, starts, ends, ids = array("q"), array("q"), array("q"), array("q")
+        featpos, feats = [], []
+        if annset.columnar:
+            # use the arrays of the columnar storage without creating any annotations
+            cols = annset._annotations
+            typenames = cols._typenames
+            codes, starts, ends, ids = cols._types, cols._starts, cols._ends, cols._ids
+            for annid, data in cols.feature_items():
+                # like Features.to_dict, drop transient features
+                data = {k: v for k, v in data.items() if not k.startswith("__")}
+                if data:
+                    featpos.append(cols._pos(annid))
+                    feats.append(data)
+        else:
+            for pos, ann in enumerate(annset.fast_iter()):
+                code = typecodes.get(ann._type)
+                if code is None:
+                    code = len(typenames)
+                    typenames.append(ann._type)
+                    typecodes[ann._type] = code
+                codes.append(code)
+                starts.append(ann._start)
+                ends.append(ann._end)
+                ids.append(ann._id)
+                if ann._features is not None and len(ann._features) > 0:
+                    featpos.append(pos)
+                    feats.append(ann._features.to_dict())
+        return {
+            "name": annset.name,
+            "next_annid": annset._next_annid,
+            "typenames": typenames,
+            "types": _pack_ints(codes),
+            "starts": _pack_ints(starts),
+            "ends": _pack_ints(ends),
+            "ids": _pack_ints(ids),
+            "featpos": _pack_ints(featpos),
+            "features": feats,
+        }
+
+    @staticmethod
+    def _map2annset(setmap, doc):
+        """
+        Returns the annotation set for the map created by `_annset2map`.
+        """
+        annset = AnnotationSet(name=setmap["name"] or "", owner_doc=doc)
+        annset._next_annid = setmap["next_annid"]
+        typenames = [intern_name(name) for name in setmap["typenames"]]
+        feats = dict(zip(_unpack_ints(setmap["featpos"]), setmap["features"]))
+        create = Annotation._create
+        annset._annotations = {
+            annid: create(start, end, typenames[code], annid, feats.get(pos), annset)
+            for pos, (code, start, end, annid) in enumerate(zip(
+                _unpack_ints(setmap["types"]), _unpack_ints(setmap["starts"]),
+                _unpack_ints(setmap["ends"]), _unpack_ints(setmap["ids"])))
+        }
+        return annset
+
+    @staticmethod
+    def document2stream(doc: Document, stream, index=False, version=MSGPACK_VERSION_HDR):
         """
 
         Args:
           doc: Document:
           stream:
-          doc: Document:
+          index: if True, append a section with the ids of the annotations of each set sorted by offset
+              and a map from type to annotation ids, which the loader uses to create the indices without
+              sorting. Readers which do not know about the section ignore it. (Default value = False)
+          version: the format version to write, MSGPACK_VERSION_HDR_SM2 ("sm2", the default), where each field
+              of each annotation is stored separately, which can be read by older versions of gatenlp and by
+              Java GATE, or MSGPACK_VERSION_HDR_SM3 ("sm3"), where the annotations of each set are stored in
+              packed int arrays, which is smaller and faster to load, but can only be read by this version of
+              gatenlp.
 
         Returns:
 
         """
-        pack(MSGPACK_VERSION_HDR, stream)
-        pack(doc.offset_type, stream)
-        pack(doc.text, stream)
-        pack(doc.name, stream)
-        pack(doc._features.to_dict(), stream)
-        pack(len(doc._annotation_sets), stream)
+        if version not in (MSGPACK_VERSION_HDR_SM2, MSGPACK_VERSION_HDR_SM3):
+            raise Exception("Not a supported MsgPack format version: {}".format(version))
+        packer = Packer()
+        write = stream.write
+        write(packer.pack(version))
+        write(packer.pack(doc.offset_type))
+        write(packer.pack(doc.text))
+        write(packer.pack(doc.name))
+        write(packer.pack(doc._features.to_dict()))
+        write(packer.pack(len(doc._annotation_sets)))
         for name, annset in doc._annotation_sets.items():
-            pack(name, stream)
-            pack(annset._next_annid, stream)
-            pack(len(annset), stream)
+            write(packer.pack(name))
+            if version == MSGPACK_VERSION_HDR_SM3:
+                write(packer.pack(MsgPackSerializer._annset2map(annset)))
+                continue
+            write(packer.pack(annset._next_annid))
+            write(packer.pack(len(annset)))
             for ann in annset.fast_iter():
-                pack(ann.type, stream)
-                pack(ann.start, stream)
-                pack(ann.end, stream)
-                pack(ann.id, stream)
-                pack(ann.features.to_dict(), stream)
+                write(packer.pack(ann.type))
+                write(packer.pack(ann.start))
+                write(packer.pack(ann.end))
+                write(packer.pack(ann.id))
+                write(packer.pack(ann._features.to_dict() if ann._features is not None else {}))
+        if index:
+            write(packer.pack({name: annset._index_repr() for name, annset in doc._annotation_sets.items()}))
 
     @staticmethod
     def stream2document(stream):
@@ -661,7 +803,7 @@ class MsgPackSerializer:
         """
         u = Unpacker(stream)
         version = u.unpack()
-        if version != MSGPACK_VERSION_HDR:
+        if version not in (MSGPACK_VERSION_HDR_SM2, MSGPACK_VERSION_HDR_SM3):
             raise Exception("MsgPack data starts with wrong version")
         doc = Document()
         doc.offset_type = u.unpack()
@@ -675,6 +817,9 @@ class MsgPackSerializer:
             sname = u.unpack()
             if sname is None:
                 sname = ""
+            if version == MSGPACK_VERSION_HDR_SM3:
+                setsdict[sname] = MsgPackSerializer._map2annset(u.unpack(), doc)
+                continue
             annset = AnnotationSet(name=sname, owner_doc=doc)
             annset._next_annid = u.unpack()
             nanns = u.unpack()
@@ -685,9 +830,19 @@ class MsgPackSerializer:
                 aid = u.unpack()
                 afeatures = u.unpack()
                 ann = Annotation(astart, aend, atype, annid=aid, features=afeatures)
+                ann._owner_set = annset
                 annset._annotations[aid] = ann
             setsdict[sname] = annset
         doc._annotation_sets = setsdict
+        try:
+            indices = u.unpack()
+        except OutOfData:
+            indices = None
+        if indices:
+            for sname, indexrepr in indices.items():
+                annset = setsdict.get("" if sname is None else sname)
+                if annset is not None:
+                    annset._adopt_index(indexrepr)
         return doc
 
     @staticmethod
@@ -709,6 +864,8 @@ class MsgPackSerializer:
           to_mem: (Default value = None)
           offset_type: (Default value = None)
           offset_mapper: (Default value = None)
+          index: if True, include the offset and type indices, see `document2stream` (Default value = False)
+          version: the format version to write, see `document2stream` (Default value = MSGPACK_VERSION_HDR)
           **kwargs:
 
         Returns:
@@ -724,7 +881,7 @@ class MsgPackSerializer:
             f = io.BytesIO()
         else:
             f = open(to_ext, "wb")
-        writer(inst, f)
+        writer(inst, f, index=kwargs.get("index", False), version=kwargs.get("version", MSGPACK_VERSION_HDR))
         if to_mem:
             return f.getvalue()
         else:
@@ -1124,7 +1281,8 @@ class TweetLoader:
              include_entities=True,
              include_quote=False,
              outsetname="Original markups",
-             tweet_ann="Tweet"):
+             tweet_ann="Tweet",
+             json_codec=None):
         """
         Load a tweet from Twitter JSON format.
 
@@ -1143,20 +1301,22 @@ class TweetLoader:
                tweet just like the original tweet.
             outset: the annotation set where to put entity annotations and the tweet annotation(s)
             tweet_ann: the annotation type to use to span the tweet and contain all the features.
+            json_codec: the name of the JSON codec to use, if None, the configured codec
 
         Returns:
             document representing the tweet
         """
+        codec = get_json_codec(json_codec)
         if from_ext is not None:
             isurl, extstr = is_url(from_ext)
             if isurl:
                 jsonstr = get_str_from_url(extstr, encoding="utf-8")
-                tweet = json.loads(jsonstr)
+                tweet = codec.loads(jsonstr)
             else:
                 with open(extstr, "rt", encoding="utf-8") as infp:
-                    tweet = json.load(infp)
+                    tweet = codec.load(infp)
         elif from_mem is not None:
-            tweet = json.loads(from_mem)
+            tweet = codec.loads(from_mem)
         else:
             raise Exception("Cannot load from None")
         if tweet is None:
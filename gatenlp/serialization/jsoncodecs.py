@@ -0,0 +1,166 @@
+"""
+Module that provides the registry of JSON codecs used for reading and writing JSON, e.g. the bdocjs
+format, JSON lines corpora, tweets and the messages exchanged with GATE.
+
+A codec wraps a JSON library: `dumps` always returns a string and `loads` accepts a string or bytes.
+The codec can be chosen with `gatenlpconfig.json_codec` or with the `json_codec` keyword argument of the
+functions which read or write JSON. If neither is set, the "json" codec is used. The following codecs are
+registered:
+
+* "json": the json module of the Python standard library, always available, the default
+* "orjson": the orjson library, the fastest
+* "rapidjson": the python-rapidjson library
+* "ujson": the ujson library
+
+Codecs other than "json" write JSON without spaces after separators, so the output is not identical to the
+output of the standard library. The other codecs are also not lossless for all data the standard library
+can handle, which is why they must be chosen explicitly:
+
+* orjson writes the float values NaN, Infinity and -Infinity as `null`, without any warning
+* orjson cannot read `NaN`, `Infinity` or `-Infinity`, which the standard library writes for these values,
+  so such files, e.g. bdocjs files written with the default codec, fail to load
+* orjson cannot write ints which do not fit into 64 bits
+* ujson and rapidjson differ in similar ways, depending on their version and options
+
+Additional codecs can be added with `register_json_codec`.
+"""
+
+import json
+from gatenlp.gatenlpconfig import gatenlpconfig
+
+
+class JsonCodec:
+    """ """
+
+    def __init__(self, name, dumps, loads, separators=(",", ":")):
+        """
+        Creates a JSON codec.
+
+        Args:
+            name: the name of the codec
+            dumps: a callable which converts an object to a JSON string
+            loads: a callable which converts a JSON string or bytes to an object
+            separators: a tuple with the item and key separator used by dumps, which is needed
+                by writers which create the JSON for a large object piece by piece
+        """
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+        self.separators = separators
+
+    def dump(self, obj, fp):
+        """
+        Writes the JSON representation of the object to the text stream.
+        """
+        fp.write(self.dumps(obj))
+
+    def load(self, fp):
+        """
+        Reads the JSON representation of an object from the stream and returns the object.
+        """
+        return self.loads(fp.read())
+
+    def __repr__(self):
+        return "JsonCodec({})".format(self.name)
+
+
+def _json_codec():
+    return JsonCodec("json", json.dumps, json.loads, separators=(", ", ": "))
+
+
+def _orjson_codec():
+    import orjson
+
+    # like the standard library, convert non-string keys
+    options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj):
+        return orjson.dumps(obj, option=options).decode("utf-8")
+
+    return JsonCodec("orjson", dumps, orjson.loads)
+
+
+def _rapidjson_codec():
+    import rapidjson
+
+    return JsonCodec("rapidjson", rapidjson.dumps, rapidjson.loads)
+
+
+def _ujson_codec():
+    import ujson
+
+    return JsonCodec("ujson", ujson.dumps, ujson.loads)
+
+
+# the registered codec factories, and the codecs or import errors for the codecs created so far
+_JSON_CODECS = {}
+_CREATED = {}
+
+
+def register_json_codec(name, factory):
+    """
+    Registers a JSON codec under the given name, replacing any codec already registered under that name.
+
+    Args:
+        name: the name of the codec
+        factory: a callable which returns the JsonCodec, it only gets called when the codec is first used
+            and may raise an ImportError if the library for the codec is not installed.
+    """
+    _JSON_CODECS[name] = factory
+    _CREATED.pop(name, None)
+
+
+def json_codec_names(available=False):
+    """
+    Returns the names of all registered JSON codecs.
+
+    Args:
+        available: if True, only return the names of codecs which can be imported
+    """
+    if not available:
+        return list(_JSON_CODECS.keys())
+    return [name for name in _JSON_CODECS.keys() if not isinstance(_create(name), ImportError)]
+
+
+def _create(name):
+    codec = _CREATED.get(name)
+    if codec is None:
+        try:
+            codec = _JSON_CODECS[name]()
+        except ImportError as ex:
+            codec = ex
+        _CREATED[name] = codec
+    return codec
+
+
+def get_json_codec(name=None):
+    """
+    Returns the JSON codec with the given name.
+
+    Args:
+        name: the name of a registered codec, or a codec, which is returned unchanged. If None, the codec
+            configured with `gatenlpconfig.json_codec` is returned, or if that is None too, the "json" codec.
+
+    Returns:
+        the codec
+    """
+    if isinstance(name, JsonCodec):
+        return name
+    if name is None:
+        name = gatenlpconfig.json_codec
+    if name is None:
+        name = "json"
+    if name not in _JSON_CODECS:
+        raise Exception(
+            "Unknown JSON codec {}, must be one of {}".format(name, json_codec_names())
+        )
+    codec = _create(name)
+    if isinstance(codec, ImportError):
+        raise ImportError("JSON codec {} cannot be imported: {}".format(name, codec))
+    return codec
+
+
+register_json_codec("json", _json_codec)
+register_json_codec("orjson", _orjson_codec)
+register_json_codec("rapidjson", _rapidjson_codec)
+register_json_codec("ujson", _ujson_codec)
@@ -193,6 +193,25 @@ def file4logger(thelogger, noext=False):
     return lpath
 
 
+def intern_name(name):
+    """
+    Returns the interned version of the given name if it is a string, otherwise the name unchanged.
+
+    Annotation types and feature names are interned so that all annotations loaded or created with the same
+    type or feature name share a single string object, which saves memory and allows comparisons and dictionary
+    lookups to succeed on identity.
+
+    Args:
+        name: the annotation type or feature name
+
+    Returns:
+        the interned name
+    """
+    if type(name) is str:
+        return sys.intern(name)
+    return name
+
+
 def support_annotation_or_set(method):
     """
     Decorator to allow a method that normally takes a start and end
@@ -208,6 +227,9 @@ def support_annotation_or_set(method):
         the adapted method which now takes an annotation or annotation set as well as start/end offsets.
     """
 
+    # look at the parameters of the original method, if it has been wrapped by another decorator
+    varnames = getattr(method, "__wrapped__", method).__code__.co_varnames
+
     @wraps(method)
     def _support_annotation_or_set(self, *args, **kwargs):
         from gatenlp.annotation import Annotation
@@ -228,11 +250,19 @@ def support_annotation_or_set(method):
             if isinstance(obj, Annotation):
                 annid = obj.id
         else:
-            assert len(args) == 2
+            if len(args) != 2 or (hasattr(args[0], "start") and hasattr(args[0], "end")) or \
+                    isinstance(args[0], (tuple, list)):
+                raise Exception(
+                    "Expected an annotation, annotation set, pair or offset, or a start and end offset, "
+                    "other parameters must be passed as keyword arguments, not: {}".format(args)
+                )
             left, right = args
         # if the called method/function does have an annid keyword, pass it, otherwise omit
-        if "annid" in method.__code__.co_varnames:
-            return method(self, left, right, annid=annid, **kwargs)
+        # an explicitly passed annid is kept unless an annotation was passed
+        if "annid" in varnames:
+            if annid is not None or "annid" not in kwargs:
+                kwargs["annid"] = annid
+            return method(self, left, right, **kwargs)
         else:
             return method(self, left, right, **kwargs)
 
@@ -54,6 +54,8 @@ def get_install_extras_require():
             "ipywidgets",
         ],
         "gazetteers": ["matchtext", "recordclass"],
+        "numpy": ["numpy"],
+        "fastjson": ["orjson"],
         # the following are not included in all but in alldev
         "dev": [
             "pytest",
@@ -23,6 +23,51 @@ class TestOffsetMapper01:
             poff = om1.convert_to_python(joff)
             assert poff == i
 
+    def test_offsetmapper01m02(self):
+        import random
+        import pytest
+        from gatenlp.document import OffsetMapper
+
+        np = pytest.importorskip("numpy")
+
+        rand = random.Random(1)
+        for _ in range(20):
+            text = "".join(rand.choice(["a", "ä", "￿", "\U0001F4A9", "\U0010FFFF"]) for _ in range(50))
+            # the tables as created by encoding each character separately
+            p2j, j2p = [], []
+            for i, c in enumerate(text):
+                p2j.append(len(j2p))
+                j2p.extend([i] * (len(c.encode("utf-16-le")) // 2))
+            p2j.append(len(j2p))
+            j2p.append(len(text))
+            om = OffsetMapper(text)
+            assert om.python2java == p2j
+            assert om.java2python == j2p
+            assert om.convert_to_java([3, 7]) == [p2j[3], p2j[7]]
+            assert om.convert_to_java(np.arange(len(p2j))).tolist() == p2j
+            assert om.convert_to_python(np.arange(len(j2p))).tolist() == j2p
+        om = OffsetMapper("no astral characters ä￿")
+        assert om.bijective == 23
+        assert om.python2java is None
+        assert om.convert_to_java([1, 23]) == [1, 23]
+
+    def test_offsetmapper01m03(self):
+        from gatenlp.document import Document, OFFSET_TYPE_JAVA, OFFSET_TYPE_PYTHON
+
+        doc = Document("a\U0001F4A9b c")
+        doc.annset().add(2, 3, "X")
+        om = doc.offset_mapper
+        assert om is doc.offset_mapper
+        assert doc.to_offset_type(OFFSET_TYPE_JAVA) is om
+        assert doc.to_offset_type(OFFSET_TYPE_PYTHON) is om
+        assert doc.copy().offset_mapper is om
+        assert Document().offset_mapper is None
+        doc2 = Document.load_mem(doc.save_mem(offset_type=OFFSET_TYPE_JAVA))
+        assert doc2._offset_mapper is not None
+        assert doc2.annset().first().start == 2
+        doc3 = Document.load_mem(doc.save_mem(), precompute_offset_mapper=True)
+        assert doc3._offset_mapper is not None
+
 
 class TestDocument01:
     def test_document01m01(self):
@@ -173,3 +218,573 @@ class TestAnnotationSet01:
         # print(f"\n!!!!!!!!!!!!DEBUG: anns for At3_2/Token={ret}")
         assert len(ret) == 7
         # TODO: check other kinds of overlap in the original set!
+
+
+def makedoc_random(seed=1, n=200):
+    """Create a document with randomly placed annotations of types T0, T1, T2"""
+    import random
+    from gatenlp.document import Document
+
+    rnd = random.Random(seed)
+    doc = Document("x" * 300)
+    annset = doc.annset()
+    for i in range(n):
+        start = rnd.randint(0, 280)
+        annset.add(start, start + rnd.randint(0, 20), "T" + str(i % 3))
+    return doc
+
+
+class TestAnnotationSetView01:
+    def test_annotationsetview01m01(self):
+        doc = makedoc_random()
+        annset = doc.annset()
+        view = annset.view()
+        assert len(view) == len(annset)
+        assert list(view) == list(annset)
+        for ann in list(annset)[:50]:
+            for method in ["within", "covering", "overlapping", "coextensive", "start_ge"]:
+                expected = list(getattr(annset, method)(ann).with_type("T1"))
+                vw = getattr(view.with_type("T1"), method)(ann)
+                assert list(vw) == expected
+                assert len(vw) == len(expected)
+                vw = getattr(view, method)(ann).with_type("T1", "T5")
+                assert list(vw) == expected
+                for a in expected:
+                    assert a in vw
+                assert ann not in vw
+        sent = annset.add(50, 150, "S")
+        expected = list(annset.within(sent).overlapping(90, 200).with_type("T0"))
+        vw = view.with_type("T0").overlapping(90, 200).within(sent)
+        assert list(vw) == expected
+        assert list(vw.detach()) == expected
+        assert vw.first() == expected[0]
+        assert vw.last() == expected[-1]
+        # views reflect changes of the underlying set
+        annset.add(100, 101, "T0")
+        assert len(vw) == len(expected) + 1
+        assert len(view.within(3, 3)) == 0
+
+
+class TestAnnotationSetTypeIndex01:
+    def test_annotationsettypeindex01m01(self):
+        doc = makedoc_random(seed=2)
+        annset = doc.annset()
+        anns = list(annset)
+        for i, ann in enumerate(anns[:60]):
+            if i == 30:
+                # the per-type indices must be kept up to date
+                annset.remove(anns[100])
+                annset.add(ann.start, ann.end, "T1")
+            for method in ["within", "covering", "overlapping", "coextensive", "start_ge", "start_lt"]:
+                expected = list(getattr(annset, method)(ann).with_type("T1"))
+                assert list(getattr(annset, method)(ann, anntype="T1")) == expected
+                expected = list(getattr(annset, method)(ann).with_type("T1", "T2"))
+                assert list(getattr(annset, method)(ann, anntype=["T1", "T2"])) == expected
+            expected = set(annset.before(ann.start, ann.end).with_type("T0"))
+            assert set(annset.before(ann.start, ann.end, anntype="T0")) == expected
+            expected = set(annset.after(ann.start, ann.end).with_type("T0"))
+            assert set(annset.after(ann.start, ann.end, anntype="T0")) == expected
+
+
+class TestAnnotationSetJoin01:
+    def test_annotationsetjoin01m01(self):
+        doc = makedoc_random(seed=3, n=300)
+        annset = doc.annset()
+        sets = annset.with_type("T0"), annset.with_type("T1", "T2")
+        for relation in ["within", "overlapping", "covering"]:
+            for aset, bset in [sets, (annset, annset)]:
+                result = list(aset.join(bset, relation=relation))
+                assert [a for a, _ in result] == list(aset)
+                for a, found in result:
+                    expected = list(getattr(bset, relation)(a))
+                    assert found == expected
+                result = list(aset.join(bset, relation=relation, pairs=True))
+                assert len(result) == sum(
+                    len(getattr(bset, relation)(a)) for a in aset
+                )
+
+
+class TestAnnotationSetCount01:
+    def test_annotationsetcount01m01(self):
+        doc = makedoc_random(seed=4)
+        annset = doc.annset()
+        annset.add(10, 10, "T0")
+        annset.add(10, 10, "T1")
+        spans = [(ann.start, ann.end) for ann in annset] + [(10, 10), (0, 300), (5, 6)]
+        for method in ["within", "covering", "overlapping"]:
+            count = getattr(annset, "count_" + method)
+            anyof = getattr(annset, "any_" + method)
+            for span in spans:
+                assert count(*span) == len(getattr(annset, method)(*span))
+                assert anyof(*span) == (len(getattr(annset, method)(*span)) > 0)
+                assert count(*span, anntype="T1") == len(
+                    getattr(annset, method)(*span).with_type("T1")
+                )
+            for ann in annset:
+                assert count(ann) == len(getattr(annset, method)(ann))
+                assert count(ann, include_self=True) == len(
+                    getattr(annset, method)(ann, include_self=True)
+                )
+                assert count(ann, anntype=["T0", "T2"]) == len(
+                    getattr(annset, method)(ann, anntype=["T0", "T2"])
+                )
+
+
+class TestAnnotationSetColumnar01:
+    def test_annotationsetcolumnar01m01(self):
+        from gatenlp.document import Document
+
+        doc1 = makedoc_random(seed=5)
+        doc2 = makedoc_random(seed=5)
+        doc2.columnar = True
+        set1 = doc1.annset()
+        set2 = doc2.annset()
+        assert set2.columnar
+        assert len(set2) == len(set1)
+        assert list(set2) == list(set1)
+        for ann in list(set1)[:40]:
+            for method in ["within", "covering", "overlapping"]:
+                assert list(getattr(set2, method)(ann)) == list(getattr(set1, method)(ann))
+        assert list(set2.with_type("T1")) == list(set1.with_type("T1"))
+        # features set on an annotation are kept after the annotation is not used any more
+        set2.get(3).features["f"] = 1
+        import gc
+
+        gc.collect()
+        assert set2.get(3).features["f"] == 1
+        assert set2.get(3) is set2.get(3)
+        assert len(set2._annotations._features) <= 2
+        ann = set2.add(2, 5, "T9", dict(a=1))
+        assert set2.get(ann.id) is ann
+        set2.remove(ann)
+        assert ann.id not in set2
+        set1.get(3).features["f"] = 1
+        assert set2.to_dict()["annotations"] == set1.to_dict()["annotations"]
+        # sets created later and copies use columnar mode too
+        assert doc2.annset("other").columnar
+        assert set2.copy().columnar
+        assert list(set2.deepcopy()) == list(set1)
+        set2.columnar = False
+        assert list(set2) == list(set1)
+        doc3 = Document.load_mem(doc1.save_mem(fmt="bdocjs"), fmt="bdocjs", columnar=True)
+        assert doc3.annset().columnar
+        assert list(doc3.annset()) == list(set1)
+
+    def test_annotationsetcolumnar01m02(self):
+        import gc
+        import pickle
+        from gatenlp.changelog import ChangeLog
+
+        doc = makedoc_random(seed=5)
+        doc.columnar = True
+        doc.changelog = ChangeLog()
+        annset = doc.annset()
+        annset.create_feature_index("f")
+        # annotations from a detached set or a query on it still belong to the original set
+        detached = annset.detach()
+        gc.collect()
+        detached.get(3).features["f"] = 1
+        ann = list(detached.within(0, len(doc.text)).detach(restrict_to=[5]))[0]
+        ann.features["f"] = 2
+        gc.collect()
+        assert annset.get(3).features.to_dict() == {"f": 1}
+        assert annset.get(5).features.to_dict() == {"f": 2}
+        assert [a.id for a in annset.with_feature("f", 1)] == [3]
+        assert len(doc.changelog) == 2
+        # a document with a columnar set can be pickled
+        doc2 = pickle.loads(pickle.dumps(doc))
+        assert doc2.annset().columnar
+        assert doc2.annset().to_dict() == annset.to_dict()
+        assert doc2.annset().get(5).features["f"] == 2
+
+
+class TestAnnotationLazyFeatures01:
+    def test_annotationlazyfeatures01m01(self):
+        import pickle
+        from gatenlp.annotation import Annotation
+
+        ann1 = Annotation(0, 3, "T", annid=1)
+        ann2 = Annotation(0, 3, "T", features={}, annid=1)
+        assert ann1._features is None
+        assert ann1 == ann2
+        assert ann1.to_dict()["features"] == {}
+        assert not hasattr(ann1, "__dict__")
+        assert len(ann1.features) == 0
+        ann1.features["a"] = 1
+        assert ann1 != ann2
+        ann3 = pickle.loads(pickle.dumps(ann1))
+        assert ann3 == ann1
+        assert ann3.features["a"] == 1
+
+
+class TestDocumentCopyOnWrite01:
+    def test_documentcopyonwrite01m01(self):
+        for deep in [False, True]:
+            doc1 = makedoc_random(seed=6)
+            set1 = doc1.annset()
+            set1.get(0).features["f"] = [1]
+            orig = set1.to_dict()
+            doc2 = doc1.deepcopy() if deep else doc1.copy()
+            set2 = doc2.annset()
+            assert set2.document is doc2
+            assert len(set2) == len(set1)
+            assert list(set2) == list(set1)
+            assert set2.get(1) is not set1.get(1)
+            assert list(set2.covering(10, 11)) == list(set1.covering(10, 11))
+            set2.get(1).features["g"] = 2
+            set2.remove(2)
+            set2.add(0, 5, "New")
+            assert set1.to_dict() == orig
+            # changes in the original are not visible in the copy, also for annotations not accessed yet
+            ann = set1.get(3)
+            ann.features["h"] = 3
+            set1.remove(4)
+            assert "h" not in set2.get(3).features
+            assert 4 in set2
+            assert 2 in set1
+            # copies of copies
+            doc3 = doc2.copy()
+            set3 = doc3.annset()
+            set2.get(5).features["i"] = 5
+            assert "i" not in set3.get(5).features
+            assert set3.get(1).features["g"] == 2
+            assert len(set3) == len(set2)
+        # a deep copy does not share mutable feature values
+        doc2 = doc1.deepcopy()
+        doc2.annset().get(0).features["f"].append(2)
+        assert set1.get(0).features["f"] == [1]
+        # clone_anns creates independent annotations
+        set4 = set1.copy()
+        set4.clone_anns()
+        set1.get(6).features["j"] = 6
+        assert "j" not in set4.get(6).features
+        set4.get(7).features["k"] = 7
+        assert "k" not in set1.get(7).features
+
+    def test_documentcopyonwrite01m02(self):
+        import pickle
+
+        doc1 = makedoc_random(seed=7)
+        set1 = doc1.annset()
+        set1.get(0).features["x"] = [1]
+        # in place changes of feature values in the original are not visible in a deep copy
+        doc2 = doc1.deepcopy()
+        set3 = set1.deepcopy()
+        set1.get(0).features["x"].append(2)
+        assert doc2.annset().get(0).features["x"] == [1]
+        assert set3.get(0).features["x"] == [1]
+        # the original and the copies can still be pickled
+        doc3 = doc1.copy()
+        for doc in [doc1, doc2, doc3]:
+            doc4 = pickle.loads(pickle.dumps(doc))
+            assert doc4.annset().to_dict() == doc.annset().to_dict()
+        doc4, doc5 = pickle.loads(pickle.dumps([doc1, doc3]))
+        doc4.annset().get(1).features["y"] = 1
+        assert "y" not in doc5.annset().get(1).features
+        doc5.annset().remove(2)
+        assert 2 in doc4.annset()
+
+
+class TestAnnotationSetNonOverlapping01:
+    def test_annotationsetnonoverlapping01m01(self):
+        from gatenlp.document import Document
+
+        doc = Document("x" * 20)
+        annset = doc.annset()
+        a1 = annset.add(0, 3, "Lookup")
+        a2 = annset.add(2, 10, "Lookup")
+        a3 = annset.add(0, 2, "Token")
+        a4 = annset.add(10, 12, "Token")
+        a5 = annset.add(10, 11, "Lookup")
+        assert [a.id for a in annset.with_type("Token", "Lookup", non_overlapping=True)] == [
+            a3.id, a2.id, a4.id
+        ]
+        assert [a.id for a in annset.with_type(
+            "Token", "Lookup", non_overlapping=True, policy="leftmost")] == [a1.id, a4.id]
+        assert [a.id for a in annset.with_type(
+            "Lookup", "Token", non_overlapping=True, policy="leftmost")] == [a1.id, a4.id]
+        assert [a.id for a in annset.with_type(
+            "Lookup", "Token", non_overlapping=True, policy="longest-first")] == [a3.id, a2.id, a4.id]
+        assert [a.id for a in annset.with_type(
+            "Lookup", non_overlapping=True, policy="longest-first")] == [a2.id, a5.id]
+
+    def test_annotationsetnonoverlapping01m02(self):
+        doc = makedoc_random(seed=7, n=300)
+        annset = doc.annset()
+        for policy in ["type-priority", "leftmost", "longest-first"]:
+            selected = list(annset.with_type("T0", "T1", non_overlapping=True, policy=policy))
+            assert selected == sorted(selected)
+            for ann1, ann2 in zip(selected, selected[1:]):
+                assert ann1.end <= ann2.start and ann1.start < ann2.start
+            # every candidate which was not selected overlaps with a selected one
+            for ann in annset.with_type("T0", "T1"):
+                assert any(
+                    s.start == ann.start or (s.start < ann.end and ann.start < s.end) for s in selected
+                )
+        longest = list(annset.with_type("T0", "T1", non_overlapping=True, policy="longest-first"))
+        assert max(a.length for a in longest) == max(a.length for a in annset.with_type("T0", "T1"))
+
+
+class TestAnnotationSetFeatureIndex01:
+    def test_annotationsetfeatureindex01m01(self):
+        doc = makedoc_random(seed=8)
+        annset = doc.annset()
+        for ann in annset:
+            if ann.id % 2 == 0:
+                ann.features["pos"] = "NN" if ann.id % 4 == 0 else "VB"
+        annset.get(1).features["pos"] = ["unhashable"]
+
+        def expected(value, anntype=None):
+            return [
+                a for a in annset
+                if a.features.get("pos") == value and (anntype is None or a.type == anntype)
+            ]
+
+        unindexed = list(annset.with_feature("pos", "NN"))
+        assert unindexed == expected("NN")
+        annset.create_feature_index("pos")
+        assert list(annset.with_feature("pos", "NN")) == unindexed
+        assert list(annset.with_feature("pos", "VB", anntype="T1")) == expected("VB", "T1")
+        # the index is kept up to date
+        annset.get(0).features["pos"] = "VB"
+        del annset.get(2).features["pos"]
+        annset.get(3).features.update(pos="NN")
+        annset.get(4).features.clear()
+        annset.remove(8)
+        annset.add(1, 2, "T1", features=dict(pos="NN"))
+        assert list(annset.with_feature("pos", "NN")) == expected("NN")
+        assert list(annset.with_feature("pos", "VB")) == expected("VB")
+        # combined with offset and type constraints
+        view = annset.view().with_type("T0").with_feature("pos", "NN").within(0, 150)
+        assert list(view) == [a for a in annset.within(0, 150) if a in expected("NN", "T0")]
+        assert all(a in view for a in view)
+        annset.clear()
+        assert len(annset.with_feature("pos", "NN")) == 0
+
+
+class TestAnnotationSetArrays01:
+    def test_annotationsetarrays01m01(self):
+        import pytest
+
+        np = pytest.importorskip("numpy")
+        doc = makedoc_random(seed=9)
+        annset = doc.annset()
+        arrays = annset.to_arrays()
+        assert len(arrays) == len(annset)
+        assert arrays.ids.tolist() == [a.id for a in annset]
+        assert arrays.starts.tolist() == [a.start for a in annset]
+        t1 = annset.to_arrays(anntype="T1")
+        assert t1.ids.tolist() == [a.id for a in annset.with_type("T1")]
+        assert arrays.ids[arrays.type_mask("T1")].tolist() == t1.ids.tolist()
+        spans = list(t1.ids.tolist())[:20]
+        for method in ["overlapping", "within", "covering", "coextensive"]:
+            matrix = getattr(arrays, "is" + method)(annset.with_type("T1"))
+            assert matrix.shape == (len(annset), len(t1))
+            for col, annid in enumerate(spans):
+                ann = annset.get(annid)
+                expected = [a.id for a in getattr(annset, method)(ann, include_self=True)]
+                assert sorted(arrays.ids[getattr(arrays, "is" + method)(ann)].tolist()) == sorted(expected)
+                assert matrix[:, col].tolist() == getattr(arrays, "is" + method)(ann).tolist()
+        ann = annset.get(spans[0])
+        assert arrays.gap(ann).tolist() == [a.gap(ann.start, ann.end) for a in annset]
+        assert arrays.isbefore(ann).tolist() == [a.isbefore(ann) for a in annset]
+        assert arrays.isafter(ann, immediately=True).tolist() == [
+            a.isafter(ann, immediately=True) for a in annset
+        ]
+        assert arrays.isoverlapping(np.array([0, 10]), np.array([5, 20])).shape == (len(annset), 2)
+
+
+class TestAnnotationSetNextPrev01:
+    def test_annotationsetnextprev01m01(self):
+        doc = makedoc_random(seed=10)
+        annset = doc.annset()
+        for anntype in [None, "T1", ["T0", "T2"]]:
+            for ann in list(annset)[::7]:
+                after = list(annset.after(ann.start, ann.end, annid=ann.id, anntype=anntype))
+                assert list(annset.next_k(ann, k=3, anntype=anntype)) == after[:3]
+                before = sorted(
+                    annset.before(ann.start, ann.end, annid=ann.id, anntype=anntype),
+                    key=lambda a: (-a.end, -a.start, -a.id),
+                )
+                assert list(annset.prev_k(ann, k=3, anntype=anntype)) == sorted(before[:3])
+                nearest = annset.nearest(ann, anntype=anntype)
+                candidates = [(ann.start - a.end, 0, a) for a in before[:1]] + [
+                    (a.start - ann.end, 1, a) for a in after[:1]
+                ]
+                if candidates:
+                    assert nearest == min(candidates, key=lambda c: c[:2])[2]
+                else:
+                    assert nearest is None
+        assert len(annset.next_k(0, k=0)) == 0
+        # the parameters after the span must be passed as keyword arguments
+        import pytest
+
+        ann = annset.get(2)
+        with pytest.raises(Exception):
+            annset.next_k(ann, 3)
+        with pytest.raises(Exception):
+            annset.prev_k((ann.start, ann.end), 3)
+        with pytest.raises(Exception):
+            annset.next_k(ann.start, ann.end, 3)
+        assert len(annset.next_k(ann, k=3)) == min(3, len(annset.after(ann.start, ann.end, annid=ann.id)))
+
+
+class TestInterning01:
+    def test_interning01m01(self):
+        import sys
+        from gatenlp.document import Document
+
+        doc = makedoc_random(seed=11, n=20)
+        doc.annset().add(0, 1, "".join(["Tok", "en"]), {"".join(["po", "s"]): "NN"})
+        for fmt in ["bdocjs", "bdocmp"]:
+            doc1 = Document.load_mem(doc.save_mem(fmt=fmt), fmt=fmt)
+            doc2 = Document.load_mem(doc.save_mem(fmt=fmt), fmt=fmt)
+            for ann1, ann2 in zip(doc1.annset(), doc2.annset()):
+                assert ann1.type is ann2.type
+                for name1, name2 in zip(ann1.features.keys(), ann2.features.keys()):
+                    assert name1 is name2
+            ann = doc1.annset().with_type("Token").first()
+            assert ann.type is sys.intern("Token")
+            assert list(ann.features.keys())[0] is sys.intern("pos")
+
+
+class TestDocumentFreeze01:
+    def test_documentfreeze01m01(self):
+        import threading
+        import pytest
+
+        doc = makedoc_random(seed=12, n=300)
+        # frozen sets are only read, so the interval tree is a good fit
+        doc.index_backend = "intervaltree"
+        doc.annset("other").add(0, 3, "T0")
+        doc.annset().create_feature_index("f")
+        expected = {}
+        for start in range(0, 100, 3):
+            for anntype in [None, "T1", "Nope"]:
+                expected[(start, anntype)] = [
+                    a.id for a in doc.annset().overlapping(start, start + 5, anntype=anntype)
+                ]
+        doc.freeze()
+        assert doc.frozen
+        annset = doc.annset()
+        assert annset.frozen and annset.immutable
+        indices = (annset._index_by_offset, annset._index_by_type, annset._index_by_type_offset)
+        with pytest.raises(Exception):
+            annset.add(0, 1, "X")
+        with pytest.raises(Exception):
+            annset.remove(annset.first())
+        with pytest.raises(Exception):
+            annset.clear()
+        with pytest.raises(Exception):
+            annset.immutable = False
+        with pytest.raises(Exception):
+            annset.first().features["x"] = 1
+        with pytest.raises(Exception):
+            annset.create_feature_index("g")
+        with pytest.raises(Exception):
+            doc.features["x"] = 1
+        with pytest.raises(Exception):
+            doc.annset("newset")
+        with pytest.raises(Exception):
+            doc.remove_annset("other")
+
+        errors = []
+
+        def query():
+            try:
+                for (start, anntype), ids in expected.items():
+                    ret = [a.id for a in annset.overlapping(start, start + 5, anntype=anntype)]
+                    assert ret == ids
+                    annset.count_within(start, start + 5)
+                    annset.with_type("T0", "Nope")
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=query) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        # queries did not create or replace any index
+        assert annset._index_by_offset is indices[0]
+        assert annset._index_by_type is indices[1]
+        assert annset._index_by_type_offset is indices[2]
+        assert set(indices[2].keys()) >= {"T0", "T1", "T2"}
+        assert indices[0]._maxends is not None
+        # copies are not frozen
+        doc2 = doc.copy()
+        assert not doc2.frozen and not doc2.annset().frozen
+        doc2.annset().add(0, 1, "X")
+        assert len(doc2.annset()) == len(annset) + 1
+
+    def test_documentfreeze01m02(self):
+        import pytest
+        from gatenlp.document import Document
+        from gatenlp.annotation_set import AnnotationSet
+
+        annset = AnnotationSet()
+        annset.freeze()
+        assert annset.frozen
+        assert list(annset.within(0, 10)) == []
+        assert list(annset.within(0, 10, anntype="T")) == []
+        with pytest.raises(Exception):
+            annset.add(0, 1, "X")
+        doc = Document("x")
+        doc.annset("a")
+        doc.freeze()
+        assert doc.annset("a").frozen
+        assert len(doc.annset("a").covering(0, 1)) == 0
+
+    def test_documentfreeze01m03(self):
+        # reading from a frozen copy-on-write or columnar set does not change the set
+        doc1 = makedoc_random(seed=14, n=100)
+        doc1.annset("cols").add(0, 3, "T0", {"a": 1})
+        doc1.annset("cols").add(1, 3, "T1")
+        doc1.annset("cols").columnar = True
+        doc2 = doc1.copy()
+        for doc in [doc1, doc2]:
+            doc.freeze()
+            for annset in [doc.annset(name) for name in doc.annset_names()]:
+                assert isinstance(annset._annotations, dict)
+                for ann in annset:
+                    assert ann._features is not None
+                    assert annset.get(ann.id) is ann
+            assert doc.annset("cols").get(0).features["a"] == 1
+        assert doc2.annset().to_dict() == doc1.annset().to_dict()
+
+
+class TestAnnotationSetQueryCache01:
+    def test_annotationsetquerycache01m01(self):
+        doc = makedoc_random(seed=13, n=300)
+        annset = doc.annset()
+        assert annset.query_cache_stats() is None
+        annset.enable_query_cache(maxsize=50)
+        spans = [(start, start + 7) for start in range(0, 100, 5)]
+        expected = [[a.id for a in annset.covering(s, e, anntype="T1")] for s, e in spans]
+        # not used as long as the set is mutable
+        assert annset.query_cache_stats() == dict(hits=0, misses=0, size=0, maxsize=50)
+        doc.freeze()
+        for _ in range(2):
+            assert [[a.id for a in annset.covering(s, e, anntype="T1")] for s, e in spans] == expected
+        assert annset.query_cache_stats() == dict(hits=20, misses=20, size=20, maxsize=50)
+        ann = annset.first()
+        assert annset.count_within(ann, anntype=["T0", "T2"]) == annset.count_within(
+            ann, anntype=["T0", "T2"]
+        )
+        assert annset.nearest(ann) is annset.nearest(ann)
+        assert len(annset.within(ann)) == len(annset.within(ann.start, ann.end)) - 1
+        assert len(annset.within(ann)) == len(annset.within(ann.start, ann.end, annid=ann.id))
+        for start in range(100):
+            annset.overlapping(start, start + 1)
+        assert annset.query_cache_stats()["size"] == 50
+
+        detached = annset.detach()
+        detached.enable_query_cache()
+        before = len(detached.overlapping(0, 50))
+        assert len(detached.overlapping(0, 50)) == before
+        assert detached.query_cache_stats()["hits"] == 1
+        detached.immutable = False
+        assert detached.query_cache_stats()["size"] == 0
+        detached.add(10, 20, "T1")
+        assert len(detached.overlapping(0, 50)) == before + 1
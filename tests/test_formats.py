@@ -198,6 +198,74 @@ class TestFormatJson:
         assert ann2.end == 8
         assert len(ann2.features) == 0
 
+    def test_formatjson03(self):
+        import io
+        import json
+        import gzip
+        from gatenlp.document import Document, OFFSET_TYPE_JAVA
+        from gatenlp.serialization.default import JsonSerializer
+
+        doc = Document.load(os.path.join("tests", "testdoc1.bdocjs"), fmt="text/bdocjs")
+        doc.annset("Set2").add(2, 8, "Type2", {"x": ["\U0001F4A9", 1.5, None]})
+        doc.annset("Set3")
+        for kwargs in [
+            dict(),
+            dict(offset_type=OFFSET_TYPE_JAVA),
+            dict(annsets=["Set2", ("", "Type1"), ("Set3", "X")]),
+            dict(index=True),
+        ]:
+            stream = io.StringIO()
+            JsonSerializer.document2stream(doc, stream, json_codec="json", **kwargs)
+            assert stream.getvalue() == json.dumps(doc.to_dict(**kwargs))
+            assert doc.save_mem(fmt="text/bdocjs", json_codec="json", **kwargs) == stream.getvalue()
+        asgzip = doc.save_mem(fmt="text/bdocjs+gzip", json_codec="json")
+        assert gzip.decompress(asgzip).decode("UTF-8") == json.dumps(doc.to_dict())
+
+
+class TestJsonCodecs01:
+    def test_jsoncodecs01(self):
+        import io
+        from gatenlp.document import Document
+        from gatenlp.gatenlpconfig import gatenlpconfig
+        from gatenlp.serialization.default import JsonSerializer
+        from gatenlp.serialization.jsoncodecs import get_json_codec, json_codec_names
+
+        names = json_codec_names(available=True)
+        assert "json" in names
+        # the standard library is the default, whatever else is installed
+        assert get_json_codec().name == "json"
+        with pytest.raises(Exception):
+            get_json_codec("nosuchcodec")
+        path = os.path.join("tests", "testdoc1.bdocjs")
+        expected = Document.load(path, fmt="text/bdocjs", json_codec="json").to_dict()
+        for name in names:
+            codec = get_json_codec(name)
+            doc = Document.load(path, fmt="text/bdocjs", json_codec=name)
+            assert doc.to_dict() == expected, name
+            doc.annset().add(0, 1, "X", {"s": "\U0001F4A9\n", "n": [1.5, None, True]})
+            asjson = doc.save_mem(fmt="text/bdocjs", json_codec=name)
+            assert asjson == codec.dumps(doc.to_dict())
+            stream = io.StringIO()
+            JsonSerializer.document2stream(doc, stream, json_codec=name, index=True)
+            assert stream.getvalue() == codec.dumps(doc.to_dict(index=True))
+            for other in names:
+                doc2 = Document.load_mem(asjson, fmt="text/bdocjs", json_codec=other)
+                assert doc2.to_dict() == doc.to_dict(), (name, other)
+        # the default codec keeps values which not all codecs support
+        doc = Document("abc")
+        doc.features["nan"] = float("nan")
+        doc.features["big"] = 2 ** 70
+        doc2 = Document.load_mem(doc.save_mem(fmt="text/bdocjs"), fmt="text/bdocjs")
+        assert doc2.features["nan"] != doc2.features["nan"]
+        assert doc2.features["big"] == 2 ** 70
+        old = gatenlpconfig.json_codec
+        try:
+            for name in names:
+                gatenlpconfig.json_codec = name
+                assert get_json_codec().name == name
+        finally:
+            gatenlpconfig.json_codec = old
+
 
 class TestFormatMsgPack:
     def test_formatmsgpack01(self):
@@ -271,3 +339,71 @@ class TestFormatMsgPack:
         assert ann2.start == 2
         assert ann2.end == 8
         assert len(ann2.features) == 0
+
+    def test_formatmsgpack03(self):
+        from gatenlp.document import Document, OFFSET_TYPE_JAVA
+
+        doc1 = Document("A \U0001F4A9 document")
+        doc1.annset().add(4, 12, "Type1")
+        doc1.annset().add(0, 1, "Type2")
+        asbytes = doc1.save_mem(fmt="text/bdocmp", offset_type=OFFSET_TYPE_JAVA)
+        doc2 = Document.load_mem(asbytes, fmt="text/bdocmp", create_indices=True)
+        anns = doc2.annset()
+        assert anns._index_by_offset is not None
+        assert anns._index_by_type is not None
+        ret = anns.within(3, 12)
+        assert len(ret) == 1
+        assert ret.first().type == "Type1"
+        assert ret.first().start == 4
+
+    def test_formatmsgpack04(self):
+        from gatenlp.document import Document
+
+        doc1 = makedoc1()
+        doc1.annset().add(0, 17, "Type2")
+        doc1.annset().add(0, 1, "Type1")
+        for fmt in ["text/bdocmp", "text/bdocjs"]:
+            doc2 = Document.load_mem(doc1.save_mem(fmt=fmt, index=True), fmt=fmt)
+            anns = doc2.annset()
+            assert anns._index_by_offset is not None
+            assert anns._index_by_type is not None
+            assert set(anns.type_names) == {"Type1", "Type2"}
+            assert [a.id for a in anns] == [a.id for a in doc1.annset()]
+            assert [a.id for a in anns.within(0, 2)] == [0, 2]
+            assert [a.id for a in anns.with_type("Type1")] == [0, 2]
+            doc3 = Document.load_mem(doc1.save_mem(fmt=fmt), fmt=fmt)
+            assert doc3.annset()._index_by_offset is None
+            assert doc3.to_dict() == doc2.to_dict()
+
+    def test_formatmsgpack05(self):
+        from gatenlp.document import Document
+        from gatenlp.serialization.default import MSGPACK_VERSION_HDR_SM2, MSGPACK_VERSION_HDR_SM3
+
+        doc1 = Document("x" * 400)
+        doc1.features["feat1"] = "value1"
+        anns = doc1.annset("Tokens")
+        for i in range(300):
+            anns.add(i, i + 1 + i % 3, ["Token", "Space"][i % 2], {"n": i} if i % 7 == 0 else None)
+        anns.remove(5)
+        anns.add(10, 20, "Far", annid=70000)
+        anns.get(7).features["__transient"] = 1
+        doc1.annset("Columnar").add(0, 3, "Type1", {"x": [1, 2]})
+        doc1.annset("Columnar").columnar = True
+        expected = doc1.to_dict()
+        mem2 = doc1.save_mem(fmt="bdocmp")
+        mem3 = doc1.save_mem(fmt="bdocmp", version=MSGPACK_VERSION_HDR_SM3)
+        # the default is still the format which older versions and Java GATE can read
+        assert mem2 == doc1.save_mem(fmt="bdocmp", version=MSGPACK_VERSION_HDR_SM2)
+        assert mem2[:4] == b"\xa3sm2"
+        assert mem3[:4] == b"\xa3sm3"
+        assert len(mem3) < len(mem2)
+        for mem in [mem2, mem3]:
+            doc2 = Document.load_mem(mem, fmt="bdocmp")
+            assert doc2.to_dict() == expected
+            assert [a.id for a in doc2.annset("Tokens")] == [a.id for a in anns]
+            assert doc2.annset("Tokens").get(0).features["n"] == 0
+            assert doc2.annset("Tokens").get(0)._owner_set is doc2.annset("Tokens")
+        doc3 = Document.load_mem(doc1.save_mem(fmt="bdocmp", version=MSGPACK_VERSION_HDR_SM3, index=True),
+                                 fmt="bdocmp")
+        assert doc3.annset("Tokens")._index_by_offset is not None
+        assert [a.id for a in doc3.annset("Tokens").within(0, 3)] == [0, 1]
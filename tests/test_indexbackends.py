@@ -0,0 +1,146 @@
+"""
+Conformance tests which every registered index backend must pass.
+"""
+import random
+from gatenlp.impl import get_index_backend, index_backend_names
+
+
+def backends():
+    """Returns all registered backends for which the offset index class can be imported"""
+    ret = []
+    for name in index_backend_names():
+        backend = get_index_backend(name)
+        try:
+            backend.offset_index_class
+        except ImportError:
+            continue
+        ret.append(backend)
+    return ret
+
+
+def random_intervals(seed, n=300, maxoff=100):
+    rand = random.Random(seed)
+    ret = []
+    for annid in range(n):
+        start = rand.randint(0, maxoff)
+        ret.append((start, start + rand.choice([0, 1, 2, 5, 20]), annid))
+    return ret
+
+
+def byid(intvls):
+    return sorted(intvls, key=lambda x: x[2])
+
+
+class TestIndexBackendsConformance01:
+    def test_offsetindex01(self):
+        intvls = random_intervals(1)
+        removed = intvls[::5]
+        kept = [x for x in intvls if x not in removed]
+        for backend in backends():
+            idx = backend.offset_index_class()
+            idx.update(intvls[:100])
+            for intvl in intvls[100:]:
+                idx.add(*intvl)
+            for intvl in removed:
+                idx.remove(*intvl)
+            idx.discard(*removed[0])
+            idx.prepare()
+            assert len(idx) == len(kept), backend
+            assert idx.min_start() == min(x[0] for x in kept)
+            assert idx.max_end() == max(x[1] for x in kept)
+            minstart = min(x[0] for x in kept)
+            assert byid(idx.firsts()) == [x for x in kept if x[0] == minstart]
+            maxstart = max(x[0] for x in kept)
+            assert byid(idx.lasts()) == [x for x in kept if x[0] == maxstart]
+            for off in range(-1, 130, 7):
+                assert byid(idx.starting_at(off)) == [x for x in kept if x[0] == off]
+                assert byid(idx.ending_at(off)) == [x for x in kept if x[1] == off]
+                assert byid(idx.starting_before(off)) == [x for x in kept if x[0] < off]
+                assert byid(idx.ending_to(off)) == [x for x in kept if x[1] <= off]
+                assert byid(idx.ending_after(off)) == [x for x in kept if x[1] > off]
+                # starting_from must be in document order, ending_to in reverse must have decreasing ends
+                assert list(idx.starting_from(off)) == sorted(
+                    [x for x in kept if x[0] >= off], key=lambda x: (x[0], x[2])
+                )
+                ends = [x[1] for x in idx.ending_to(off, reverse=True)]
+                assert ends == sorted([x[1] for x in kept if x[1] <= off], reverse=True)
+            for start in range(0, 120, 9):
+                for length in [0, 1, 3, 10, 30]:
+                    end = start + length
+                    within = [x for x in kept if x[0] >= start and x[1] <= end]
+                    covering = [x for x in kept if x[0] <= start and x[1] >= end]
+                    overlapping = [x for x in kept if x[0] < end and x[1] > start]
+                    at = [x for x in kept if x[0] == start and x[1] == end]
+                    assert byid(idx.at(start, end)) == at, backend
+                    assert byid(idx.within(start, end)) == within, backend
+                    assert byid(idx.covering(start, end)) == covering, backend
+                    assert byid(idx.overlapping(start, end)) == overlapping, backend
+                    assert idx.count_within(start, end) == len(within), backend
+                    assert idx.count_covering(start, end) == len(covering), backend
+                    if length > 0:
+                        assert idx.count_overlapping(start, end) == len(overlapping), backend
+            for intvl in kept:
+                idx.remove(*intvl)
+            assert len(idx) == 0
+
+    def test_annotationset01(self):
+        from gatenlp.document import Document
+
+        doc = Document("x" * 130)
+        annset = doc.annset()
+        for start, end, annid in random_intervals(2, n=200):
+            annset.add(start, end, "T{}".format(annid % 3))
+        expected = None
+        for backend in backends():
+            annset.index_backend = backend.name
+            assert annset.index_backend == backend.name
+            assert annset.offset_index_class is backend.offset_index_class
+            result = []
+            for start in range(0, 120, 11):
+                for end in [start, start + 4, start + 25]:
+                    for anntype in [None, "T1", ["T0", "T2"]]:
+                        result.append([a.id for a in annset.within(start, end, anntype=anntype)])
+                        result.append([a.id for a in annset.covering(start, end, anntype=anntype)])
+                        result.append([a.id for a in annset.overlapping(start, end, anntype=anntype)])
+                        result.append([a.id for a in annset.next_k(start, end, k=3, anntype=anntype)])
+                        result.append([a.id for a in annset.prev_k(start, end, k=3, anntype=anntype)])
+            result.append([a.id for a in annset.with_type("T1")])
+            ann = annset.add(3, 40, "T1", annid=1000)
+            result.append([a.id for a in annset.covering(20, 30, anntype="T1")])
+            annset.remove(ann)
+            if expected is None:
+                expected = result
+            assert result == expected, backend
+
+
+class TestIndexBackendsConfig01:
+    def test_config01(self):
+        import pytest
+        from gatenlp.document import Document
+        from gatenlp.annotation_set import AnnotationSet
+        from gatenlp.gatenlpconfig import gatenlpconfig
+        from gatenlp.impl import SortedIntvls, IntervalTree
+
+        assert set(index_backend_names()) >= {"intervaltree", "sorted", "array"}
+        assert AnnotationSet().index_backend == gatenlpconfig.index_backend == "sorted"
+        old = gatenlpconfig.index_backend
+        try:
+            gatenlpconfig.index_backend = "intervaltree"
+            doc = Document("some text")
+            assert doc.annset().offset_index_class is IntervalTree
+        finally:
+            gatenlpconfig.index_backend = old
+        doc = Document("some text")
+        doc.annset("a").add(0, 4, "X")
+        doc.index_backend = "intervaltree"
+        assert doc.annset("a").index_backend == "intervaltree"
+        assert doc.annset("b").index_backend == "intervaltree"
+        doc.annset("b").index_backend = "sorted"
+        assert doc.annset("b").offset_index_class is SortedIntvls
+        assert doc.annset("a").detach().index_backend == "intervaltree"
+        assert doc.copy().annset("a").index_backend == "intervaltree"
+        doc2 = Document.load_mem(doc.save_mem(), index_backend="intervaltree")
+        assert doc2.annset("a").index_backend == "intervaltree"
+        assert len(doc2.annset("a").within(0, 5)) == 1
+        with pytest.raises(Exception):
+            doc.index_backend = "nosuchbackend"
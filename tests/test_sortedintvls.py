@@ -62,3 +62,147 @@ class TestSortedIntvls01:
         assert (5, 9, 3, "int6") in ret7
         assert (8, 10, 5, "int8") in ret7
         assert (8, 9, 9, "int7") in ret7
+
+
+INTVLS1 = [
+    (0, 3, 0),
+    (4, 5, 1),
+    (9, 10, 2),
+    (5, 9, 3),
+    (4, 10, 4),
+    (8, 10, 5),
+    (5, 6, 6),
+    (0, 20, 7),
+    (8, 9, 8),
+    (4, 5, 9),
+    (7, 7, 10),
+]
+
+
+class TestArrayIntvls01:
+    def test_arrayintvls01(self):
+        import pytest
+
+        pytest.importorskip("numpy")
+        from gatenlp.impl.arrayintvls import ArrayIntvls
+
+        si1 = SortedIntvls()
+        si1.update(INTVLS1)
+        ai1 = ArrayIntvls()
+        for intvl in INTVLS1:
+            ai1.add(*intvl)
+        assert len(ai1) == len(INTVLS1)
+        assert list(ai1.irange()) == list(si1.irange())
+        assert list(ai1.irange(reverse=True)) == list(si1.irange(reverse=True))
+        assert list(ai1.firsts()) == list(si1.firsts())
+        assert list(ai1.lasts()) == list(si1.lasts())
+        assert ai1.min_start() == si1.min_start()
+        assert ai1.max_end() == si1.max_end()
+        for off in range(0, 22):
+            assert list(ai1.starting_at(off)) == list(si1.starting_at(off))
+            assert list(ai1.starting_from(off)) == list(si1.starting_from(off))
+            assert list(ai1.starting_before(off)) == list(si1.starting_before(off))
+            assert sorted(ai1.ending_at(off)) == sorted(si1.ending_at(off))
+            assert sorted(ai1.ending_to(off)) == sorted(si1.ending_to(off))
+            assert sorted(ai1.ending_after(off)) == sorted(si1.ending_after(off))
+            for end in range(off, 22):
+                assert list(ai1.at(off, end)) == list(si1.at(off, end))
+                assert list(ai1.within(off, end)) == list(si1.within(off, end))
+                assert list(ai1.covering(off, end)) == list(si1.covering(off, end))
+                assert list(ai1.overlapping(off, end)) == list(
+                    si1.overlapping(off, end)
+                )
+                assert ai1.count_within(off, end) == len(list(si1.within(off, end)))
+                assert ai1.count_covering(off, end) == len(list(si1.covering(off, end)))
+                assert ai1.count_overlapping(off, end) == len(
+                    list(si1.overlapping(off, end))
+                )
+                assert si1.count_within(off, end) == len(list(si1.within(off, end)))
+                assert si1.count_covering(off, end) == len(list(si1.covering(off, end)))
+                assert si1.count_overlapping(off, end) == len(
+                    list(si1.overlapping(off, end))
+                )
+        ai1.remove(4, 10, 4)
+        si1.remove(4, 10, 4)
+        ai1.discard(4, 10, 4)
+        ai1.add(2, 3, 11)
+        si1.add(2, 3, 11)
+        assert list(ai1.irange()) == list(si1.irange())
+        assert list(ai1.covering(8, 9)) == list(si1.covering(8, 9))
+
+    def test_arrayintvls02(self):
+        import random
+        import pytest
+
+        pytest.importorskip("numpy")
+        from gatenlp.impl.arrayintvls import ArrayIntvls
+
+        # removals get queued like additions, also when they are mixed with additions and queries
+        rnd = random.Random(2)
+        intvls = [
+            (start, start + rnd.randint(0, 10), i) for i, start in enumerate(rnd.choices(range(100), k=200))
+        ]
+        ai1 = ArrayIntvls()
+        si1 = SortedIntvls()
+        ai1.update(intvls)
+        si1.update(intvls)
+        for i in range(150):
+            intvl = intvls.pop(rnd.randrange(len(intvls)))
+            ai1.remove(*intvl)
+            si1.remove(*intvl)
+            ai1.discard(*intvl)
+            with pytest.raises(ValueError):
+                ai1.remove(*intvl)
+            if i % 3 == 0:
+                intvl = (rnd.randint(0, 100), 110, 1000 + i)
+                intvls.append(intvl)
+                ai1.add(*intvl)
+                si1.add(*intvl)
+            if i % 7 == 0:
+                # removing an interval which has just been added
+                intvl = intvls.pop()
+                ai1.remove(*intvl)
+                si1.remove(*intvl)
+            assert len(ai1) == len(si1)
+            if i % 5 == 0:
+                assert list(ai1.irange()) == list(si1.irange())
+                assert sorted(ai1.ending_to(50)) == sorted(si1.ending_to(50))
+                assert ai1.count_overlapping(20, 40) == si1.count_overlapping(20, 40)
+        assert list(ai1.irange()) == list(si1.irange())
+
+
+class TestIntervalTree01:
+    def test_intervaltree01(self):
+        import random
+        from gatenlp.impl import IntervalTree
+
+        rnd = random.Random(1)
+        intvls = []
+        for i in range(300):
+            start = rnd.randint(0, 200)
+            intvls.append((start, start + rnd.randint(0, 30), i))
+        it1 = IntervalTree()
+        si1 = SortedIntvls()
+        for intvl in intvls:
+            it1.add(*intvl)
+            si1.add(*intvl)
+        for i in range(200):
+            start = rnd.randint(0, 230)
+            end = start + rnd.randint(0, 20)
+            # the first query after a modification scans, all others use the tree
+            for _ in range(2):
+                assert list(it1.covering(start, end)) == list(si1.covering(start, end))
+                assert list(it1.overlapping(start, end)) == list(
+                    si1.overlapping(start, end)
+                )
+                assert it1.count_covering(start, end) == len(list(si1.covering(start, end)))
+                assert it1.count_within(start, end) == len(list(si1.within(start, end)))
+            if i % 20 == 0:
+                intvl = intvls.pop(rnd.randrange(len(intvls)))
+                it1.remove(*intvl)
+                si1.remove(*intvl)
+        ret = list(it1.covering(10, 11))
+        assert ret == [
+            i for i in sorted(intvls, key=lambda x: (x[0], x[2]))
+            if i[0] <= 10 and i[1] >= 11
+        ]